@@ -5,6 +5,10 @@ import { Link, useNavigate } from "react-router-dom";
 import Header from "../components/Header";
 import axios from "axios";
 import { useAuth } from "../contexts/AuthContext";
+import {
+  extractWithProgress,
+  classifyExtractionError,
+} from "../utils/extractStream";
 import { FaGraduationCap } from "react-icons/fa";
 import {
   HiOutlineDocumentText,
@@ -134,20 +138,52 @@ const UploadPage = () => {
       setExtracting(true);
       setMessage("AI Analysis in progress...");
 
+      // Show fields as soon as they are known; the overall score only
+      // arrives with the complete result
+      const showPartialResult = (fileName, fields) =>
+        setExtractedData((prev) =>
+          prev.some((row) => row.fileName === fileName)
+            ? prev.map((row) =>
+                row.fileName === fileName ? { ...row, ...fields } : row
+              )
+            : [...prev, { fileName, extractionMethods: {}, ...fields }]
+        );
+
       const extractionPromises = uploadResults.map(async (result) => {
         try {
-          const extractResponse = await axios.post(
-            "http://localhost:5000/api/extract",
+          const extractResult = await extractWithProgress(
             {
               fileId: result.uploadResponse.fileId || result.uploadResponse.id,
               fileName: result.file.name,
               filePath:
                 result.uploadResponse.filePath || result.uploadResponse.path,
-            }
+            },
+            (event, data) => {
+              if (event === "text_extracted") {
+                setMessage(
+                  data.pages
+                    ? `Text extracted (${data.pages} pages), finding your details...`
+                    : "Text extracted, finding your details..."
+                );
+              } else if (event === "entities") {
+                showPartialResult(result.file.name, {
+                  name: data.name || "Not found",
+                  cgpa: data.cgpa?.toString() || "Not found",
+                  program: data.program || "Not found",
+                  confidence: { ...data.confidence, overall: 0 },
+                  qualityTier: "unknown",
+                  error: null,
+                });
+              } else if (event === "translation" && data.program_english) {
+                showPartialResult(result.file.name, {
+                  program: data.program_english,
+                });
+              }
+            },
+            // Same trace as the upload, so both show up together in the logs
+            result.uploadResponse.traceId
           );
 
-          const extractResult = extractResponse.data;
-
           return {
             fileName: result.file.name,
             name: extractResult.name || "Not found",
@@ -169,7 +205,28 @@ const UploadPage = () => {
             extractError
           );
 
-          if (extractError.response?.status === 503) {
+          const { kind, retryAfter } = classifyExtractionError(extractError);
+          const retryIn = retryAfter ? `in ${retryAfter} seconds` : "shortly";
+
+          if (kind === "busy" || kind === "warming_up") {
+            const label = kind === "busy" ? "Service busy" : "Warming up";
+            return {
+              fileName: result.file.name,
+              name: label,
+              cgpa: label,
+              program: label,
+              confidence: { name: 0, cgpa: 0, program: 0, overall: 0 },
+              extractionMethods: {},
+              qualityTier: "unknown",
+              retryAfter,
+              error:
+                kind === "busy"
+                  ? `The extraction service is busy. Please retry ${retryIn}.`
+                  : `The extraction service is warming up. Please retry ${retryIn}.`,
+            };
+          }
+
+          if (kind === "unavailable") {
             return {
               fileName: result.file.name,
               name: "Service unavailable",
@@ -219,10 +276,22 @@ const UploadPage = () => {
           result.error && result.error.includes("Python extraction service")
       );
 
+      const retryLater = validResults.filter(
+        (result) => result.name === "Service busy" || result.name === "Warming up"
+      );
+
       if (serviceUnavailable) {
         setMessage(
           "Files uploaded but extraction service is unavailable. Please start the Python extraction service on port 5001."
         );
+      } else if (retryLater.length > 0) {
+        const waits = retryLater.map((result) => result.retryAfter || 0);
+        const longest = Math.max(...waits);
+        setMessage(
+          retryLater.some((result) => result.name === "Warming up")
+            ? `Files uploaded but the extraction service is still warming up. Please retry ${longest ? `in ${longest} seconds` : "shortly"}.`
+            : `Files uploaded but the extraction service is busy. Please retry ${longest ? `in ${longest} seconds` : "shortly"}.`
+        );
       } else if (validResults.length > 0) {
         // Step 3: Create Guest Profile
         const latestResult = validResults[validResults.length - 1];
@@ -0,0 +1,131 @@
+// Utility to run a transcript extraction with progress events
+
+/**
+ * Parse one server-sent event block ("event: x\ndata: {...}")
+ * @param {string} block - Text between two blank lines
+ * @returns {{event: string, data: Object}|null} Parsed event, or null if empty
+ */
+const parseEvent = (block) => {
+  let event = "message";
+  const dataLines = [];
+
+  block.split("\n").forEach((line) => {
+    if (line.startsWith("event:")) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith("data:")) {
+      dataLines.push(line.slice(5).trim());
+    }
+  });
+
+  if (dataLines.length === 0) {
+    return null;
+  }
+  return { event, data: JSON.parse(dataLines.join("\n")) };
+};
+
+/**
+ * Extract a transcript through the streaming endpoint
+ *
+ * onEvent is called with each stage as soon as it finishes:
+ * text_extracted ({textLength, pages}), entities (name, cgpa, program
+ * before translation), translation ({program_english, field_of_study})
+ * and complete (the same body as /api/extract).
+ *
+ * Errors are thrown shaped like axios errors ({response: {status, data}})
+ * so callers can keep their existing error handling, plus retryAfter
+ * (seconds) when the service asked the caller to come back later.
+ *
+ * @param {Object} payload - {fileId, fileName, filePath}
+ * @param {Function} onEvent - Called with (event, data)
+ * @param {string} [correlationId] - Trace ID to continue (e.g. the upload's)
+ * @returns {Promise<Object>} The complete extraction result
+ */
+export const extractWithProgress = async (
+  payload,
+  onEvent = () => {},
+  correlationId = null
+) => {
+  const headers = { "Content-Type": "application/json" };
+  if (correlationId) {
+    headers["X-Correlation-ID"] = correlationId;
+  }
+
+  const response = await fetch("http://localhost:5000/api/extract/stream", {
+    method: "POST",
+    headers,
+    body: JSON.stringify(payload),
+  });
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    const error = new Error(data.error || `Extraction failed (${response.status})`);
+    error.response = { status: response.status, data };
+    error.retryAfter = Number(response.headers.get("Retry-After")) || null;
+    throw error;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const parsed = parseEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      if (!parsed) {
+        continue;
+      }
+      onEvent(parsed.event, parsed.data);
+
+      if (parsed.event === "complete") {
+        return parsed.data;
+      }
+      if (parsed.event === "error") {
+        const { status, ...data } = parsed.data;
+        const error = new Error(data.error || "Extraction failed");
+        error.response = { status, data };
+        error.retryAfter = Number(data.retry_after) || null;
+        throw error;
+      }
+    }
+  }
+
+  throw new Error("Extraction stream ended before the result was complete");
+};
+
+/**
+ * Classify a failed extraction for the UI
+ *
+ * 429, or a 503 with Retry-After, comes from the extraction service
+ * shedding load or warming up; a 503 carrying code ECONNREFUSED means
+ * the Node server could not reach the service at all.
+ *
+ * @param {Error} error - Error thrown by extractWithProgress
+ * @returns {{kind: string, retryAfter: number|null}} kind is "busy",
+ *   "warming_up", "unavailable" or "failed"
+ */
+export const classifyExtractionError = (error) => {
+  const status = error.response?.status;
+  const retryAfter = error.retryAfter || null;
+
+  if (status === 429) {
+    return { kind: "busy", retryAfter };
+  }
+  if (status === 503 && retryAfter) {
+    const warmingUp = /warming up/i.test(error.response?.data?.error || "");
+    return { kind: warmingUp ? "warming_up" : "busy", retryAfter };
+  }
+  if (status === 503 && error.response?.data?.code === "ECONNREFUSED") {
+    return { kind: "unavailable", retryAfter: null };
+  }
+  return { kind: "failed", retryAfter: null };
+};
@@ -9,11 +9,32 @@ from pathlib import Path
 from datetime import datetime
 import spacy
 
+# Ways a predicted value may count as matching the expected value
+MATCH_RULES = {
+    'exact': lambda expected, predicted: expected == predicted,
+    'whitespace': lambda expected, predicted: expected.replace(' ', '') == predicted.replace(' ', ''),
+    'substring': lambda expected, predicted: expected in predicted or predicted in expected,
+    'contained': lambda expected, predicted: predicted in expected
+}
+
+def values_match(expected, predicted, rules=('exact', 'whitespace', 'substring')):
+    """Check a prediction against the expected value with the given match rules"""
+    return any(MATCH_RULES[rule](expected, predicted) for rule in rules)
+
 class AccuracyTracker:
     """Track and measure accuracy over time"""
     
-    def __init__(self, log_file="./accuracy_log.jsonl"):
+    def __init__(self, log_file="./accuracy_log.jsonl", match_rules=('exact', 'contained')):
         self.log_file = Path(log_file)
+        self.match_rules = match_rules
+    
+    def _values_match(self, pred, truth, field):
+        """Compare one field of a prediction with the verified value"""
+        # Normalize for comparison
+        pred_val = str(pred.get(field, '')).upper().strip()
+        truth_val = str(truth[field]).upper().strip()
+        
+        return values_match(truth_val, pred_val, self.match_rules)
         
     def log_prediction(self, file_name, predicted, ground_truth=None, user_verified=False):
         """
@@ -73,11 +94,7 @@ class AccuracyTracker:
                 if field in truth and truth[field] is not None:
                     results[field]['total'] += 1
                     
-                    # Normalize for comparison
-                    pred_val = str(pred.get(field, '')).upper().strip()
-                    truth_val = str(truth[field]).upper().strip()
-                    
-                    if pred_val == truth_val or pred_val in truth_val:
+                    if self._values_match(pred, truth, field):
                         results[field]['correct'] += 1
         
         # Print results
@@ -145,10 +162,8 @@ class AccuracyTracker:
                 for field in ['name', 'cgpa', 'program']:
                     if field in truth and truth[field]:
                         total += 1
-                        pred_val = str(pred.get(field, '')).upper().strip()
-                        truth_val = str(truth[field]).upper().strip()
                         
-                        if pred_val == truth_val or pred_val in truth_val:
+                        if self._values_match(pred, truth, field):
                             correct += 1
             
             if total > 0:
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+Bounded concurrency with a bounded wait queue, per-request deadlines and
+load shedding for the extraction service
+"""
+
+import math
+import time
+import asyncio
+import threading
+from collections import Counter
+from contextlib import contextmanager, asynccontextmanager
+
+class Overloaded(Exception):
+    """Request shed before any work was done"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+class DeadlineExceeded(Exception):
+    """Request ran out of time between two stages"""
+
+    def __init__(self, stage, elapsed):
+        super().__init__(f"Deadline exceeded before {stage} ({elapsed:.2f}s elapsed)")
+        self.stage = stage
+        self.elapsed = elapsed
+
+class Deadline:
+    """Time budget for one request, checked between stages"""
+
+    def __init__(self, seconds):
+        self.start = time.monotonic()
+        self.seconds = seconds
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def remaining(self):
+        return self.seconds - self.elapsed()
+
+    def check(self, stage):
+        """Raise DeadlineExceeded if no time is left to start the next stage"""
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(stage, self.elapsed())
+
+class AdmissionController:
+    """
+    Lets at most max_concurrent requests run and max_queue wait
+
+    A request arriving to a full queue is rejected at once (429); one that
+    waits longer than queue_timeout is rejected too (503). Retry-After is
+    estimated from the recent service time and the queue depth.
+    """
+
+    def __init__(self, max_concurrent=4, max_queue=16, queue_timeout=5.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.completed = 0
+        self.shed = Counter()
+        self.deadline_exceeded = Counter()
+
+        # Exponentially weighted mean of service time, for Retry-After
+        self.mean_service_seconds = 1.0
+
+    def retry_after(self):
+        """Seconds until a slot is likely to be free (at least 1)"""
+        backlog = (self.waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(backlog * self.mean_service_seconds))
+
+    @contextmanager
+    def admit(self):
+        """Hold a concurrency slot for the duration of the block"""
+        with self._condition:
+            if self.active >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    self.shed['queue_full'] += 1
+                    raise Overloaded(429, 'queue_full', self.retry_after())
+
+                self.waiting += 1
+                self.peak_waiting = max(self.peak_waiting, self.waiting)
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self.active < self.max_concurrent, timeout=self.queue_timeout
+                    )
+                finally:
+                    self.waiting -= 1
+
+                if not admitted:
+                    self.shed['queue_timeout'] += 1
+                    raise Overloaded(503, 'queue_timeout', self.retry_after())
+
+            self.active += 1
+            self.admitted += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._condition:
+                self.active -= 1
+                self.completed += 1
+                self.mean_service_seconds = 0.8 * self.mean_service_seconds + 0.2 * elapsed
+                self._condition.notify()
+
+    def record_deadline_exceeded(self, stage):
+        with self._condition:
+            self.deadline_exceeded[stage] += 1
+
+    def snapshot(self):
+        """Current load, limits and shed counts"""
+        with self._condition:
+            return {
+                'active': self.active,
+                'queue_depth': self.waiting,
+                'peak_queue_depth': self.peak_waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_seconds': self.queue_timeout,
+                'admitted': self.admitted,
+                'completed': self.completed,
+                'shed': dict(self.shed),
+                'deadline_exceeded': dict(self.deadline_exceeded),
+                'mean_service_ms': round(self.mean_service_seconds * 1000, 1)
+            }
+
+class AsyncAdmissionController(AdmissionController):
+    """
+    AdmissionController for asyncio servers
+
+    Waiting requests hold only a coroutine rather than a thread, so the
+    queue can be much longer than the thread pool.
+    """
+
+    def __init__(self, max_concurrent=4, max_queue=1000, queue_timeout=5.0):
+        super().__init__(max_concurrent, max_queue, queue_timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a concurrency slot for the duration of the block"""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                with self._condition:
+                    self.shed['queue_full'] += 1
+                raise Overloaded(429, 'queue_full', self.retry_after())
+
+            with self._condition:
+                self.waiting += 1
+                self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                with self._condition:
+                    self.shed['queue_timeout'] += 1
+                raise Overloaded(503, 'queue_timeout', self.retry_after())
+            finally:
+                with self._condition:
+                    self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        with self._condition:
+            self.active += 1
+            self.admitted += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._condition:
+                self.active -= 1
+                self.completed += 1
+                self.mean_service_seconds = 0.8 * self.mean_service_seconds + 0.2 * elapsed
+            self._semaphore.release()
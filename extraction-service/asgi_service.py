@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+ASGI Service
+Async variant of the extraction service's /health and /api/extract
+endpoints: request bodies are read without holding a thread, while the
+shared extraction stages (text, NER, translation) run on a dedicated
+executor behind an async admission queue
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from ner_service import (
+    startup, extraction_stages, empty_result, health_status, readiness_status, metrics_snapshot,
+    MAX_CONCURRENT_EXTRACTIONS, QUEUE_TIMEOUT_SECONDS
+)
+from admission_control import AsyncAdmissionController
+from tracing import start_trace, trace_context, STATUS_ERROR
+
+logger = logging.getLogger(__name__)
+
+# Waiting requests are coroutines rather than threads, so far more of
+# them can queue than in the Flask service
+MAX_WAITING_EXTRACTIONS = int(os.environ.get("ASGI_MAX_WAITING_EXTRACTIONS", "1000"))
+
+# Extraction requests only carry a file path
+MAX_BODY_BYTES = 1024 * 1024
+
+ALLOWED_ORIGINS = {'http://localhost:3000', 'http://localhost:5000'}
+
+admission = AsyncAdmissionController(MAX_CONCURRENT_EXTRACTIONS, MAX_WAITING_EXTRACTIONS, QUEUE_TIMEOUT_SECONDS)
+
+# CPU-bound work (PDF parsing, NER, translation) runs here, one thread
+# per admission slot, so the event loop never blocks on a model
+inference_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_EXTRACTIONS, thread_name_prefix="inference")
+
+class RequestTooLarge(Exception):
+    pass
+
+async def run_inference(func, *args):
+    """Run a CPU-bound function on the inference executor, inside the request's trace"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(inference_executor, context.run, func, *args)
+
+async def handle_extract_request(data, client_timeout_ms=None, trace=None):
+    """
+    Async counterpart of ner_service.handle_extract_request
+
+    Returns:
+        (body dict, status code, headers dict)
+    """
+    with start_trace("POST /api/extract", trace, file_name=(data or {}).get('fileName', 'unknown')) as root:
+        body, status, headers = await run_extract_request(data, client_timeout_ms)
+        root.set_attribute('http.status_code', status)
+        if status >= 500:
+            root.status = STATUS_ERROR
+
+    headers['X-Correlation-ID'] = root.trace_id
+    return body, status, headers
+
+async def run_extract_request(data, client_timeout_ms=None):
+    """ner_service.extraction_stages, with each step run on the inference executor"""
+    stages = extraction_stages(data, client_timeout_ms, admission)
+    slot = None
+    value, error = None, None
+
+    try:
+        while True:
+            try:
+                step, arg = stages.throw(error) if error else stages.send(value)
+            except StopIteration as stop:
+                return stop.value
+
+            value, error = None, None
+            try:
+                if step == 'admit':
+                    held = admission.admit()
+                    await held.__aenter__()
+                    slot = held
+                elif step == 'release':
+                    held, slot = slot, None
+                    await held.__aexit__(None, None, None)
+                elif step == 'run':
+                    value = await run_inference(*arg)
+            except Exception as e:
+                error = e
+    finally:
+        stages.close()
+        if slot is not None:
+            await slot.__aexit__(None, None, None)
+
+async def read_body(receive):
+    """Collect the request body, refusing anything over MAX_BODY_BYTES"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+def cors_headers(request_headers):
+    """Access-Control headers for allowed origins (same origins as the Flask app)"""
+    origin = request_headers.get('origin')
+    if origin not in ALLOWED_ORIGINS:
+        return {}
+    return {'Access-Control-Allow-Origin': origin, 'Vary': 'Origin'}
+
+async def send_response(send, status, body=None, headers=None):
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    response_headers = [(b'content-length', str(len(payload)).encode())]
+    if body is not None:
+        response_headers.append((b'content-type', b'application/json'))
+    for name, value in (headers or {}).items():
+        response_headers.append((name.lower().encode(), str(value).encode()))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Load in the background so /health answers while /ready is still 503
+            threading.Thread(target=startup, name="startup", daemon=True).start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            inference_executor.shutdown(wait=False, cancel_futures=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path']
+    request_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    headers = cors_headers(request_headers)
+
+    if method == 'OPTIONS' and headers:
+        headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        headers['Access-Control-Allow-Headers'] = request_headers.get('access-control-request-headers', '')
+        await send_response(send, 204, headers=headers)
+        return
+
+    if method == 'GET' and path == '/health':
+        await send_response(send, 200, health_status(), headers)
+    elif method == 'GET' and path == '/ready':
+        body, status = readiness_status()
+        await send_response(send, status, body, headers)
+    elif method == 'GET' and path == '/metrics':
+        await send_response(send, 200, metrics_snapshot(admission), headers)
+    elif method == 'POST' and path == '/api/extract':
+        try:
+            raw = await read_body(receive)
+        except RequestTooLarge:
+            await send_response(send, 413, empty_result('Request body too large'), headers)
+            return
+        if raw is None:
+            return
+        try:
+            data = json.loads(raw) if raw else None
+        except ValueError:
+            data = None
+
+        body, status, extra_headers = await handle_extract_request(
+            data, request_headers.get('x-request-timeout-ms'),
+            trace_context(request_headers.get('traceparent'), request_headers.get('x-correlation-id'))
+        )
+        await send_response(send, status, body, {**headers, **extra_headers})
+    elif path in ('/health', '/ready', '/metrics', '/api/extract'):
+        await send_response(send, 405, {'error': 'Method not allowed'}, headers)
+    else:
+        await send_response(send, 404, {'error': 'Not found'}, headers)
+
+if __name__ == "__main__":
+    # Usage: python asgi_service.py  (or: uvicorn asgi_service:app --port 5001)
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn is not installed: pip install uvicorn")
+        sys.exit(1)
+
+    port = int(os.environ.get("PORT", "5001"))
+
+    print("=" * 60)
+    print("🐍 NER Extraction Service (ASGI)")
+    print("=" * 60)
+    print(f"   - Port: {port}")
+    print(f"   - Inference threads: {MAX_CONCURRENT_EXTRACTIONS}")
+    print(f"   - Max waiting requests: {MAX_WAITING_EXTRACTIONS}")
+    print(f"   - Health: http://localhost:{port}/health")
+    print(f"   - Ready: http://localhost:{port}/ready")
+    print("=" * 60)
+
+    uvicorn.run(app, host="::", port=port, log_level="info")
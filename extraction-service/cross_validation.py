@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+K-Fold Cross-Validation for the Custom NER Model
+Trains the fold models concurrently and reports mean/std per entity
+"""
+
+import json
+import time
+import random
+import shutil
+import statistics
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from docbin_cache import gold_docbin_path
+from hyperparameter_sweep import limited_worker_threads
+
+def kfold_indices(n_examples, k=5, random_seed=42):
+    """
+    Split example indices into k folds
+
+    Returns:
+        List of (train_indices, test_indices) pairs
+    """
+    indices = list(range(n_examples))
+    random.Random(random_seed).shuffle(indices)
+
+    folds = [indices[i::k] for i in range(k)]
+
+    return [
+        ([idx for j, fold in enumerate(folds) if j != i for idx in fold], folds[i])
+        for i in range(k)
+    ]
+
+def _train_fold(fold, docbin_path, train_idx, test_idx, params, n_iter, output_dir):
+    """
+    Train and score one fold inside a worker process
+
+    Periodic evaluation is off, so the fold's test split never picks the
+    weights it is scored on; the model after the last iteration is kept.
+    """
+    from docbin_cache import load_docs
+    from modelTraining import train_ner_model
+
+    docs = load_docs(docbin_path)
+
+    start = time.perf_counter()
+    metadata = train_ner_model(
+        train_data=[docs[i] for i in train_idx],
+        test_data=[docs[i] for i in test_idx],
+        output_dir=output_dir,
+        n_iter=n_iter,
+        verbose=False,
+        checkpoint_every=0,
+        **{**params, "eval_every": 0}
+    )
+    elapsed = time.perf_counter() - start
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    shutil.rmtree(f"{output_dir}_checkpoints", ignore_errors=True)
+
+    return {
+        "fold": fold,
+        "train_examples": len(train_idx),
+        "test_examples": len(test_idx),
+        "precision": metadata.get("test_precision") or 0.0,
+        "recall": metadata.get("test_recall") or 0.0,
+        "f1": metadata.get("test_f1_score") or 0.0,
+        "per_entity": {
+            label: {
+                "precision": (values.get("p") or 0.0) * 100,
+                "recall": (values.get("r") or 0.0) * 100,
+                "f1": (values.get("f") or 0.0) * 100
+            }
+            for label, values in (metadata.get("test_per_entity") or {}).items()
+        },
+        "training_seconds": round(elapsed, 2)
+    }
+
+def _mean_std(values):
+    """Mean and (sample) standard deviation, 0.0 for a single value"""
+    if not values:
+        return 0.0, 0.0
+    mean = statistics.mean(values)
+    std = statistics.stdev(values) if len(values) > 1 else 0.0
+    return mean, std
+
+def summarize_folds(fold_results):
+    """
+    Aggregate fold scores into mean/std per entity and overall
+
+    Returns:
+        dict: {"overall": {...}, "per_entity": {label: {...}}}
+    """
+    summary = {"overall": {}, "per_entity": {}}
+
+    for metric in ["precision", "recall", "f1"]:
+        mean, std = _mean_std([r[metric] for r in fold_results])
+        summary["overall"][metric] = {"mean": mean, "std": std}
+
+    labels = sorted({label for r in fold_results for label in r["per_entity"]})
+    for label in labels:
+        summary["per_entity"][label] = {}
+        for metric in ["precision", "recall", "f1"]:
+            # A fold without any predictions for the label scores 0
+            values = [r["per_entity"].get(label, {}).get(metric, 0.0) for r in fold_results]
+            mean, std = _mean_std(values)
+            summary["per_entity"][label][metric] = {"mean": mean, "std": std}
+
+    return summary
+
+def run_cross_validation(
+    data,
+    k=5,
+    params=None,
+    n_iter=100,
+    work_dir="./cv_runs",
+    max_workers=None,
+    threads_per_worker=1,
+    random_seed=42
+):
+    """
+    Train k fold models in a process pool and report mean/std scores
+
+    Args:
+        data: List of (text, annotations) examples (train + test pooled)
+        k: Number of folds
+        params: Extra keyword arguments for train_ner_model (learn_rate, dropout, ...)
+        n_iter: Training iterations per fold
+        work_dir: Scratch directory for fold models and the results file
+        max_workers: Worker processes (default: one per fold)
+        threads_per_worker: Math threads each worker may use
+        random_seed: Seed for the fold assignment
+
+    Returns:
+        dict with per-fold results, the summary and the wall time
+    """
+    params = params or {}
+    work_path = Path(work_dir)
+    work_path.mkdir(parents=True, exist_ok=True)
+
+    # Gold Docs are built once and shared by every fold
+    docbin_path = gold_docbin_path(data)
+    folds = kfold_indices(len(data), k, random_seed)
+
+    if max_workers is None:
+        max_workers = k
+
+    print(f"Cross-validating {len(data)} examples with {k} folds "
+          f"on {max_workers} workers x {threads_per_worker} thread(s)")
+
+    start = time.perf_counter()
+    fold_results = []
+
+    context = multiprocessing.get_context("spawn")
+    with limited_worker_threads(threads_per_worker):
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    _train_fold, fold, str(docbin_path), train_idx, test_idx,
+                    params, n_iter, str(work_path / f"fold_{fold}")
+                )
+                for fold, (train_idx, test_idx) in enumerate(folds)
+            ]
+
+            for future in as_completed(futures):
+                result = future.result()
+                fold_results.append(result)
+                print(f"Fold {result['fold']} | F1: {result['f1']:5.2f}% | "
+                      f"{result['training_seconds']:.1f}s")
+
+    wall_seconds = time.perf_counter() - start
+    fold_results.sort(key=lambda r: r["fold"])
+    summary = summarize_folds(fold_results)
+
+    report = {
+        "k": k,
+        "examples": len(data),
+        "params": params,
+        "n_iter": n_iter,
+        "wall_seconds": round(wall_seconds, 2),
+        "summary": summary,
+        "folds": fold_results
+    }
+
+    with open(work_path / "cross_validation_results.json", 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(summary, wall_seconds)
+    print(f"Results saved to: {work_path / 'cross_validation_results.json'}")
+
+    return report
+
+def print_summary(summary, wall_seconds):
+    """Print mean ± std per entity and overall"""
+    print("\n" + "=" * 70)
+    print(f"{'Entity':<15} {'Precision':>16} {'Recall':>16} {'F1':>16}")
+    print("-" * 70)
+
+    rows = list(summary["per_entity"].items()) + [("OVERALL", summary["overall"])]
+    for label, metrics in rows:
+        cells = " ".join(
+            f"{metrics[m]['mean']:7.2f} ± {metrics[m]['std']:5.2f}"
+            for m in ["precision", "recall", "f1"]
+        )
+        print(f"{label:<15} {cells}")
+
+    print("=" * 70)
+    print(f"Total wall time: {wall_seconds:.1f}s")
+
+if __name__ == "__main__":
+    import sys
+    from train_data import TRAIN_DATA
+    from test_data import TEST_DATA
+
+    # Usage: python cross_validation.py [k]
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    run_cross_validation(list(TRAIN_DATA) + list(TEST_DATA), k=k)
@@ -3,9 +3,50 @@
 Step 2: Convert Label Studio export to spaCy training format
 """
 
+import re
 import json
+import random
+import hashlib
+from collections import defaultdict
 from pathlib import Path
 
+import numpy
+import spacy
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+def labelstudio_item_to_example(item):
+    """
+    Convert one Label Studio task to (text, {"entities": [...]})
+    
+    Returns:
+        The example, or None if the task has no annotations or entities
+    """
+    # Get text
+    text = item['data']['text']
+    
+    # Get annotations
+    if 'annotations' not in item or len(item['annotations']) == 0:
+        return None
+    
+    annotation = item['annotations'][0]  # Use first annotation
+    results = annotation.get('result', [])
+    
+    # Extract entities
+    entities = []
+    for result in results:
+        if result['type'] == 'labels':
+            entity_label = result['value']['labels'][0]
+            start = result['value']['start']
+            end = result['value']['end']
+            
+            entities.append((start, end, entity_label))
+    
+    if not entities:
+        return None
+    
+    return (text, {"entities": entities})
+
 def convert_labelstudio_to_spacy(labelstudio_file, output_file):
     """
     Convert Label Studio JSON export to spaCy training format
@@ -24,31 +65,11 @@ def convert_labelstudio_to_spacy(labelstudio_file, output_file):
     
     for item in labelstudio_data:
         try:
-            # Get text
-            text = item['data']['text']
-            
-            # Get annotations
-            if 'annotations' not in item or len(item['annotations']) == 0:
-                skipped += 1
-                continue
-            
-            annotation = item['annotations'][0]  # Use first annotation
-            results = annotation.get('result', [])
-            
-            # Extract entities
-            entities = []
-            for result in results:
-                if result['type'] == 'labels':
-                    entity_text = result['value']['text']
-                    entity_label = result['value']['labels'][0]
-                    start = result['value']['start']
-                    end = result['value']['end']
-                    
-                    entities.append((start, end, entity_label))
+            converted = labelstudio_item_to_example(item)
             
             # Add to training data
-            if entities:
-                training_data.append((text, {"entities": entities}))
+            if converted:
+                training_data.append(converted)
             else:
                 skipped += 1
                 
@@ -99,10 +120,419 @@ def split_train_test(training_data, test_size=0.2):
     
     return train_data, test_data
 
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def _lsh_params(threshold, num_perm):
+    """
+    Pick bands x rows so the LSH S-curve crosses near the threshold
+    
+    Two documents with Jaccard similarity s share a bucket in at least one
+    band with probability 1 - (1 - s^rows)^bands; the curve's midpoint is
+    about (1 / bands)^(1 / rows).
+    """
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+class MinHashLSH:
+    """
+    Near-duplicate index over transcript texts
+    
+    Digits are masked before shingling so transcripts that differ only in
+    IC number, student ID, grades and CGPA hash alike; names differ in a
+    handful of word shingles only. Clusters are kept with union-find and
+    the earliest inserted document is each cluster's root.
+    """
+    
+    def __init__(self, threshold=0.85, num_perm=128, shingle_size=5, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        
+        rng = numpy.random.RandomState(seed)
+        self.a = rng.randint(1, MAX_HASH, size=num_perm).astype(numpy.uint64)
+        self.b = rng.randint(0, MAX_HASH, size=num_perm).astype(numpy.uint64)
+        
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures = {}
+        self.parent = {}
+        self.order = {}
+    
+    def _shingles(self, text):
+        normalized = re.sub(r"\d", "0", text.upper())
+        words = normalized.split()
+        k = self.shingle_size
+        if len(words) <= k:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    
+    def signature(self, text):
+        """MinHash signature of a text"""
+        hashes = numpy.array([
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+            for s in self._shingles(text)
+        ], dtype=numpy.uint64)
+        # (a * x + b) mod p stays below 2^64 because a, x < 2^32 and b < 2^32
+        permuted = (numpy.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return (permuted.min(axis=0) & MAX_HASH).astype(numpy.uint32)
+    
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+    
+    def find(self, key):
+        """Root key of the cluster containing key"""
+        while self.parent[key] != key:
+            self.parent[key] = self.parent[self.parent[key]]
+            key = self.parent[key]
+        return key
+    
+    def query(self, signature):
+        """Roots of clusters with a member at or above the similarity threshold"""
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        
+        return {
+            self.find(key) for key in candidates
+            if numpy.mean(self.signatures[key] == signature) >= self.threshold
+        }
+    
+    def insert(self, key, signature, roots=()):
+        """Index a document and merge it with the given cluster roots"""
+        self.signatures[key] = signature
+        self.parent[key] = key
+        self.order[key] = len(self.order)
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band][band_key].append(key)
+        
+        # The earliest root (smallest insertion order) stays the root
+        for root in sorted(roots, key=self.order.get):
+            self._union(root, key)
+        return self.find(key)
+    
+    def _union(self, earlier, later):
+        root_earlier, root_later = self.find(earlier), self.find(later)
+        if root_earlier != root_later:
+            if self.order[root_later] < self.order[root_earlier]:
+                root_earlier, root_later = root_later, root_earlier
+            self.parent[root_later] = root_earlier
+
+def find_near_duplicates(data, threshold=0.85, num_perm=128, shingle_size=5):
+    """
+    Group (text, annotations) examples into near-duplicate clusters
+    
+    Returns:
+        List of clusters, each a list of indices into data (singletons included)
+    """
+    lsh = MinHashLSH(threshold, num_perm, shingle_size)
+    for idx, (text, _) in enumerate(data):
+        signature = lsh.signature(text)
+        lsh.insert(idx, signature, lsh.query(signature))
+    
+    clusters = defaultdict(list)
+    for idx in range(len(data)):
+        clusters[lsh.find(idx)].append(idx)
+    return sorted(clusters.values())
+
+def cluster_preview(text):
+    """First non-empty lines of a transcript, for cluster reports"""
+    return " | ".join(line.strip() for line in text.splitlines()[:4] if line.strip())[:70]
+
+def print_cluster_report(sizes, previews, total):
+    """
+    Print the clusters that contain more than one example
+    
+    Args:
+        sizes: Cluster id -> number of members
+        previews: Cluster id -> preview of its first member
+        total: Number of examples clustered
+    """
+    duplicates = [cluster_id for cluster_id, size in sizes.items() if size > 1]
+    redundant = sum(sizes[cluster_id] - 1 for cluster_id in duplicates)
+    
+    print(f"\nNear-duplicate clusters: {len(duplicates)} "
+          f"({redundant} redundant of {total} examples)")
+    for cluster_id in sorted(duplicates, key=sizes.get, reverse=True):
+        print(f"  {sizes[cluster_id]:3d} x  {previews[cluster_id]}")
+
+def report_clusters(data, clusters):
+    """Print the clusters that contain more than one example"""
+    print_cluster_report(
+        {i: len(cluster) for i, cluster in enumerate(clusters)},
+        {i: cluster_preview(data[cluster[0]][0]) for i, cluster in enumerate(clusters) if len(cluster) > 1},
+        len(data)
+    )
+
+def deduplicate(data, clusters, max_per_cluster=1):
+    """
+    Keep at most max_per_cluster examples from each cluster
+    
+    Returns:
+        (kept data, clusters re-indexed into the kept data)
+    """
+    kept = []
+    kept_clusters = []
+    for cluster in clusters:
+        new_cluster = []
+        for idx in cluster[:max_per_cluster]:
+            new_cluster.append(len(kept))
+            kept.append(data[idx])
+        kept_clusters.append(new_cluster)
+    
+    print(f"Deduplication kept {len(kept)} of {len(data)} examples (max {max_per_cluster} per cluster)")
+    return kept, kept_clusters
+
+def group_split_train_test(data, clusters, test_size=0.2, random_seed=42):
+    """
+    Split into train/test with whole clusters on one side
+    
+    No near-duplicate of a test example ends up in the training set.
+    """
+    rng = random.Random(random_seed)
+    shuffled = list(clusters)
+    rng.shuffle(shuffled)
+    
+    target = int(len(data) * test_size)
+    train_data, test_data = [], []
+    
+    for cluster in shuffled:
+        side = test_data if len(test_data) + len(cluster) <= target else train_data
+        side.extend(data[idx] for idx in cluster)
+    
+    print(f"\nData Split: {len(train_data)} training, {len(test_data)} testing "
+          f"({len(clusters)} clusters kept whole)")
+    
+    return train_data, test_data
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """
+    Yield the elements of a top-level JSON array without loading the file
+    
+    The file is read in chunks and each element is decoded with
+    JSONDecoder.raw_decode as soon as it is complete, so memory is bounded
+    by the largest single element rather than the whole export.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            # Skip whitespace and separators
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            
+            if pos >= len(buffer) or not started:
+                if pos >= len(buffer):
+                    buffer, pos = "", 0
+                    if eof:
+                        return
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        eof = True
+                    buffer += chunk
+                    continue
+                if buffer[pos] != "[":
+                    raise ValueError("Label Studio export must be a JSON array")
+                started = True
+                pos += 1
+                continue
+            
+            if buffer[pos] == "]":
+                return
+            
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A number that ends at the buffer edge may go on in the next chunk
+                complete = eof or end < len(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            
+            if not complete:
+                # Element not complete yet: read more
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    eof = True
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            
+            yield item
+            pos = end
+
+def is_test_example(text, test_size=0.2):
+    """Deterministic train/test assignment from a hash of the text"""
+    bucket = int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16) % 10000
+    return bucket < test_size * 10000
+
+class DocBinShardWriter:
+    """Write Docs to numbered DocBin files of at most shard_size docs"""
+    
+    def __init__(self, output_dir, prefix, shard_size=1000):
+        self.output_dir = Path(output_dir)
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.doc_bin = DocBin(store_user_data=False)
+        self.shards = 0
+        self.total = 0
+    
+    def add(self, doc):
+        self.doc_bin.add(doc)
+        self.total += 1
+        if len(self.doc_bin) >= self.shard_size:
+            self.flush()
+    
+    def flush(self):
+        if len(self.doc_bin) == 0:
+            return
+        path = self.output_dir / f"{self.prefix}-{self.shards:04d}.spacy"
+        self.doc_bin.to_disk(path)
+        self.shards += 1
+        self.doc_bin = DocBin(store_user_data=False)
+
+def convert_labelstudio_streaming(labelstudio_file, output_dir="./corpus", test_size=0.2, shard_size=1000,
+                                  dedup_threshold=None, max_per_cluster=1):
+    """
+    Convert a Label Studio export straight to train/test DocBin shards
+    
+    Tasks are parsed one at a time, spans are aligned with doc.char_span
+    as they arrive and every Doc goes directly into its shard, so memory
+    stays flat however large the export is. The split is decided by a
+    hash of the text and is the same on every run.
+    
+    With dedup_threshold, each task is checked against a MinHash LSH
+    index: near-duplicates beyond max_per_cluster are dropped and every
+    member follows its cluster root's split. A task that links clusters
+    already on different sides is dropped so no cluster spans both.
+    
+    Returns:
+        dict with counts of converted, skipped and misaligned items
+    """
+    print("Streaming Label Studio data to DocBin shards...")
+    
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    for old_shard in output_path.glob("*.spacy"):
+        old_shard.unlink()
+    
+    nlp = spacy.blank("en")
+    writers = {
+        "train": DocBinShardWriter(output_path, "train", shard_size),
+        "test": DocBinShardWriter(output_path, "test", shard_size)
+    }
+    stats = {"converted": 0, "skipped": 0, "contracted_spans": 0, "dropped_spans": 0,
+             "duplicates_dropped": 0, "bridging_dropped": 0}
+    entity_counts = {}
+    
+    lsh = MinHashLSH(dedup_threshold) if dedup_threshold else None
+    # Keyed by cluster root; merged into the surviving root on union
+    cluster_split = {}
+    cluster_kept = {}
+    cluster_members = {}
+    cluster_previews = {}
+    
+    for item in iter_json_array(labelstudio_file):
+        try:
+            converted = labelstudio_item_to_example(item)
+        except Exception as e:
+            print(f"Error processing item: {e}")
+            converted = None
+        
+        if not converted:
+            stats["skipped"] += 1
+            continue
+        
+        text, annotations = converted
+        split = "test" if is_test_example(text, test_size) else "train"
+        
+        if lsh is not None:
+            signature = lsh.signature(text)
+            roots = lsh.query(signature)
+            splits = {cluster_split[root] for root in roots}
+            if len(splits) > 1:
+                stats["bridging_dropped"] += 1
+                continue
+            
+            root = lsh.insert(stats["converted"] + stats["duplicates_dropped"], signature, roots)
+            if roots:
+                split = splits.pop()
+            for counts in (cluster_kept, cluster_members):
+                counts[root] = sum(counts.pop(old_root, 0) for old_root in roots)
+            for old_root in roots - {root}:
+                del cluster_split[old_root]
+                del cluster_previews[old_root]
+            cluster_split[root] = split
+            cluster_previews.setdefault(root, cluster_preview(text))
+            cluster_members[root] += 1
+            
+            if cluster_kept[root] >= max_per_cluster:
+                stats["duplicates_dropped"] += 1
+                continue
+            cluster_kept[root] += 1
+        
+        doc = nlp.make_doc(text)
+        spans = []
+        
+        for start, end, label in annotations["entities"]:
+            span = doc.char_span(start, end, label=label)
+            if span is None:
+                # Label boundaries inside a token: shrink to whole tokens
+                span = doc.char_span(start, end, label=label, alignment_mode="contract")
+                if span is None:
+                    stats["dropped_spans"] += 1
+                    continue
+                stats["contracted_spans"] += 1
+            spans.append(span)
+            entity_counts[label] = entity_counts.get(label, 0) + 1
+        
+        doc.ents = filter_spans(spans)
+        writers[split].add(doc)
+        stats["converted"] += 1
+    
+    for writer in writers.values():
+        writer.flush()
+    
+    stats["train"] = writers["train"].total
+    stats["test"] = writers["test"].total
+    
+    print(f"\nConverted {stats['converted']} transcripts "
+          f"({stats['train']} train, {stats['test']} test)")
+    if stats["skipped"] > 0:
+        print(f"Skipped {stats['skipped']} transcripts")
+    if stats["contracted_spans"] or stats["dropped_spans"]:
+        print(f"Spans contracted to token boundaries: {stats['contracted_spans']}, "
+              f"dropped: {stats['dropped_spans']}")
+    if lsh is not None:
+        print_cluster_report(cluster_members, cluster_previews, stats["converted"] + stats["duplicates_dropped"])
+        print(f"Near-duplicates dropped: {stats['duplicates_dropped']}, "
+              f"cross-split links dropped: {stats['bridging_dropped']}")
+    print(f"\nEntity counts: {dict(sorted(entity_counts.items()))}")
+    print(f"Shards written to: {output_path}")
+    
+    return stats
+
 if __name__ == "__main__":
+    import sys
+    
     # Configuration
     LABELSTUDIO_FILE = "./exported_data/labeled_data.json"  # From Label Studio export
     OUTPUT_FILE = "./train_data.py"
+    CORPUS_DIR = "./corpus"  # DocBin shards for --stream
+    DEDUP_THRESHOLD = 0.85 if "--dedup" in sys.argv else None  # MinHash Jaccard similarity (opt-in)
+    MAX_PER_CLUSTER = 1  # Near-duplicates kept per cluster
     
     print("\n" + "=" * 60)
     print("Convert Labeled Data to spaCy Format")
@@ -114,12 +544,35 @@ if __name__ == "__main__":
         print("Please export labeled data from Label Studio to './exported_data/labeled_data.json'")
         exit(1)
     
+    # Usage: python dataConversion.py [--stream] [--dedup]
+    if "--stream" in sys.argv:
+        convert_labelstudio_streaming(
+            LABELSTUDIO_FILE, CORPUS_DIR,
+            dedup_threshold=DEDUP_THRESHOLD, max_per_cluster=MAX_PER_CLUSTER
+        )
+        print("\n" + "=" * 60)
+        print(f"Conversion complete. Run 'python modelTraining.py --corpus={CORPUS_DIR}' to train.")
+        print("=" * 60)
+        exit(0)
+    
     # Convert data
     training_data = convert_labelstudio_to_spacy(LABELSTUDIO_FILE, OUTPUT_FILE)
     
     # Split into train/test
+    dropped_clusters = {}
     if len(training_data) > 10:
-        train_data, test_data = split_train_test(training_data, test_size=0.2)
+        if DEDUP_THRESHOLD:
+            # Drop near-copies and keep every cluster on one side of the split
+            clusters = find_near_duplicates(training_data, DEDUP_THRESHOLD)
+            report_clusters(training_data, clusters)
+            dropped_clusters = {
+                cluster_id: len(cluster) - MAX_PER_CLUSTER
+                for cluster_id, cluster in enumerate(clusters) if len(cluster) > MAX_PER_CLUSTER
+            }
+            training_data, clusters = deduplicate(training_data, clusters, MAX_PER_CLUSTER)
+            train_data, test_data = group_split_train_test(training_data, clusters, test_size=0.2)
+        else:
+            train_data, test_data = split_train_test(training_data, test_size=0.2)
         
         # Save split data separately
         with open("./train_data.py", 'w', encoding='utf-8') as f:
@@ -137,6 +590,9 @@ if __name__ == "__main__":
             f.write("]\n")
         
         print(f"\nSaved: train_data.py ({len(train_data)} examples), test_data.py ({len(test_data)} examples)")
+        if dropped_clusters:
+            print(f"Near-duplicates dropped: {sum(dropped_clusters.values())} "
+                  f"(cluster IDs: {sorted(dropped_clusters)})")
     
     print("\n" + "=" * 60)
     print("Conversion complete. Run 'python modelTraining.py' to train.")
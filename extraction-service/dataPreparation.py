@@ -6,43 +6,144 @@ Run this first to extract text from PDFs
 
 import os
 import json
+import time
+import hashlib
+import multiprocessing
+from multiprocessing.connection import wait
 from pathlib import Path
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
-    from pypdf import PdfReader
+from pdf_text import extract_text_from_pdf
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file"""
+MANIFEST_FILE = "manifest.json"
+
+def file_fingerprint(path):
+    """Size, mtime and sha256 of a file"""
+    stat = Path(path).stat()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+
+def load_manifest(output_path):
+    """Load the manifest of already extracted PDFs"""
+    manifest_file = Path(output_path) / MANIFEST_FILE
+    if not manifest_file.exists():
+        return {}
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(output_path, manifest):
+    """Write the manifest atomically"""
+    manifest_file = Path(output_path) / MANIFEST_FILE
+    tmp_file = manifest_file.with_suffix(".tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, manifest_file)
+
+def _is_unchanged(pdf_file, entry):
+    """
+    Check a PDF against its manifest entry
+    
+    Size and mtime are compared first; the content hash is only computed
+    when they differ (e.g. after a copy that touched the mtime).
+    """
+    if not entry:
+        return False
+    stat = pdf_file.stat()
+    if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+        return True
+    if entry.get("size") != stat.st_size:
+        return False
+    if file_fingerprint(pdf_file)["sha256"] == entry.get("sha256"):
+        entry["mtime"] = stat.st_mtime
+        return True
+    return False
+
+def _extract_worker(pdf_path, conn):
+    """Extract one PDF in a child process and send the text back"""
     try:
-        if HAS_PYMUPDF:
-            with fitz.open(pdf_path) as doc:
-                text = ""
-                for page in doc:
-                    text += page.get_text()
-            return text
+        text = extract_text_from_pdf(pdf_path)
+        if text is None:
+            conn.send(("error", "could not extract text"))
         else:
-            reader = PdfReader(pdf_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-            return text
+            conn.send(("ok", text))
     except Exception as e:
-        print(f"Error extracting {pdf_path}: {e}")
-        return None
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
 
-def prepare_for_labeling(transcripts_folder, output_folder):
+def extract_pdfs_parallel(pdf_files, max_workers=None, timeout=60):
+    """
+    Extract PDFs in separate processes with a per-file timeout
+    
+    Every PDF gets its own short-lived process so a corrupt file that
+    hangs the parser can be terminated without affecting the others.
+    
+    Yields:
+        (pdf_file, text, error) in completion order; text is None on error
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    pending = list(pdf_files)[::-1]
+    running = {}
+    
+    while pending or running:
+        # Keep up to max_workers extractions in flight
+        while pending and len(running) < max_workers:
+            pdf_file = pending.pop()
+            recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_extract_worker, args=(str(pdf_file), send_conn), daemon=True
+            )
+            process.start()
+            send_conn.close()
+            running[recv_conn] = (process, pdf_file, time.monotonic() + timeout)
+        
+        next_deadline = min(deadline for _, _, deadline in running.values())
+        ready = wait(list(running), timeout=max(0.0, next_deadline - time.monotonic()))
+        
+        for conn in ready:
+            process, pdf_file, _ = running.pop(conn)
+            try:
+                status, payload = conn.recv()
+            except EOFError:
+                status, payload = "error", "extraction process exited unexpectedly"
+            conn.close()
+            process.join()
+            
+            if status == "ok":
+                yield pdf_file, payload, None
+            else:
+                yield pdf_file, None, payload
+        
+        # Terminate anything past its deadline
+        now = time.monotonic()
+        for conn, (process, pdf_file, deadline) in list(running.items()):
+            if now >= deadline:
+                process.terminate()
+                process.join()
+                conn.close()
+                del running[conn]
+                yield pdf_file, None, f"timed out after {timeout}s"
+
+def prepare_for_labeling(transcripts_folder, output_folder, parallel=False, max_workers=None,
+                         timeout=60, incremental=True):
     """
     Extract text from all PDFs and prepare for Label Studio
+    
+    Args:
+        transcripts_folder: Folder with the PDF files
+        output_folder: Where text files, the manifest and the JSON go
+        parallel: Extract in separate processes with a per-file timeout
+        max_workers: Concurrent extraction processes (default: CPU count)
+        timeout: Seconds before a single PDF extraction is abandoned (parallel only)
+        incremental: Skip PDFs whose size/mtime or content hash is unchanged
     """
     transcripts_path = Path(transcripts_folder)
     output_path = Path(output_folder)
     output_path.mkdir(parents=True, exist_ok=True)
     
     # Find all PDF files
-    pdf_files = list(transcripts_path.glob("*.pdf"))
+    pdf_files = sorted(transcripts_path.glob("*.pdf"))
     print(f"📄 Found {len(pdf_files)} PDF files")
     
     if len(pdf_files) == 0:
@@ -50,35 +151,93 @@ def prepare_for_labeling(transcripts_folder, output_folder):
         print(f"   Make sure PDFs are in: {transcripts_path.absolute()}")
         return
     
-    # Extract text from each PDF
-    extracted_data = []
+    manifest = load_manifest(output_path) if incremental else {}
+    
+    # Keep ids stable across runs
+    next_id = max((entry.get("id", 0) for entry in manifest.values()), default=0) + 1
+    ids = {}
+    to_process = []
+    skipped_failed = 0
     
-    for i, pdf_file in enumerate(pdf_files, 1):
-        print(f"Processing {i}/{len(pdf_files)}: {pdf_file.name}")
+    for pdf_file in pdf_files:
+        entry = manifest.get(pdf_file.name)
+        if entry:
+            ids[pdf_file.name] = entry["id"]
+        else:
+            ids[pdf_file.name] = next_id
+            next_id += 1
+        
+        if incremental and _is_unchanged(pdf_file, entry):
+            if entry.get("error"):
+                skipped_failed += 1
+                continue
+            if (output_path / f"{pdf_file.stem}.txt").exists():
+                continue
+        to_process.append(pdf_file)
+    
+    print(f"🔄 {len(to_process)} new or changed, {len(pdf_files) - len(to_process)} unchanged")
+    if skipped_failed:
+        print(f"   ({skipped_failed} unchanged files failed on an earlier run and are skipped)")
+    
+    # Extract text from each new or changed PDF
+    if parallel:
+        results = extract_pdfs_parallel(to_process, max_workers, timeout)
+    else:
+        results = ((pdf_file, extract_text_from_pdf(pdf_file), None) for pdf_file in to_process)
+    
+    for i, (pdf_file, text, error) in enumerate(results, 1):
+        print(f"Processing {i}/{len(to_process)}: {pdf_file.name}")
         
-        text = extract_text_from_pdf(pdf_file)
+        entry = file_fingerprint(pdf_file)
+        entry["id"] = ids[pdf_file.name]
         
         if text:
-            # Save as JSON for Label Studio
-            data_entry = {
-                "id": i,
-                "text": text,
-                "meta": {
-                    "filename": pdf_file.name
-                }
-            }
-            extracted_data.append(data_entry)
-            
             # Also save individual text files for manual checking
             text_file = output_path / f"{pdf_file.stem}.txt"
             with open(text_file, 'w', encoding='utf-8') as f:
                 f.write(text)
+            entry["chars"] = len(text)
+        else:
+            entry["error"] = error or "could not extract text"
+            print(f"   ⚠️  {pdf_file.name}: {entry['error']}")
+        
+        manifest[pdf_file.name] = entry
+    
+    # Forget PDFs that were removed from the folder
+    current_names = {pdf_file.name for pdf_file in pdf_files}
+    manifest = {name: entry for name, entry in manifest.items() if name in current_names}
+    save_manifest(output_path, manifest)
+    
+    # Rebuild the Label Studio JSON from the saved text files
+    extracted_data = []
+    for pdf_file in pdf_files:
+        entry = manifest.get(pdf_file.name, {})
+        text_file = output_path / f"{pdf_file.stem}.txt"
+        if entry.get("error") or not text_file.exists():
+            continue
+        
+        with open(text_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+        
+        # Save as JSON for Label Studio
+        data_entry = {
+            "id": entry["id"],
+            "text": text,
+            "meta": {
+                "filename": pdf_file.name
+            }
+        }
+        extracted_data.append(data_entry)
     
     # Save as JSON for Label Studio import
     json_file = output_path / "transcripts_for_labeling.json"
     with open(json_file, 'w', encoding='utf-8') as f:
         json.dump(extracted_data, f, indent=2, ensure_ascii=False)
     
+    if not extracted_data:
+        print("\n❌ No text could be extracted")
+        return extracted_data
+    
     print(f"\n✅ Extracted {len(extracted_data)} transcripts")
     print(f"📁 Text files saved to: {output_path}")
     print(f"📋 JSON file for Label Studio: {json_file}")
@@ -88,10 +247,178 @@ def prepare_for_labeling(transcripts_folder, output_folder):
     
     return extracted_data
 
+def _read_jsonl_index(jsonl_file):
+    """
+    Read filename -> fingerprint for records in a JSONL file
+    
+    Only the metadata is kept in memory. A truncated last line from an
+    interrupted run is ignored and cut off so appends start cleanly.
+    """
+    index = {}
+    max_id = 0
+    jsonl_file = Path(jsonl_file)
+    if not jsonl_file.exists():
+        return index, max_id
+    
+    valid_bytes = 0
+    with open(jsonl_file, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            valid_bytes += len(line)
+            meta = record.get("meta", {})
+            index[meta.get("filename")] = meta
+            max_id = max(max_id, record.get("id", 0))
+    
+    if valid_bytes < jsonl_file.stat().st_size:
+        with open(jsonl_file, 'r+b') as f:
+            f.truncate(valid_bytes)
+    
+    return index, max_id
+
+def _drop_jsonl_records(jsonl_file, filenames):
+    """Stream-copy a JSONL file without the records for the given files"""
+    jsonl_file = Path(jsonl_file)
+    tmp_file = jsonl_file.with_suffix(".tmp")
+    with open(jsonl_file, 'r', encoding='utf-8') as src, open(tmp_file, 'w', encoding='utf-8') as dst:
+        for line in src:
+            if json.loads(line).get("meta", {}).get("filename") not in filenames:
+                dst.write(line)
+    os.replace(tmp_file, jsonl_file)
+
+def jsonl_to_json_array(jsonl_file, json_file):
+    """Convert JSONL to a JSON array one record at a time (for Label Studio import)"""
+    with open(jsonl_file, 'r', encoding='utf-8') as src, open(json_file, 'w', encoding='utf-8') as dst:
+        dst.write("[\n")
+        first = True
+        for line in src:
+            if not line.strip():
+                continue
+            if not first:
+                dst.write(",\n")
+            dst.write(line.rstrip("\n"))
+            first = False
+        dst.write("\n]\n")
+
+def prepare_for_labeling_streaming(transcripts_folder, output_folder, parallel=False, max_workers=None,
+                                   timeout=60, write_text_files=True):
+    """
+    Extract text from all PDFs, appending one JSONL record per finished PDF
+    
+    Memory stays constant: records are written and flushed as each PDF
+    finishes and the summary statistics are updated incrementally. The
+    JSONL file doubles as the resume point - PDFs already recorded with
+    an unchanged fingerprint are skipped, so a run that crashed halfway
+    continues where it stopped.
+    
+    Args:
+        transcripts_folder: Folder with the PDF files
+        output_folder: Where the JSONL (and optional text files) go
+        parallel: Extract in separate processes with a per-file timeout
+        max_workers: Concurrent extraction processes (default: CPU count)
+        timeout: Seconds before a single PDF extraction is abandoned (parallel only)
+        write_text_files: Also save one .txt per PDF for manual checking
+    
+    Returns:
+        dict with the summary statistics
+    """
+    transcripts_path = Path(transcripts_folder)
+    output_path = Path(output_folder)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    jsonl_file = output_path / "transcripts_for_labeling.jsonl"
+    errors_file = output_path / "extraction_errors.jsonl"
+    
+    pdf_files = sorted(transcripts_path.glob("*.pdf"))
+    print(f"📄 Found {len(pdf_files)} PDF files")
+    
+    if len(pdf_files) == 0:
+        print("❌ No PDF files found!")
+        print(f"   Make sure PDFs are in: {transcripts_path.absolute()}")
+        return
+    
+    done, max_id = _read_jsonl_index(jsonl_file)
+    failed, _ = _read_jsonl_index(errors_file)
+    
+    to_process = []
+    stale = set()
+    for pdf_file in pdf_files:
+        previous = done.get(pdf_file.name) or failed.get(pdf_file.name)
+        if _is_unchanged(pdf_file, previous):
+            continue
+        if pdf_file.name in done:
+            stale.add(pdf_file.name)
+        to_process.append(pdf_file)
+    
+    # Changed PDFs are re-extracted, so their old records go
+    if stale:
+        _drop_jsonl_records(jsonl_file, stale)
+    if failed:
+        _drop_jsonl_records(errors_file, {pdf_file.name for pdf_file in to_process})
+    
+    print(f"🔄 {len(to_process)} to extract, {len(pdf_files) - len(to_process)} already done")
+    
+    if parallel:
+        results = extract_pdfs_parallel(to_process, max_workers, timeout)
+    else:
+        results = ((pdf_file, extract_text_from_pdf(pdf_file), None) for pdf_file in to_process)
+    
+    stats = {"extracted": 0, "failed": 0, "total_chars": 0, "min_chars": None, "max_chars": 0}
+    next_id = max_id + 1
+    
+    with open(jsonl_file, 'a', encoding='utf-8') as out, open(errors_file, 'a', encoding='utf-8') as err:
+        for i, (pdf_file, text, error) in enumerate(results, 1):
+            print(f"Processing {i}/{len(to_process)}: {pdf_file.name}")
+            
+            meta = file_fingerprint(pdf_file)
+            meta["filename"] = pdf_file.name
+            
+            if not text:
+                meta["error"] = error or "could not extract text"
+                print(f"   ⚠️  {pdf_file.name}: {meta['error']}")
+                err.write(json.dumps({"meta": meta}, ensure_ascii=False) + "\n")
+                err.flush()
+                stats["failed"] += 1
+                continue
+            
+            record = {"id": next_id, "text": text, "meta": meta}
+            next_id += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            
+            if write_text_files:
+                with open(output_path / f"{pdf_file.stem}.txt", 'w', encoding='utf-8') as f:
+                    f.write(text)
+            
+            stats["extracted"] += 1
+            stats["total_chars"] += len(text)
+            stats["max_chars"] = max(stats["max_chars"], len(text))
+            stats["min_chars"] = len(text) if stats["min_chars"] is None else min(stats["min_chars"], len(text))
+    
+    # Label Studio imports a JSON array
+    json_file = output_path / "transcripts_for_labeling.json"
+    jsonl_to_json_array(jsonl_file, json_file)
+    
+    print(f"\n✅ Extracted {stats['extracted']} transcripts this run ({stats['failed']} failed)")
+    print(f"📋 JSONL records: {jsonl_file}")
+    print(f"📋 JSON file for Label Studio: {json_file}")
+    if stats["extracted"]:
+        print(f"\n📊 Statistics (this run):")
+        print(f"   Avg length: {stats['total_chars'] / stats['extracted']:.0f} characters")
+        print(f"   Min/Max length: {stats['min_chars']}/{stats['max_chars']} characters")
+    
+    return stats
+
 if __name__ == "__main__":
+    import sys
+    
     # Configuration
     TRANSCRIPTS_FOLDER = "./transcripts"  # Folder with your PDF files
     OUTPUT_FOLDER = "./extracted_texts"    # Where to save extracted text
+    PARALLEL = "--parallel" in sys.argv    # Process pool with per-file timeout
+    TIMEOUT_SECONDS = 60                   # Per-PDF limit in parallel mode
     
     print("=" * 60)
     print("STEP 1: Prepare Data for Labeling")
@@ -103,7 +430,18 @@ if __name__ == "__main__":
     Path(TRANSCRIPTS_FOLDER).mkdir(exist_ok=True)
     
     # Extract and prepare
-    data = prepare_for_labeling(TRANSCRIPTS_FOLDER, OUTPUT_FOLDER)
+    if "--stream" in sys.argv:
+        data = prepare_for_labeling_streaming(
+            TRANSCRIPTS_FOLDER, OUTPUT_FOLDER,
+            parallel=PARALLEL, timeout=TIMEOUT_SECONDS,
+            write_text_files="--no-text-files" not in sys.argv
+        )
+    else:
+        data = prepare_for_labeling(
+            TRANSCRIPTS_FOLDER, OUTPUT_FOLDER,
+            parallel=PARALLEL, timeout=TIMEOUT_SECONDS,
+            incremental="--full" not in sys.argv
+        )
     
     if data:
         print("\n" + "=" * 60)
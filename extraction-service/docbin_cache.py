@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+DocBin Cache
+Serializes labelled data to spaCy DocBin files keyed by a dataset hash
+so training and evaluation runs don't rebuild the same Docs
+"""
+
+import json
+import hashlib
+from pathlib import Path
+
+import spacy
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+DEFAULT_CACHE_DIR = "./.docbin_cache"
+
+def dataset_hash(data):
+    """
+    Stable hash of a list of (text, annotations) examples
+
+    Returns:
+        Hex digest (first 16 characters of sha256)
+    """
+    digest = hashlib.sha256()
+    for text, annotations in data:
+        digest.update(text.encode('utf-8'))
+        digest.update(json.dumps(
+            sorted(list(e) for e in annotations.get("entities", []))
+        ).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def data_to_docbin(data, vocab=None):
+    """
+    Convert (text, annotations) examples to a DocBin of gold Docs
+
+    Returns:
+        (DocBin, number of spans that could not be aligned to tokens)
+    """
+    nlp = spacy.blank("en") if vocab is None else spacy.blank("en", vocab=vocab)
+    doc_bin = DocBin(store_user_data=False)
+    misaligned = 0
+
+    for text, annotations in data:
+        doc = nlp.make_doc(text)
+        spans = []
+        for start, end, label in annotations.get("entities", []):
+            span = doc.char_span(start, end, label=label, alignment_mode="contract")
+            if span is None:
+                misaligned += 1
+            else:
+                spans.append(span)
+        doc.ents = filter_spans(spans)
+        doc_bin.add(doc)
+
+    return doc_bin, misaligned
+
+def gold_docbin_path(data, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Path of the cached gold DocBin for this data, building it on a miss
+    """
+    cache_path = Path(cache_dir)
+    cache_path.mkdir(parents=True, exist_ok=True)
+
+    path = cache_path / f"gold-{dataset_hash(data)}.spacy"
+    if not path.exists():
+        doc_bin, misaligned = data_to_docbin(data)
+        if misaligned:
+            print(f"⚠️  {misaligned} entity spans do not align to token boundaries")
+        tmp_path = path.with_suffix(".tmp")
+        doc_bin.to_disk(tmp_path)
+        tmp_path.rename(path)
+
+    return path
+
+def load_docs(path, vocab=None):
+    """Load the Docs stored in a DocBin file"""
+    if vocab is None:
+        vocab = spacy.blank("en").vocab
+    return list(DocBin().from_disk(path).get_docs(vocab))
+
+def model_hash(model_path):
+    """
+    Hash of every file in a model directory (paths and contents)
+
+    Installed packages are resolved through spacy.util.get_package_path.
+    """
+    path = Path(model_path)
+    if not path.exists():
+        path = spacy.util.get_package_path(str(model_path))
+
+    digest = hashlib.sha256()
+    for file in sorted(f for f in path.rglob("*") if f.is_file()):
+        digest.update(str(file.relative_to(path)).encode('utf-8'))
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def predictions_path(model_path, data, cache_dir=DEFAULT_CACHE_DIR):
+    """Cache file for a model's predicted Docs on a dataset"""
+    return Path(cache_dir) / f"pred-{model_hash(model_path)}-{dataset_hash(data)}.spacy"
+
+def save_predictions(docs, path):
+    """Store predicted Docs (with their entities) in a DocBin file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    doc_bin = DocBin(attrs=["ORTH", "ENT_IOB", "ENT_TYPE"], store_user_data=False)
+    for doc in docs:
+        doc_bin.add(doc)
+
+    tmp_path = path.with_suffix(".tmp")
+    doc_bin.to_disk(tmp_path)
+    tmp_path.rename(path)
+
+def load_docbin_shards(directory, prefix, vocab=None):
+    """Load the Docs from every <prefix>-NNNN.spacy shard in a directory"""
+    if vocab is None:
+        vocab = spacy.blank("en").vocab
+    docs = []
+    for shard in sorted(Path(directory).glob(f"{prefix}-*.spacy")):
+        docs.extend(DocBin().from_disk(shard).get_docs(vocab))
+    return docs
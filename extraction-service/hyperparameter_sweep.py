@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter Sweep for the Custom NER Model
+Trains candidate models in parallel and keeps only the best one
+
+Candidates are trained on TRAIN_DATA minus a validation split and picked
+by validation F1; TEST_DATA only scores the chosen model.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import shutil
+import itertools
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Default search space (lists are sampled, (low, high) tuples are ranges)
+SEARCH_SPACE = {
+    "learn_rate": [0.0005, 0.001, 0.002],
+    "dropout": [0.1, 0.2, 0.3],
+    "batch_size": [4.0, 8.0, 16.0],
+    "max_patience": [10, 20]
+}
+
+# Share of TRAIN_DATA held out to pick the winning candidate
+VALIDATION_SIZE = 0.2
+
+# Environment variables read by the BLAS/OpenMP backends at import time
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS"
+]
+
+@contextmanager
+def limited_worker_threads(threads_per_worker):
+    """
+    Pin worker processes to a limited number of math threads
+
+    The variables are set while the pool is started so spawned workers
+    pick them up before numpy is imported, then restored for the parent.
+    """
+    previous = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads_per_worker)
+    try:
+        yield
+    finally:
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+def grid_candidates(search_space):
+    """Every combination of the listed values"""
+    keys = sorted(search_space)
+    values = [search_space[key] for key in keys]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+def random_candidates(search_space, n_trials, random_seed=42):
+    """
+    Sample candidates from the search space
+
+    Lists are sampled uniformly, (low, high) tuples are drawn from a
+    log-uniform range for learn_rate and a uniform range otherwise.
+    """
+    rng = random.Random(random_seed)
+    candidates = []
+
+    for _ in range(n_trials):
+        candidate = {}
+        for key in sorted(search_space):
+            space = search_space[key]
+            if isinstance(space, tuple):
+                low, high = space
+                if key == "learn_rate":
+                    candidate[key] = 10 ** rng.uniform(math.log10(low), math.log10(high))
+                elif isinstance(low, int) and isinstance(high, int):
+                    candidate[key] = rng.randint(low, high)
+                else:
+                    candidate[key] = rng.uniform(low, high)
+            else:
+                candidate[key] = rng.choice(space)
+        candidates.append(candidate)
+
+    return candidates
+
+def _train_candidate(trial_id, params, output_dir, n_iter, validation_size):
+    """
+    Train one candidate inside a worker process
+
+    Best-iteration restore and the returned score both use the validation
+    split, never TEST_DATA.
+    """
+    from modelTraining import train_ner_model, split_train_test
+    from train_data import TRAIN_DATA
+
+    # Same seed in every worker, so all candidates share one split
+    fit_data, validation_data = split_train_test(list(TRAIN_DATA), test_size=validation_size)
+
+    start = time.perf_counter()
+    metadata = train_ner_model(
+        train_data=fit_data,
+        test_data=validation_data,
+        output_dir=output_dir,
+        n_iter=n_iter,
+        verbose=False,
+        **params
+    )
+    elapsed = time.perf_counter() - start
+
+    # Candidates are short-lived, their checkpoints are not worth keeping
+    shutil.rmtree(f"{output_dir}_checkpoints", ignore_errors=True)
+
+    return {
+        "trial": trial_id,
+        "params": params,
+        "val_f1": metadata.get("test_f1_score") or 0.0,
+        "iterations": metadata.get("iterations"),
+        "training_seconds": round(elapsed, 2),
+        "model_dir": output_dir
+    }
+
+def run_sweep(
+    search_space=SEARCH_SPACE,
+    mode="grid",
+    n_trials=10,
+    n_iter=100,
+    output_dir="./custom_transcript_ner_model",
+    sweep_dir="./sweep_runs",
+    max_workers=None,
+    threads_per_worker=1,
+    validation_size=VALIDATION_SIZE
+):
+    """
+    Train every candidate in a process pool and keep the best model
+
+    Args:
+        search_space: Dict of hyperparameter name -> list of values or (low, high)
+        mode: "grid" for every combination, "random" for n_trials samples
+        n_trials: Number of random candidates (random mode only)
+        n_iter: Training iterations per candidate
+        output_dir: Where the best model is moved to
+        sweep_dir: Scratch directory for candidate models and the results table
+        max_workers: Worker processes (default: all CPU cores / threads_per_worker)
+        threads_per_worker: Math threads each worker may use
+        validation_size: Share of TRAIN_DATA held out for picking the best candidate
+
+    Returns:
+        List of result rows sorted by validation F1 (best first); only
+        the best row has test scores
+    """
+    if mode == "grid":
+        candidates = grid_candidates(search_space)
+    elif mode == "random":
+        candidates = random_candidates(search_space, n_trials)
+    else:
+        raise ValueError(f"Unknown sweep mode: {mode}")
+
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+    max_workers = min(max_workers, len(candidates))
+
+    sweep_path = Path(sweep_dir)
+    sweep_path.mkdir(parents=True, exist_ok=True)
+
+    print(f"Sweeping {len(candidates)} candidates ({mode}) on {max_workers} workers "
+          f"x {threads_per_worker} thread(s)")
+
+    results = []
+    sweep_start = time.perf_counter()
+
+    context = multiprocessing.get_context("spawn")
+    with limited_worker_threads(threads_per_worker):
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(
+                    _train_candidate, trial_id, params,
+                    str(sweep_path / f"trial_{trial_id:03d}"), n_iter, validation_size
+                ): trial_id
+                for trial_id, params in enumerate(candidates)
+            }
+
+            for future in as_completed(futures):
+                trial_id = futures[future]
+                try:
+                    row = future.result()
+                except Exception as e:
+                    print(f"Trial {trial_id:3d} failed: {e}")
+                    continue
+
+                results.append(row)
+                print(f"Trial {row['trial']:3d} | Val F1: {row['val_f1']:5.2f}% | "
+                      f"{row['training_seconds']:7.1f}s | {row['params']}")
+
+    if not results:
+        print("No candidate finished successfully")
+        return results
+
+    results.sort(key=lambda row: row["val_f1"], reverse=True)
+    best = results[0]
+
+    # The held-out test set is used once, for the chosen configuration only
+    best.update(score_on_test_set(best["model_dir"]))
+
+    # Keep only the best model artefact
+    output_path = Path(output_dir)
+    if output_path.exists():
+        shutil.rmtree(output_path)
+    shutil.move(best["model_dir"], str(output_path))
+
+    for row in results[1:]:
+        shutil.rmtree(row["model_dir"], ignore_errors=True)
+
+    for row in results:
+        row["model_dir"] = str(output_path) if row is best else None
+
+    total_seconds = time.perf_counter() - sweep_start
+
+    with open(sweep_path / "sweep_results.json", 'w') as f:
+        json.dump({
+            "mode": mode,
+            "search_space": {k: list(v) for k, v in search_space.items()},
+            "n_iter": n_iter,
+            "workers": max_workers,
+            "threads_per_worker": threads_per_worker,
+            "validation_size": validation_size,
+            "total_seconds": round(total_seconds, 2),
+            "results": results
+        }, f, indent=2)
+
+    print_results_table(results)
+    print(f"\nBest model (trial {best['trial']}) saved to: {output_path}")
+    print(f"Test set: P {best['test_precision']:.2f}% | R {best['test_recall']:.2f}% | "
+          f"F1 {best['test_f1']:.2f}%")
+    print(f"Sweep wall time: {total_seconds:.1f}s")
+    print(f"Results table: {sweep_path / 'sweep_results.json'}")
+
+    return results
+
+def score_on_test_set(model_dir):
+    """Precision, recall and F1 of a saved model on TEST_DATA"""
+    import spacy
+    from modelTraining import evaluate_model
+    from test_data import TEST_DATA
+
+    scores = evaluate_model(spacy.load(model_dir), TEST_DATA)
+    return {
+        "test_precision": (scores.get("ents_p") or 0.0) * 100,
+        "test_recall": (scores.get("ents_r") or 0.0) * 100,
+        "test_f1": (scores.get("ents_f") or 0.0) * 100
+    }
+
+def print_results_table(results):
+    """Print the sweep results as a table"""
+    param_names = sorted({key for row in results for key in row["params"]})
+
+    header = f"{'Trial':>5} | {'Val F1':>6} | {'Time(s)':>8} | " + " | ".join(f"{p:>12}" for p in param_names)
+    print("\n" + "=" * len(header))
+    print(header)
+    print("-" * len(header))
+
+    for row in results:
+        values = " | ".join(f"{row['params'].get(p, ''):>12.5g}" for p in param_names)
+        print(f"{row['trial']:>5} | {row['val_f1']:6.2f} | {row['training_seconds']:8.1f} | {values}")
+
+    print("=" * len(header))
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python hyperparameter_sweep.py [grid|random] [n_trials]
+    mode = sys.argv[1] if len(sys.argv) > 1 else "grid"
+    n_trials = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    run_sweep(mode=mode, n_trials=n_trials)
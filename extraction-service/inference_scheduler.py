@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Inference Scheduler
+Collects documents from concurrent requests for a few milliseconds and
+parses them with a single nlp.pipe call on a dedicated inference thread
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+class BatchStats:
+    """Thread-safe batch-size histogram and queue wait for the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.documents = 0
+        self.sizes = Counter()
+        self.wait_seconds = 0.0
+        self.pipe_seconds = 0.0
+
+    def record(self, size, wait_seconds, pipe_seconds):
+        """Count one batch (wait_seconds summed over its documents)"""
+        with self._lock:
+            self.batches += 1
+            self.documents += size
+            self.sizes[size] += 1
+            self.wait_seconds += wait_seconds
+            self.pipe_seconds += pipe_seconds
+
+    def snapshot(self):
+        """Batch-size histogram, mean batch size and mean per-document wait"""
+        with self._lock:
+            batches = self.batches
+            documents = self.documents
+            return {
+                'batches': batches,
+                'documents': documents,
+                'mean_batch_size': round(documents / batches, 2) if batches else 0.0,
+                'batch_size_histogram': {str(size): count for size, count in sorted(self.sizes.items())},
+                'mean_queue_wait_ms': round(self.wait_seconds / documents * 1000, 3) if documents else 0.0,
+                'mean_batch_ms': round(self.pipe_seconds / batches * 1000, 3) if batches else 0.0
+            }
+
+class InferenceScheduler:
+    """
+    Micro-batches single-document requests
+
+    The first document of a batch waits at most max_wait_ms for others to
+    join; a batch is cut early once it holds max_batch_size documents.
+
+    Args:
+        get_model: Function -> nlp, read per batch so hot swaps take effect
+        max_batch_size: Most documents per nlp.pipe call
+        max_wait_ms: Longest a document waits for the batch to fill
+    """
+
+    def __init__(self, get_model, max_batch_size=16, max_wait_ms=2.0):
+        self.get_model = get_model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.stats = BatchStats()
+
+    def start(self):
+        """Start the inference thread (called lazily by submit)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Let the inference thread finish its current batch and exit"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+    def submit(self, text):
+        """
+        Queue a document for the next batch
+
+        Returns:
+            Future resolving to the parsed Doc
+        """
+        self.start()
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def parse(self, text, timeout=None):
+        """
+        Parse one document in a batch, blocking until it is done
+
+        A document still queued when the timeout expires is dropped from
+        its batch; raises concurrent.futures.TimeoutError.
+        """
+        future = self.submit(text)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    def _next_batch(self):
+        """Block for one document, then gather more until full or out of time"""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        cut_at = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = cut_at - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back for the loop to see after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            batch = [(text, future, queued_at) for text, future, queued_at in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                docs = list(self.get_model().pipe([text for text, _, _ in batch]))
+            except Exception as e:
+                logger.error(f"❌ Batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            pipe_seconds = time.perf_counter() - start
+
+            for (_, future, _), doc in zip(batch, docs):
+                future.set_result(doc)
+
+            self.stats.record(len(batch), sum(start - queued_at for _, _, queued_at in batch), pipe_seconds)
+
+    def snapshot(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'queue_depth': self._queue.qsize(),
+            **self.stats.snapshot()
+        }
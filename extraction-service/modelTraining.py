@@ -4,9 +4,14 @@ Step 3: Train Custom NER Model with Train-Test Split
 """
 
 import spacy
+from spacy.tokens import Doc
 from spacy.training import Example
 from spacy.util import minibatch, compounding
 import random
+import time
+import pickle
+import shutil
+import numpy
 from pathlib import Path
 import json
 
@@ -42,10 +47,64 @@ def split_train_test(data, test_size=0.2, random_seed=42):
     
     return train_data, test_data
 
-def evaluate_model(nlp, test_data):
+def make_example(nlp, item):
+    """Build an Example from a (text, annotations) tuple or a gold Doc"""
+    if isinstance(item, Doc):
+        return Example(nlp.make_doc(item.text), item)
+    
+    text, annotations = item
+    return Example.from_dict(nlp.make_doc(text), annotations)
+
+def entity_labels(item):
+    """Set of entity labels in a (text, annotations) tuple or a gold Doc"""
+    if isinstance(item, Doc):
+        return {ent.label_ for ent in item.ents}
+    
+    return {label for _, _, label in item[1].get("entities", [])}
+
+def stratified_subset(data, size, random_seed=42):
+    """
+    Pick a fixed subset that keeps the mix of entity label combinations
+    
+    Args:
+        data: List of (text, annotations) examples
+        size: Number of examples to keep
+        random_seed: Random seed for reproducibility
+    
+    Returns:
+        List of examples (the full data if size >= len(data))
+    """
+    if size >= len(data):
+        return list(data)
+    
+    rng = random.Random(random_seed)
+    
+    # Group by the set of labels each example contains
+    strata = {}
+    for item in data:
+        key = tuple(sorted(entity_labels(item)))
+        strata.setdefault(key, []).append(item)
+    
+    subset = []
+    for key in sorted(strata):
+        group = strata[key]
+        rng.shuffle(group)
+        share = max(1, round(size * len(group) / len(data)))
+        subset.extend(group[:share])
+    
+    rng.shuffle(subset)
+    return subset[:size]
+
+def evaluate_model(nlp, test_data, batch_size=32, n_process=1):
     """
     Evaluate model on test data
     
+    Args:
+        nlp: Trained spaCy pipeline
+        test_data: List of (text, annotations) examples or gold Docs
+        batch_size: Documents per nlp.pipe batch
+        n_process: Worker processes for nlp.pipe (1 = in-process)
+    
     Returns:
         dict with precision, recall, f1-score per entity
     """
@@ -54,82 +113,281 @@ def evaluate_model(nlp, test_data):
     scorer = Scorer()
     examples = []
     
-    for text, annotations in test_data:
-        doc = nlp(text)
-        example = Example.from_dict(doc, annotations)
+    texts = [item.text if isinstance(item, Doc) else item[0] for item in test_data]
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    
+    for doc, item in zip(docs, test_data):
+        if isinstance(item, Doc):
+            example = Example(doc, item)
+        else:
+            example = Example.from_dict(doc, item[1])
         examples.append(example)
     
     scores = scorer.score(examples)
     return scores
 
+# Narrow NER architecture for low-latency serving: smaller hash-embedding
+# table, narrower and shallower tok2vec, smaller hidden layer
+COMPACT_NER_MODEL = {
+    "@architectures": "spacy.TransitionBasedParser.v2",
+    "state_type": "ner",
+    "extra_state_tokens": False,
+    "hidden_width": 32,
+    "maxout_pieces": 2,
+    "use_upper": True,
+    "nO": None,
+    "tok2vec": {
+        "@architectures": "spacy.HashEmbedCNN.v2",
+        "pretrained_vectors": None,
+        "width": 48,
+        "depth": 2,
+        "embed_size": 500,
+        "window_size": 1,
+        "maxout_pieces": 2,
+        "subword_features": True
+    }
+}
+
+TRAINING_STATE_FILE = "training_state.pkl"
+
+# Optimizer attributes keyed by (model node id, param name)
+OPTIMIZER_KEYED_STATE = ["mom1", "mom2", "averages", "nr_update", "last_seen"]
+
+def _optimizer_state(nlp, optimizer):
+    """
+    Snapshot the optimizer state in a form that survives a reload
+    
+    Thinc keys its moments by model node id, which changes every time a
+    pipeline is loaded, so keys are stored as positions in the NER model walk.
+    """
+    position = {node.id: i for i, node in enumerate(nlp.get_pipe("ner").model.walk())}
+    
+    state = {"learn_rate": optimizer.learn_rate}
+    for attr in OPTIMIZER_KEYED_STATE:
+        values = getattr(optimizer, attr, None)
+        if values is None:
+            continue
+        state[attr] = {
+            (position[node_id], name): value
+            for (node_id, name), value in values.items()
+            if node_id in position
+        }
+    if hasattr(optimizer, "_step"):
+        state["_step"] = optimizer._step
+    return state
+
+def _restore_optimizer_state(nlp, optimizer, state):
+    """Load a snapshot from _optimizer_state into a fresh optimizer"""
+    node_ids = [node.id for node in nlp.get_pipe("ner").model.walk()]
+    
+    optimizer.learn_rate = state["learn_rate"]
+    for attr in OPTIMIZER_KEYED_STATE:
+        values = getattr(optimizer, attr, None)
+        if values is None or attr not in state:
+            continue
+        values.clear()
+        values.update({
+            (node_ids[pos], name): value
+            for (pos, name), value in state[attr].items()
+        })
+    if "_step" in state and hasattr(optimizer, "_step"):
+        optimizer._step = state["_step"]
+
+def _replace_dir(src, dst):
+    """Swap a freshly written directory into place"""
+    old = dst.with_name(dst.name + ".old")
+    if old.exists():
+        shutil.rmtree(old)
+    if dst.exists():
+        dst.rename(old)
+    src.rename(dst)
+    if old.exists():
+        shutil.rmtree(old)
+
+def save_checkpoint(nlp, optimizer, state, checkpoint_path):
+    """
+    Save model weights, optimizer state and RNG state
+    
+    The checkpoint is written to a temporary directory first so an
+    interruption never leaves a half-written checkpoint behind.
+    """
+    checkpoint_path = Path(checkpoint_path)
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    
+    nlp.to_disk(tmp_path)
+    
+    state = dict(state)
+    state["optimizer"] = _optimizer_state(nlp, optimizer)
+    state["random_state"] = random.getstate()
+    state["numpy_random_state"] = numpy.random.get_state()
+    
+    with open(tmp_path / TRAINING_STATE_FILE, 'wb') as f:
+        pickle.dump(state, f)
+    
+    _replace_dir(tmp_path, checkpoint_path)
+
+def load_checkpoint(checkpoint_path):
+    """
+    Load a checkpoint written by save_checkpoint
+    
+    Returns:
+        (nlp, state) or (None, None) if there is no checkpoint
+    """
+    checkpoint_path = Path(checkpoint_path)
+    if not (checkpoint_path / TRAINING_STATE_FILE).exists():
+        return None, None
+    
+    nlp = spacy.load(checkpoint_path)
+    with open(checkpoint_path / TRAINING_STATE_FILE, 'rb') as f:
+        state = pickle.load(f)
+    
+    random.setstate(state["random_state"])
+    numpy.random.set_state(state["numpy_random_state"])
+    
+    return nlp, state
+
 def train_ner_model(
     train_data,
     test_data=None,
     output_dir="./custom_transcript_ner_model",
     n_iter=100,
     model=None,
-    dropout=0.2
+    dropout=0.2,
+    learn_rate=0.001,
+    batch_size=8.0,
+    max_patience=20,
+    verbose=True,
+    checkpoint_dir=None,
+    checkpoint_every=10,
+    resume=False,
+    eval_every=10,
+    eval_subset_size=None,
+    eval_batch_size=32,
+    eval_n_process=1,
+    architecture="default"
 ):
     """
     Train custom NER model with evaluation on test set
     
     Args:
-        train_data: Training examples
+        train_data: Training examples, (text, annotations) tuples or gold Docs
         test_data: Test examples (for evaluation)
         output_dir: Where to save the trained model
         n_iter: Number of training iterations
         model: Existing model to continue training (None = start from blank)
         dropout: Dropout rate for regularization
+        learn_rate: Optimizer learning rate
+        batch_size: Upper bound of the compounding minibatch size
+        max_patience: Iterations without loss improvement before early stopping
+        verbose: Print per-iteration progress
+        checkpoint_dir: Where "last" and "best" checkpoints go
+                        (default: <output_dir>_checkpoints)
+        checkpoint_every: Save the "last" checkpoint every N iterations
+        resume: Continue from the "last" checkpoint if there is one
+        eval_every: Evaluate on the test set every N iterations
+        eval_subset_size: Evaluate a fixed stratified subset of this size during
+                          training (None = full test set); the final
+                          evaluation always uses the full test set
+        eval_batch_size: Documents per nlp.pipe batch during evaluation
+        eval_n_process: Worker processes for nlp.pipe during evaluation
+        architecture: "default" or "compact" (COMPACT_NER_MODEL) for a new
+                      NER component; ignored when the model already has one
+    
+    Returns:
+        dict with the training metadata that is also saved next to the model
     """
     
+    checkpoint_path = Path(checkpoint_dir or f"{output_dir}_checkpoints")
+    last_path = checkpoint_path / "last"
+    best_path = checkpoint_path / "best"
+    checkpoint_path.mkdir(parents=True, exist_ok=True)
+    
+    state = None
+    if resume:
+        nlp, state = load_checkpoint(last_path)
+        if state is None:
+            print(f"No checkpoint found in {last_path}, starting a new run")
+        else:
+            print(f"Resuming from {last_path} after iteration {state['iteration']}")
+    
     # Create or load spaCy model
-    if model is not None:
-        nlp = spacy.load(model)
-    else:
-        nlp = spacy.blank("en")
+    if state is None:
+        if model is not None:
+            nlp = spacy.load(model)
+        else:
+            nlp = spacy.blank("en")
     
     # Add NER component
     if "ner" not in nlp.pipe_names:
-        ner = nlp.add_pipe("ner", last=True)
+        if architecture == "compact":
+            ner = nlp.add_pipe("ner", last=True, config={"model": COMPACT_NER_MODEL})
+        else:
+            ner = nlp.add_pipe("ner", last=True)
     else:
         ner = nlp.get_pipe("ner")
     
     # Add entity labels
     labels = set()
-    for text, annotations in train_data:
-        for start, end, label in annotations.get("entities", []):
+    for item in train_data:
+        for label in entity_labels(item):
             labels.add(label)
-            ner.add_label(label)
+            if label not in ner.labels:
+                ner.add_label(label)
+    
+    # Training examples are built once and reshuffled by index every iteration
+    examples = [make_example(nlp, item) for item in train_data]
     
     # Train the model
     other_pipes = [pipe for pipe in nlp.pipe_names if pipe != "ner"]
     
-    best_loss = float('inf')
-    best_test_score = 0.0
-    patience = 0
-    max_patience = 20
+    if state is not None:
+        best_loss = state["best_loss"]
+        best_test_score = state["best_test_score"]
+        best_iteration = state["best_iteration"]
+        patience = state["patience"]
+        current_loss = state["current_loss"]
+        order = state["order"]
+        start_iteration = state["iteration"]
+    else:
+        best_loss = float('inf')
+        best_test_score = 0.0
+        best_iteration = None
+        patience = 0
+        current_loss = 0.0
+        order = list(range(len(examples)))
+        start_iteration = 0
+    
+    iteration = start_iteration - 1
+    
+    # A fixed subset keeps periodic scores comparable between iterations
+    eval_data = test_data
+    if test_data and eval_subset_size:
+        eval_data = stratified_subset(test_data, eval_subset_size)
+    
+    train_start = time.perf_counter()
+    eval_seconds = 0.0
     
     with nlp.disable_pipes(*other_pipes):
-        optimizer = nlp.begin_training()
-        optimizer.learn_rate = 0.001
+        if state is not None:
+            optimizer = nlp.resume_training()
+            _restore_optimizer_state(nlp, optimizer, state["optimizer"])
+        else:
+            optimizer = nlp.begin_training()
+            optimizer.learn_rate = learn_rate
         
-        for iteration in range(n_iter):
-            random.shuffle(train_data)
+        for iteration in range(start_iteration, n_iter):
+            random.shuffle(order)
             losses = {}
             
-            # Create training examples
-            examples = []
-            for text, annotations in train_data:
-                doc = nlp.make_doc(text)
-                example = Example.from_dict(doc, annotations)
-                examples.append(example)
-            
             # Batch training
-            batch_size = min(8.0, len(train_data) / 2)
-            batches = minibatch(examples, size=compounding(2.0, batch_size, 1.001))
+            max_batch_size = min(batch_size, len(train_data) / 2)
+            batches = minibatch([examples[i] for i in order], size=compounding(2.0, max_batch_size, 1.001))
             
             for batch in batches:
-                nlp.update(batch, losses=losses, drop=dropout)
+                nlp.update(batch, sgd=optimizer, losses=losses, drop=dropout)
             
             # Track training loss
             current_loss = losses.get("ner", 0)
@@ -144,29 +402,71 @@ def train_ner_model(
                 print(f"\nEarly stopping at iteration {iteration + 1}")
                 break
             
-            # Evaluate on test set every 10 iterations
-            if test_data and (iteration + 1) % 10 == 0:
-                scores = evaluate_model(nlp, test_data)
+            # Evaluate on test set every eval_every iterations
+            if eval_data and eval_every and (iteration + 1) % eval_every == 0:
+                eval_start = time.perf_counter()
+                scores = evaluate_model(nlp, eval_data, eval_batch_size, eval_n_process)
+                eval_seconds += time.perf_counter() - eval_start
                 test_f1 = scores.get("ents_f", 0.0) * 100
                 
                 if test_f1 > best_test_score:
                     best_test_score = test_f1
+                    best_iteration = iteration + 1
+                    nlp.to_disk(best_path)
                 
-                print(f"Iteration {iteration + 1:3d}/{n_iter} | "
-                      f"Loss: {current_loss:8.4f} | "
-                      f"F1: {test_f1:5.2f}%")
-            elif (iteration + 1) % 5 == 0 or iteration == 0:
+                if verbose:
+                    print(f"Iteration {iteration + 1:3d}/{n_iter} | "
+                          f"Loss: {current_loss:8.4f} | "
+                          f"F1: {test_f1:5.2f}%")
+            elif verbose and ((iteration + 1) % 5 == 0 or iteration == 0):
                 print(f"Iteration {iteration + 1:3d}/{n_iter} | Loss: {current_loss:8.4f}")
+            
+            # Periodic checkpoint
+            if checkpoint_every and (iteration + 1) % checkpoint_every == 0:
+                save_checkpoint(nlp, optimizer, {
+                    "iteration": iteration + 1,
+                    "best_loss": best_loss,
+                    "best_test_score": best_test_score,
+                    "best_iteration": best_iteration,
+                    "patience": patience,
+                    "current_loss": current_loss,
+                    "order": order
+                }, last_path)
     
     # Final evaluation on test set
+    saved_weights = "final"
     if test_data:
-        scores = evaluate_model(nlp, test_data)
+        eval_start = time.perf_counter()
+        scores = evaluate_model(nlp, test_data, eval_batch_size, eval_n_process)
+        eval_seconds += time.perf_counter() - eval_start
+        final_f1 = scores.get("ents_f", 0.0) * 100
+        
+        # Keep the best-by-F1 weights rather than the last iteration
+        if best_iteration is not None and best_iteration != iteration + 1 and best_path.exists():
+            best_nlp = spacy.load(best_path)
+            eval_start = time.perf_counter()
+            best_scores = evaluate_model(best_nlp, test_data, eval_batch_size, eval_n_process)
+            eval_seconds += time.perf_counter() - eval_start
+            best_f1 = best_scores.get("ents_f", 0.0) * 100
+            
+            # Compared on the full test set, periodic scores may be from a subset
+            if best_f1 > final_f1:
+                print(f"\nFinal F1 {final_f1:.2f}% is below the best checkpoint "
+                      f"({best_f1:.2f}% at iteration {best_iteration}), using best weights")
+                nlp = best_nlp
+                scores = best_scores
+                saved_weights = "best"
         
         print(f"\nFinal Results:")
         print(f"  Precision: {scores.get('ents_p', 0) * 100:.2f}%")
         print(f"  Recall:    {scores.get('ents_r', 0) * 100:.2f}%")
         print(f"  F1-Score:  {scores.get('ents_f', 0) * 100:.2f}%")
     
+    total_seconds = time.perf_counter() - train_start
+    eval_share = eval_seconds / total_seconds * 100 if total_seconds > 0 else 0.0
+    print(f"\nTraining time: {total_seconds:.1f}s "
+          f"(evaluation: {eval_seconds:.1f}s, {eval_share:.1f}%)")
+    
     # Save model
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -184,33 +484,80 @@ def train_ner_model(
         "test_f1_score": scores.get('ents_f', 0) * 100 if test_data else None,
         "test_precision": scores.get('ents_p', 0) * 100 if test_data else None,
         "test_recall": scores.get('ents_r', 0) * 100 if test_data else None,
+        "test_per_entity": scores.get('ents_per_type') if test_data else None,
+        "best_iteration": best_iteration,
+        "saved_weights": saved_weights,
+        "resumed_from_iteration": start_iteration if state is not None else None,
+        "eval_subset_size": len(eval_data) if eval_data is not test_data else None,
+        "training_seconds": round(total_seconds, 2),
+        "evaluation_seconds": round(eval_seconds, 2),
+        "evaluation_share": round(eval_share, 2),
         "entity_labels": sorted(labels),
+        "architecture": architecture,
         "dropout": dropout,
-        "learning_rate": 0.001
+        "learning_rate": learn_rate,
+        "batch_size": batch_size,
+        "max_patience": max_patience
     }
     
     with open(output_path / "training_metadata.json", 'w') as f:
         json.dump(metadata, f, indent=2)
+    
+    return metadata
 
 if __name__ == "__main__":
+    import sys
+    
+    # Usage: python modelTraining.py [--resume] [compact] [--corpus=./corpus]
+    resume = "--resume" in sys.argv
+    compact = "compact" in sys.argv
+    
     # Import test data
     try:
         from test_data import TEST_DATA
     except ImportError:
         TEST_DATA = None
     
+    # DocBin shards from 'python dataConversion.py --stream'
+    corpus = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--corpus=")), None)
+    
     # Use pre-split data if available
-    if TEST_DATA:
+    if corpus:
+        from docbin_cache import load_docbin_shards
+        
+        train_data = load_docbin_shards(corpus, "train")
+        test_data = load_docbin_shards(corpus, "test")
+        print(f"Loaded {len(train_data)} training and {len(test_data)} test docs from {corpus}")
+    elif TEST_DATA:
         train_data = TRAIN_DATA
         test_data = TEST_DATA
     else:
         train_data, test_data = split_train_test(TRAIN_DATA, test_size=0.2)
     
-    # Train the model
-    train_ner_model(
-        train_data=train_data,
-        test_data=test_data,
-        output_dir="./custom_transcript_ner_model",
-        n_iter=100,
-        dropout=0.2
-    )
\ No newline at end of file
+    if compact:
+        # Train the compact variant and compare it with the current model
+        from model_benchmark import compare_models
+        
+        train_ner_model(
+            train_data=train_data,
+            test_data=test_data,
+            output_dir="./compact_transcript_ner_model",
+            n_iter=100,
+            dropout=0.2,
+            resume=resume,
+            architecture="compact"
+        )
+        compare_models(
+            ["./custom_transcript_ner_model", "./compact_transcript_ner_model"],
+            test_data
+        )
+    else:
+        # Train the model
+        train_ner_model(
+            train_data=train_data,
+            test_data=test_data,
+            output_dir="./custom_transcript_ner_model",
+            n_iter=100,
+            dropout=0.2,
+            resume=resume
+        )
\ No newline at end of file
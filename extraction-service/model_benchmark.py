@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Model Benchmark
+Compares NER models on speed, size and accuracy, one process per model
+"""
+
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import spacy
+from spacy.tokens import Doc
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    if not HAS_RESOURCE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+def directory_size(path):
+    """Total size of all files under a directory, in bytes"""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+def as_annotated_texts(data):
+    """
+    (text, annotations) tuples from tuples or gold Docs (e.g. DocBin shards)
+
+    Tuples are much cheaper than Docs to send to the worker processes.
+    """
+    return [
+        (item.text, {"entities": [(ent.start_char, ent.end_char, ent.label_) for ent in item.ents]})
+        if isinstance(item, Doc) else item
+        for item in data
+    ]
+
+def measure_throughput(nlp, texts, batch_size=32, min_seconds=1.0, max_rounds=20):
+    """
+    Documents per second over repeated nlp.pipe passes
+
+    The first document is processed once beforehand so lazy
+    initialisation doesn't count against the model.
+    """
+    nlp(texts[0])
+
+    docs = 0
+    rounds = 0
+    start = time.perf_counter()
+    while rounds < max_rounds:
+        for _ in nlp.pipe(texts, batch_size=batch_size):
+            docs += 1
+        rounds += 1
+        if time.perf_counter() - start >= min_seconds:
+            break
+    elapsed = time.perf_counter() - start
+
+    return docs / elapsed if elapsed > 0 else 0.0
+
+def benchmark_model(model_path, test_data, batch_size=32):
+    """
+    Measure one model
+
+    Args:
+        model_path: Model directory or installed package name
+        test_data: List of (text, annotations) examples or gold Docs
+        batch_size: Documents per nlp.pipe batch
+
+    Returns:
+        dict with load time, docs/sec, disk size, peak RSS and test scores
+    """
+    from modelTraining import evaluate_model
+
+    rss_before_load = peak_rss_mb()
+
+    start = time.perf_counter()
+    nlp = spacy.load(model_path)
+    load_seconds = time.perf_counter() - start
+
+    texts = [item.text if isinstance(item, Doc) else item[0] for item in test_data]
+    docs_per_second = measure_throughput(nlp, texts, batch_size)
+    scores = evaluate_model(nlp, test_data, batch_size=batch_size)
+
+    return {
+        "model": str(model_path),
+        "pipeline": list(nlp.pipe_names),
+        "load_seconds": round(load_seconds, 3),
+        "docs_per_second": round(docs_per_second, 1),
+        "disk_mb": round(directory_size(nlp.path) / (1024 * 1024), 2) if nlp.path else None,
+        "rss_before_load_mb": rss_before_load,
+        "peak_rss_mb": peak_rss_mb(),
+        "precision": (scores.get("ents_p") or 0.0) * 100,
+        "recall": (scores.get("ents_r") or 0.0) * 100,
+        "f1": (scores.get("ents_f") or 0.0) * 100,
+        "per_entity_f1": {
+            label: (values.get("f") or 0.0) * 100
+            for label, values in (scores.get("ents_per_type") or {}).items()
+        }
+    }
+
+def print_comparison(results):
+    """Print benchmark results side by side"""
+    labels = sorted({label for r in results for label in r["per_entity_f1"]})
+    label_header = "".join(f" {label[:12]:>12}" for label in labels)
+    width = 96 + 13 * len(labels)
+
+    print("\n" + "=" * width)
+    print(f"{'Model':<32} {'F1':>7}{label_header} {'Docs/s':>9} {'Load(s)':>8} "
+          f"{'RSS(MB)':>8} {'Disk(MB)':>9}  Pipeline")
+    print("-" * width)
+
+    for r in results:
+        name = Path(r["model"]).name or r["model"]
+        label_cells = "".join(f" {r['per_entity_f1'].get(label, 0.0):12.2f}" for label in labels)
+        rss = f"{r['peak_rss_mb']:8.1f}" if r["peak_rss_mb"] is not None else f"{'-':>8}"
+        disk = f"{r['disk_mb']:9.2f}" if r["disk_mb"] is not None else f"{'-':>9}"
+        print(f"{name:<32} {r['f1']:7.2f}{label_cells} {r['docs_per_second']:9.1f} "
+              f"{r['load_seconds']:8.3f} {rss} {disk}  {','.join(r['pipeline'])}")
+
+    print("=" * width)
+
+def compare_models(model_paths, test_data, output_file="model_comparison.json", concurrent=True):
+    """
+    Benchmark every model and save a comparison report
+
+    Each model runs in its own fresh process, so load time is a cold
+    load and peak RSS belongs to that model alone. Running them
+    concurrently shares the CPU, so use concurrent=False when absolute
+    throughput matters more than turnaround.
+
+    Args:
+        test_data: (text, annotations) examples or gold Docs
+
+    Returns:
+        List of per-model result dicts
+    """
+    import json
+
+    models = []
+    for model_path in model_paths:
+        if not Path(model_path).exists() and not spacy.util.is_package(str(model_path)):
+            print(f"⚠️  Skipping {model_path}: not found")
+            continue
+        models.append(str(model_path))
+
+    if not models:
+        print("❌ No models to benchmark")
+        return []
+
+    test_data = as_annotated_texts(test_data)
+    print(f"Benchmarking {len(models)} models on {len(test_data)} documents...")
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    # A new pool per group keeps every model in a fresh process
+    groups = [models] if concurrent else [[model] for model in models]
+    for group in groups:
+        with ProcessPoolExecutor(max_workers=len(group), mp_context=context) as executor:
+            futures = {model: executor.submit(benchmark_model, model, test_data) for model in group}
+            for model, future in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"❌ {model} failed: {e}")
+
+    print_comparison(results)
+
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ Report saved to {output_file}")
+
+    return results
+
+if __name__ == "__main__":
+    from test_data import TEST_DATA
+
+    # Usage: python model_benchmark.py [--serial] [model_dir_or_package ...]
+    models = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    models = models or [
+        "./custom_transcript_ner_model",
+        "./compact_transcript_ner_model",
+        "en_core_web_sm"
+    ]
+
+    compare_models(models, TEST_DATA, concurrent="--serial" not in sys.argv)
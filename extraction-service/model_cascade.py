@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Model Cascade
+Runs a fast model first and escalates only low-confidence documents to
+the full model, merging the two results field by field
+"""
+
+import time
+import threading
+from collections import Counter
+
+FIELDS = ('name', 'cgpa', 'program')
+
+TIER_ORDER = {'low': 0, 'medium': 1, 'high': 2}
+
+def quality_tier(overall_confidence):
+    """Quality tier for an overall confidence score"""
+    if overall_confidence >= 0.85:
+        return 'high'
+    if overall_confidence >= 0.70:
+        return 'medium'
+    return 'low'
+
+def overall_confidence(fields):
+    """Mean confidence over all fields (missing fields count as 0)"""
+    return sum(fields.get(field, (None, 0.0))[1] for field in FIELDS) / len(FIELDS)
+
+def escalation_reasons(fields, min_tier='high', field_threshold=0.80):
+    """
+    Why a result should go to the next model (empty list if it shouldn't)
+
+    Args:
+        fields: dict field -> (value, confidence)
+        min_tier: Lowest acceptable quality tier for the whole document
+        field_threshold: Lowest acceptable confidence for any single field
+    """
+    reasons = []
+
+    tier = quality_tier(overall_confidence(fields))
+    if TIER_ORDER[tier] < TIER_ORDER[min_tier]:
+        reasons.append(f"tier:{tier}")
+
+    for field in FIELDS:
+        value, confidence = fields.get(field, (None, 0.0))
+        if value is None:
+            reasons.append(f"{field}:missing")
+        elif confidence < field_threshold:
+            reasons.append(f"{field}:low")
+
+    return reasons
+
+def merge_fields(first, second):
+    """Per field, keep whichever result found a value with the higher confidence"""
+    merged = {}
+    for field in FIELDS:
+        a = first.get(field, (None, 0.0))
+        b = second.get(field, (None, 0.0))
+        if a[0] is None:
+            merged[field] = b
+        elif b[0] is None:
+            merged[field] = a
+        else:
+            merged[field] = b if b[1] > a[1] else a
+    return merged
+
+class CascadeStats:
+    """Thread-safe escalation counters for the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.escalated = 0
+        self.fast_seconds = 0.0
+        self.full_seconds = 0.0
+        self.reasons = Counter()
+
+    def record(self, reasons, fast_seconds, full_seconds=0.0):
+        """Count one document (full_seconds is 0 when it wasn't escalated)"""
+        with self._lock:
+            self.documents += 1
+            self.fast_seconds += fast_seconds
+            if reasons:
+                self.escalated += 1
+                self.full_seconds += full_seconds
+                self.reasons.update(reasons)
+
+    def snapshot(self):
+        """Escalation rate, reasons and mean latency per stage"""
+        with self._lock:
+            documents = self.documents
+            total_seconds = self.fast_seconds + self.full_seconds
+            return {
+                'documents': documents,
+                'escalated': self.escalated,
+                'escalation_rate': round(self.escalated / documents, 4) if documents else 0.0,
+                'reasons': dict(self.reasons),
+                'latency_ms': {
+                    'mean': round(total_seconds / documents * 1000, 3) if documents else 0.0,
+                    'fast_stage': round(self.fast_seconds / documents * 1000, 3) if documents else 0.0,
+                    'full_stage': round(self.full_seconds / self.escalated * 1000, 3) if self.escalated else 0.0
+                }
+            }
+
+def run_cascade(text, fast_extract, full_extract, min_tier='high', field_threshold=0.80, stats=None):
+    """
+    Extract with the fast model, escalating to the full model when needed
+
+    Args:
+        text: Document text
+        fast_extract / full_extract: Functions text -> dict field -> (value, confidence)
+        min_tier / field_threshold: Escalation thresholds (see escalation_reasons)
+        stats: Optional CascadeStats to record into
+
+    Returns:
+        (merged fields, escalation reasons)
+    """
+    start = time.perf_counter()
+    fields = fast_extract(text)
+    fast_seconds = time.perf_counter() - start
+
+    reasons = escalation_reasons(fields, min_tier, field_threshold)
+    full_seconds = 0.0
+    if reasons:
+        start = time.perf_counter()
+        fields = merge_fields(fields, full_extract(text))
+        full_seconds = time.perf_counter() - start
+
+    if stats:
+        stats.record(reasons, fast_seconds, full_seconds)
+
+    return fields, reasons
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Model Registry
+Loads new model versions in the background, shadow-scores them on sampled
+live traffic and swaps them in without restarting the service
+"""
+
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class ModelVersion:
+    """A loaded pipeline and where it came from"""
+
+    def __init__(self, path, nlp, load_seconds=0.0):
+        self.path = str(path)
+        self.nlp = nlp
+        self.load_seconds = round(load_seconds, 3)
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.version = model_version(path, nlp)
+
+    def describe(self):
+        return {
+            'path': self.path,
+            'version': self.version,
+            'pipeline': list(self.nlp.pipe_names),
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds
+        }
+
+def model_version(path, nlp):
+    """<meta version>-<content hash> for model directories, the meta version otherwise"""
+    meta_version = nlp.meta.get('version', '0.0.0')
+    if not Path(path).exists():
+        return meta_version
+
+    from docbin_cache import model_hash
+    return f"{meta_version}-{model_hash(path)}"
+
+class ShadowStats:
+    """Agreement and latency of the candidate against the active model"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.documents = 0
+        self.agreements = {field: 0 for field in fields}
+        self.active_seconds = 0.0
+        self.candidate_seconds = 0.0
+
+    def record(self, active_fields, candidate_fields, active_seconds, candidate_seconds):
+        self.documents += 1
+        self.active_seconds += active_seconds
+        self.candidate_seconds += candidate_seconds
+        for field in self.fields:
+            if active_fields[field][0] == candidate_fields[field][0]:
+                self.agreements[field] += 1
+
+    def snapshot(self):
+        n = self.documents
+        return {
+            'documents': n,
+            'agreement': {
+                field: round(count / n, 4) if n else None for field, count in self.agreements.items()
+            },
+            'latency_ms': {
+                'active': round(self.active_seconds / n * 1000, 3) if n else None,
+                'candidate': round(self.candidate_seconds / n * 1000, 3) if n else None
+            }
+        }
+
+class ModelRegistry:
+    """
+    Holds the active model and at most one candidate
+
+    Args:
+        loader: Function path -> nlp
+        extract: Function (nlp, text) -> dict field -> (value, confidence)
+        warm_up: Function nlp -> None, run before a candidate counts as ready
+        shadow_sample_rate: Share of live requests replayed on the candidate
+    """
+
+    def __init__(self, loader, extract, warm_up=None, shadow_sample_rate=0.0):
+        self.loader = loader
+        self.extract = extract
+        self.warm_up = warm_up
+        self.shadow_sample_rate = shadow_sample_rate
+
+        self.active = None
+        self.candidate = None
+        self.candidate_status = None
+        self.candidate_error = None
+        self.previous = None
+        self.shadow_stats = None
+
+        self._lock = threading.Lock()
+        # One worker keeps shadow scoring from competing with live requests
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    def set_active(self, path, nlp, load_seconds=0.0):
+        """Register the model loaded at startup"""
+        with self._lock:
+            self.active = ModelVersion(path, nlp, load_seconds)
+        return self.active
+
+    def load_candidate(self, path, shadow_sample_rate=None):
+        """
+        Load and warm up a candidate in a background thread
+
+        Returns:
+            False if another candidate is still loading
+        """
+        with self._lock:
+            if self.candidate_status == 'loading':
+                return False
+            self.candidate = None
+            self.candidate_status = 'loading'
+            self.candidate_error = None
+            if shadow_sample_rate is not None:
+                self.shadow_sample_rate = float(shadow_sample_rate)
+
+        threading.Thread(target=self._load, args=(path,), name="model-load", daemon=True).start()
+        return True
+
+    def _load(self, path):
+        try:
+            start = time.perf_counter()
+            nlp = self.loader(path)
+            if self.warm_up:
+                self.warm_up(nlp)
+            candidate = ModelVersion(path, nlp, time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"❌ Candidate model {path} failed to load: {e}")
+            with self._lock:
+                self.candidate_status = 'failed'
+                self.candidate_error = str(e)
+            return
+
+        with self._lock:
+            self.candidate = candidate
+            self.candidate_status = 'ready'
+            self.shadow_stats = ShadowStats(['name', 'cgpa', 'program'])
+        logger.info(f"✅ Candidate {candidate.version} ready in {candidate.load_seconds:.2f}s")
+
+    def promote(self):
+        """
+        Make the warmed-up candidate the active model
+
+        Returns:
+            The new active ModelVersion, or None if no candidate is ready
+        """
+        with self._lock:
+            if self.candidate is None:
+                return None
+            self.previous = self.active.describe() if self.active else None
+            self.active = self.candidate
+            self.candidate = None
+            self.candidate_status = None
+            self.shadow_stats = None
+        logger.info(f"🔁 Promoted model {self.active.version}")
+        return self.active
+
+    def maybe_shadow(self, text, active_fields, active_seconds):
+        """Replay a sampled request on the candidate, off the request path"""
+        candidate = self.candidate
+        try:
+            if candidate is None or random.random() >= self.shadow_sample_rate:
+                return
+            self._shadow_executor.submit(self._shadow, candidate, text, active_fields, active_seconds)
+        except Exception as e:
+            logger.warning(f"Shadow scoring skipped: {e}")
+
+    def _shadow(self, candidate, text, active_fields, active_seconds):
+        try:
+            start = time.perf_counter()
+            candidate_fields = self.extract(candidate.nlp, text)
+            candidate_seconds = time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"Shadow scoring failed: {e}")
+            return
+
+        disagreements = [
+            field for field in ('name', 'cgpa', 'program')
+            if active_fields[field][0] != candidate_fields[field][0]
+        ]
+        with self._lock:
+            if self.candidate is not candidate:
+                return
+            self.shadow_stats.record(active_fields, candidate_fields, active_seconds, candidate_seconds)
+
+        logger.info(
+            f"👥 Shadow {candidate.version}: "
+            f"{'agrees' if not disagreements else 'differs on ' + ', '.join(disagreements)} | "
+            f"{active_seconds * 1000:.1f} ms active vs {candidate_seconds * 1000:.1f} ms candidate"
+        )
+
+    def status(self):
+        """Active and candidate versions with shadow results"""
+        with self._lock:
+            return {
+                'active': self.active.describe() if self.active else None,
+                'candidate': {
+                    'status': self.candidate_status,
+                    'error': self.candidate_error,
+                    'shadow_sample_rate': self.shadow_sample_rate,
+                    **(self.candidate.describe() if self.candidate else {}),
+                    'shadow': self.shadow_stats.snapshot() if self.shadow_stats else None
+                } if self.candidate_status else None,
+                'previous': self.previous
+            }
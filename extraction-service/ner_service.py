@@ -1,20 +1,29 @@
 #!/usr/bin/env python3
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
-    from pypdf import PdfReader
 import os
+import hmac
+import json
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
 import logging
-import spacy
 from course_translator import get_translator
+from pdf_text import extract_text_with_pages
+from transcript_templates import extract_with_template, split_bundle, template_stats, TEMPLATE_CONFIDENCE
+from model_cascade import run_cascade, escalation_reasons, merge_fields, CascadeStats, quality_tier, overall_confidence
+from model_registry import ModelRegistry
+from admission_control import AdmissionController, Deadline, DeadlineExceeded, Overloaded
+from inference_scheduler import InferenceScheduler
+from pdf_sandbox import extract_text_sandboxed, get_pool as get_pdf_pool, PdfBudget, PdfBudgetExceeded
+from socket_transport import start_socket_server
+from tracing import start_trace, span, trace_context, install_log_correlation, STATUS_ERROR, TRACE_EXPORTER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
+install_log_correlation()
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -23,18 +32,135 @@ CORS(app, origins=['http://localhost:3000', 'http://localhost:5000'])
 # Global NER model
 nlp = None
 
+# Optional fast model run first in the cascade (None disables the cascade)
+fast_nlp = None
+cascade_stats = CascadeStats()
+
+# Escalate to the full model below this quality tier or field confidence
+CASCADE_MIN_TIER = os.environ.get("CASCADE_MIN_TIER", "high")
+CASCADE_FIELD_THRESHOLD = float(os.environ.get("CASCADE_FIELD_THRESHOLD", "0.80"))
+
 # Global course translator
 course_translator = None
 
+# Rule-based extraction for known transcript layouts before the NER model
+TEMPLATE_FAST_PATH = os.environ.get("TEMPLATE_FAST_PATH", "1") != "0"
+
+# Components the service never reads, skipped at load time
+UNUSED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+# Fetching en_core_web_sm at runtime is slow and needs network access;
+# ALLOW_MODEL_DOWNLOAD=0 turns it off for offline or locked-down hosts
+ALLOW_MODEL_DOWNLOAD = os.environ.get("ALLOW_MODEL_DOWNLOAD", "1") != "0"
+
+# Share of NER requests replayed on a candidate model, and the token
+# required by the /admin/models endpoints (unset = endpoints disabled)
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+MODEL_ADMIN_TOKEN = os.environ.get("MODEL_ADMIN_TOKEN")
+
+# Admission control: requests running at once, requests allowed to wait,
+# how long they may wait and the total time budget per request (Node's
+# extract route gives up after 30s)
+MAX_CONCURRENT_EXTRACTIONS = int(os.environ.get("MAX_CONCURRENT_EXTRACTIONS", os.cpu_count() or 2))
+MAX_QUEUED_EXTRACTIONS = int(os.environ.get("MAX_QUEUED_EXTRACTIONS", "16"))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("QUEUE_TIMEOUT_SECONDS", "5"))
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "25"))
+
+admission = AdmissionController(MAX_CONCURRENT_EXTRACTIONS, MAX_QUEUED_EXTRACTIONS, QUEUE_TIMEOUT_SECONDS)
+
+# Micro-batch concurrent NER calls into one nlp.pipe on an inference
+# thread: a batch waits up to BATCH_MAX_WAIT_MS for BATCH_MAX_SIZE
+# documents (only pays off with MAX_CONCURRENT_EXTRACTIONS above 1)
+INFERENCE_BATCHING = os.environ.get("INFERENCE_BATCHING", "1") != "0"
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "2"))
+
+inference_scheduler = InferenceScheduler(lambda: nlp, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if INFERENCE_BATCHING else None
+
+# Bundle mode: one PDF holding many students' transcripts. Bundles get
+# their own PDF budget (pages, bytes, parse time, worker memory) and time
+# budget; their NER segments are queued on the inference thread
+# BUNDLE_BATCH_SIZE at a time, so single requests can still get in between
+BUNDLE_MAX_PAGES = int(os.environ.get("BUNDLE_MAX_PAGES", "500"))
+BUNDLE_MAX_BYTES = int(os.environ.get("BUNDLE_MAX_BYTES", str(200 * 1024 * 1024)))
+BUNDLE_PDF_TIMEOUT_SECONDS = float(os.environ.get("BUNDLE_PDF_TIMEOUT_SECONDS", "120"))
+BUNDLE_PDF_MAX_RSS_MB = float(os.environ.get("BUNDLE_PDF_MAX_RSS_MB", "2048"))
+BUNDLE_DEADLINE_SECONDS = float(os.environ.get("BUNDLE_DEADLINE_SECONDS", "240"))
+
+bundle_pdf_budget = PdfBudget(
+    max_pages=BUNDLE_MAX_PAGES,
+    max_bytes=BUNDLE_MAX_BYTES,
+    timeout=BUNDLE_PDF_TIMEOUT_SECONDS,
+    max_rss_mb=BUNDLE_PDF_MAX_RSS_MB
+)
+BUNDLE_BATCH_SIZE = int(os.environ.get("BUNDLE_BATCH_SIZE", "32"))
+
+# Parse PDFs in budgeted subprocesses (PDF_MAX_PAGES, PDF_TIMEOUT_SECONDS, ...)
+PDF_SANDBOX = os.environ.get("PDF_SANDBOX", "1") != "0"
+
+# Startup phase durations (seconds) and readiness after warm-up
+startup_timings = {}
+service_ready = threading.Event()
+
+# Synthetic transcript used to warm up the models before taking traffic
+WARMUP_TEXT = """ACADEMIC MINI TRANSCRIPT
+NAME
+AHMAD FAIZAL BIN ABDULLAH
+PROGRAM
+DIPLOMA SAINS KOMPUTER
+FACULTY
+FAKULTI SAINS KOMPUTER DAN MATEMATIK
+FINAL CGPA
+3.45
+20214 - SESSION 1 2021/2022
+INTRODUCTION TO COMPUTERS CSC116 3.00 A
+"""
+
+# Active/candidate model versions for hot swaps
+model_registry = ModelRegistry(
+    loader=lambda path: load_pipeline(path),
+    extract=lambda model, text: ner_fields(model(text)),
+    warm_up=lambda model: ner_fields(model(WARMUP_TEXT)),
+    shadow_sample_rate=SHADOW_SAMPLE_RATE
+)
+
+@contextmanager
+def timed_phase(name):
+    """Record how long a startup phase takes"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round(time.perf_counter() - start, 3)
+        logger.info(f"⏱️  {name}: {startup_timings[name]:.3f}s")
+
+def load_pipeline(model_name):
+    """
+    spacy.load without the components extraction doesn't use
+    
+    A tok2vec that the NER component doesn't listen to is removed as well.
+    spaCy is imported here so the web app can start before it is needed.
+    """
+    import spacy
+    
+    model = spacy.load(model_name, exclude=UNUSED_PIPES)
+    
+    if "tok2vec" in model.pipe_names and "ner" in model.pipe_names:
+        if "ner" not in model.get_pipe("tok2vec").listening_components:
+            model.remove_pipe("tok2vec")
+    
+    return model
+
 def load_custom_ner_model():
     """Load custom trained NER model or fallback to default"""
     global nlp
     
-    custom_model_path = "./custom_transcript_ner_model"
+    # Override to serve another trained variant (e.g. ./compact_transcript_ner_model)
+    custom_model_path = os.environ.get("NER_MODEL_PATH", "./custom_transcript_ner_model")
     
     try:
         if Path(custom_model_path).exists():
-            nlp = spacy.load(custom_model_path)
+            nlp = load_pipeline(custom_model_path)
             logger.info(f"✅ Loaded CUSTOM NER model from {custom_model_path}")
             
             if nlp.get_pipe("ner"):
@@ -43,20 +169,45 @@ def load_custom_ner_model():
         else:
             logger.warning(f"⚠️  Custom model not found at {custom_model_path}")
             logger.info("   Falling back to en_core_web_sm")
-            nlp = spacy.load("en_core_web_sm")
+            nlp = load_pipeline("en_core_web_sm")
             
     except Exception as e:
         logger.error(f"❌ Error loading model: {e}")
         logger.info("   Falling back to en_core_web_sm")
         try:
-            nlp = spacy.load("en_core_web_sm")
-        except:
+            nlp = load_pipeline("en_core_web_sm")
+        except Exception:
+            if not ALLOW_MODEL_DOWNLOAD:
+                logger.error("   en_core_web_sm not found and ALLOW_MODEL_DOWNLOAD=0, not downloading it")
+                nlp = None
+                return nlp
             logger.warning("   en_core_web_sm not found. Downloading...")
             os.system("python -m spacy download en_core_web_sm")
-            nlp = spacy.load("en_core_web_sm")
+            nlp = load_pipeline("en_core_web_sm")
     
     return nlp
 
+def load_fast_model():
+    """Load the fast cascade model named by FAST_MODEL_PATH, if any"""
+    global fast_nlp
+    
+    fast_model_path = os.environ.get("FAST_MODEL_PATH")
+    if not fast_model_path:
+        return None
+    
+    if not Path(fast_model_path).exists():
+        logger.warning(f"⚠️  Fast model not found at {fast_model_path}, cascade disabled")
+        return None
+    
+    try:
+        fast_nlp = load_pipeline(fast_model_path)
+        logger.info(f"✅ Loaded FAST cascade model from {fast_model_path}")
+    except Exception as e:
+        logger.error(f"❌ Error loading fast model: {e}")
+        fast_nlp = None
+    
+    return fast_nlp
+
 def load_course_translator():
     """Load the course translator for Malay to English conversion"""
     global course_translator
@@ -74,46 +225,97 @@ def load_course_translator():
     
     return course_translator
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF file"""
-    try:
-        if HAS_PYMUPDF:
-            with fitz.open(file_path) as doc:
-                text = ""
-                for page in doc:
-                    text += page.get_text()
-            return text
-        else:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-            return text
-    except Exception as e:
-        logger.error(f"Error extracting PDF: {e}")
-        return None
+def warm_up():
+    """Run a synthetic document through every loaded model and the translator"""
+    if nlp is not None:
+        ner_fields(nlp(WARMUP_TEXT))
+    if fast_nlp is not None:
+        ner_fields(fast_nlp(WARMUP_TEXT))
+    if course_translator:
+        course_translator.map_to_field_category(course_translator.translate("DIPLOMA SAINS KOMPUTER"))
+    extract_with_template(WARMUP_TEXT, stats=None)
 
-def extract_text_from_file(file_path):
-    """Extract text from various file formats"""
+def startup():
+    """
+    Load models and translator, warm them up, then mark the service ready
+    
+    Every phase is timed into startup_timings; /ready stays 503 until the
+    warm-up has finished.
+    """
+    start = time.perf_counter()
+    
+    with timed_phase("import_spacy"):
+        import spacy  # noqa: F401
+    with timed_phase("load_model"):
+        load_custom_ner_model()
+    if nlp is not None:
+        model_registry.set_active(nlp.path or nlp.meta.get('name'), nlp, startup_timings["load_model"])
+    with timed_phase("load_fast_model"):
+        load_fast_model()
+    with timed_phase("load_translator"):
+        load_course_translator()
+    if PDF_SANDBOX:
+        with timed_phase("start_pdf_workers"):
+            get_pdf_pool().start()
+    with timed_phase("warm_up"):
+        warm_up()
+    if inference_scheduler:
+        inference_scheduler.start()
+    
+    startup_timings["total"] = round(time.perf_counter() - start, 3)
+    
+    if nlp is None:
+        logger.error("❌ No NER model loaded, service will not report ready")
+        return
+    
+    service_ready.set()
+    logger.info(f"✅ Ready in {startup_timings['total']:.3f}s")
+
+def extract_text_and_pages(file_path, budget=None):
+    """
+    Extract text and page count from various file formats
+    
+    With the PDF sandbox enabled, budget breaches raise PdfBudgetExceeded;
+    budget (a PdfBudget) overrides its PDF_* limits.
+    
+    Returns:
+        (text, page count); the page count is None for plain text files
+    """
     file_path = Path(file_path)
     
     if not file_path.exists():
         logger.error(f"File not found: {file_path}")
-        return None
+        return None, 0
     
     if file_path.suffix.lower() == '.pdf':
-        return extract_text_from_pdf(file_path)
+        if PDF_SANDBOX:
+            return extract_text_sandboxed(file_path, budget=budget)
+        return extract_text_with_pages(file_path)
     else:
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                return f.read(), None
         except UnicodeDecodeError:
             try:
                 with open(file_path, 'r', encoding='latin-1') as f:
-                    return f.read()
+                    return f.read(), None
             except Exception as e:
                 logger.error(f"Error reading file: {e}")
-                return None
+                return None, 0
+
+def extract_text_from_file(file_path):
+    """Extract text from various file formats"""
+    return extract_text_and_pages(file_path)[0]
+
+def traced_text_extraction(file_path, budget=None):
+    """extract_text_and_pages inside a text_extraction span"""
+    with span("text_extraction", file_type=Path(file_path).suffix.lower() or "none") as text_span:
+        text, pages = extract_text_and_pages(file_path, budget)
+        if text_span:
+            text_span.set_attribute('text_length', len(text) if text else 0)
+            if pages is not None:
+                text_span.set_attribute('pages', pages)
+    return text, pages
 
 def get_model_confidence_from_entity(doc, ent):
     """
@@ -214,15 +416,105 @@ def calculate_enhanced_confidence(entity_text, entity_label, extraction_method,
     
     return round(final_confidence, 3)
 
-def extract_with_custom_ner(text):
+def ner_extraction(text, model=None, deadline=None):
+    """
+    Fields from the custom NER model, before translation
+    
+    When a fast model is loaded and no model is given, the fast model runs
+    first and only low-confidence documents are escalated to the full model.
+    
+    Returns:
+        (fields, method, extra response keys)
+    """
+    if model is None and fast_nlp is not None:
+        with span("ner", cascade=True) as ner_span:
+            fields, reasons = run_cascade(
+                text,
+                lambda t: ner_fields(fast_nlp(t)),
+                lambda t: ner_fields(parse_document(t, deadline)),
+                CASCADE_MIN_TIER, CASCADE_FIELD_THRESHOLD, cascade_stats
+            )
+            if ner_span:
+                ner_span.set_attribute('escalated', bool(reasons))
+        if reasons:
+            logger.info(f"⤴️  Escalated to full model: {', '.join(reasons)}")
+        return fields, 'cascade_full' if reasons else 'cascade_fast', {'escalation_reasons': reasons}
+    
+    logger.info("=== Extracting with Custom NER Only ===")
+    
+    start = time.perf_counter()
+    with span("ner", cascade=False):
+        doc = model(text) if model else parse_document(text, deadline)
+    with span("confidence"):
+        fields = ner_fields(doc)
+    
+    if model is None:
+        shadow_score(text, fields, time.perf_counter() - start)
+    
+    return fields, 'custom_ner_only', {}
+
+def shadow_score(text, fields, active_seconds):
+    """Hand a request to shadow scoring; a failure there never fails the request"""
+    try:
+        model_registry.maybe_shadow(text, fields, active_seconds)
+    except Exception as e:
+        logger.warning(f"Shadow scoring skipped: {e}")
+
+def extract_with_custom_ner(text, model=None, deadline=None):
     """
     Extract information using Custom NER Model Only
     With model-based confidence calculation
     """
-    logger.info("=== Extracting with Custom NER Only ===")
+    fields, method, extra = ner_extraction(text, model, deadline)
+    result = build_extraction_result(fields, method=method, deadline=deadline)
+    result.update(extra)
+    return result
+
+def parse_document(text, deadline=None):
+    """
+    Run the active model on one document
+    
+    With batching on, the document joins the inference thread's next
+    nlp.pipe batch.
+    """
+    if inference_scheduler is None:
+        return nlp(text)
+    
+    return await_document(inference_scheduler.submit(text), deadline)
+
+def parse_documents(texts, deadline=None):
+    """
+    Run the active model on several documents as one batch
     
-    doc = nlp(text)
+    With batching on they are all queued on the inference thread at once
+    (and dropped from it if the deadline passes); otherwise they go
+    through nlp.pipe in batches of BUNDLE_BATCH_SIZE.
+    """
+    if inference_scheduler is None:
+        return list(nlp.pipe(texts, batch_size=BUNDLE_BATCH_SIZE))
+    
+    futures = [inference_scheduler.submit(text) for text in texts]
+    try:
+        return [await_document(future, deadline) for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
+
+def await_document(future, deadline=None):
+    """Wait for a document queued on the inference thread, within the deadline"""
+    try:
+        return future.result(timeout=deadline.remaining() if deadline else None)
+    except FutureTimeout:
+        future.cancel()
+        raise DeadlineExceeded("ner", deadline.elapsed())
+
+def ner_fields(doc):
+    """
+    Pick name, CGPA and program from a parsed document
     
+    Returns:
+        dict field -> (value, confidence)
+    """
     name = None
     cgpa = None
     program = None
@@ -300,8 +592,30 @@ def extract_with_custom_ner(text):
                 )
                 logger.info(f"✓ NER extracted PROGRAM: '{program[:50]}...' (confidence: {program_confidence})")
     
+    return {
+        'name': (name, name_confidence),
+        'cgpa': (cgpa, cgpa_confidence),
+        'program': (program, program_confidence)
+    }
+
+def build_extraction_result(fields, method, deadline=None):
+    """
+    Translate the program and assemble the response with confidence and quality tier
+    
+    Args:
+        fields: dict field -> (value, confidence)
+        method: Extraction path reported in the response
+        deadline: Optional request Deadline, checked before translation
+    """
+    if deadline:
+        deadline.check("translation")
+    
+    name, name_confidence = fields['name']
+    cgpa, cgpa_confidence = fields['cgpa']
+    program, program_confidence = fields['program']
+    
     # Calculate overall confidence
-    overall_confidence = (name_confidence + cgpa_confidence + program_confidence) / 3
+    overall = overall_confidence(fields)
     
     # Translate program from Malay to English
     program_malay = program
@@ -310,8 +624,9 @@ def extract_with_custom_ner(text):
     
     if program and course_translator:
         logger.info(f"🔄 Translating program: {program[:50]}...")
-        program_english = course_translator.translate(program)
-        field_of_study = course_translator.map_to_field_category(program_english)
+        with span("translation"):
+            program_english = course_translator.translate(program)
+            field_of_study = course_translator.map_to_field_category(program_english)
         
         if program_english != program:
             logger.info(f"✅ Translated: {program[:50]}... → {program_english[:50]}...")
@@ -330,21 +645,165 @@ def extract_with_custom_ner(text):
             'name': name_confidence,
             'cgpa': cgpa_confidence,
             'program': program_confidence,
-            'overall': round(overall_confidence, 3)
+            'overall': round(overall, 3)
         },
-        'method': 'custom_ner_only',
-        'quality_tier': 'high' if overall_confidence >= 0.85 else 'medium' if overall_confidence >= 0.70 else 'low',
-        'model_based_confidence': True
+        'method': method,
+        'quality_tier': quality_tier(overall),
+        'model_based_confidence': method != 'template'
     }
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
+def transcript_fields(text, deadline=None):
+    """
+    Fields for a transcript, trying the layout templates before the NER model
+    
+    Documents that match a known template and pass validation skip the
+    model entirely; anything else goes through ner_extraction.
+    
+    Returns:
+        (fields, method, extra response keys)
+    """
+    if TEMPLATE_FAST_PATH:
+        fields, template_name = template_fields(text)
+        if fields:
+            return fields, 'template', {'template': template_name}
+    
+    return ner_extraction(text, deadline=deadline)
+
+def template_fields(text):
+    """
+    Fields from the layout templates
+    
+    Returns:
+        (fields or None, template name or None); fields is None when no
+        template matched or the match failed validation
+    """
+    with span("template_match") as template_span:
+        template_name, fields = extract_with_template(text)
+        if template_span:
+            template_span.set_attribute('template', template_name or "none")
+            template_span.set_attribute('matched', bool(fields))
+    
+    if not fields:
+        if template_name:
+            logger.info(f"Template {template_name} failed validation, falling back to NER")
+        return None, template_name
+    
+    logger.info(f"⚡ Matched template: {template_name}")
+    labels = {'name': "STUDENT_NAME", 'cgpa': "CGPA", 'program': "PROGRAM"}
+    with span("confidence"):
+        return {
+            field: (value, calculate_enhanced_confidence(value, labels[field], "template", TEMPLATE_CONFIDENCE))
+            for field, value in fields.items()
+        }, template_name
+
+def ner_extraction_batch(texts, deadline=None):
+    """
+    ner_extraction for several documents, parsed in batches
     
-    model_type = "Custom NER" if "custom_transcript_ner_model" in str(nlp.path) else "Default spaCy"
+    With a fast model the whole batch runs through it first and only the
+    escalated documents are parsed by the full model, again as one batch.
+    
+    Returns:
+        List of (fields, method, extra response keys), in input order
+    """
+    if fast_nlp is not None:
+        with span("ner", cascade=True, documents=len(texts)) as ner_span:
+            start = time.perf_counter()
+            fields = [ner_fields(doc) for doc in fast_nlp.pipe(texts, batch_size=BUNDLE_BATCH_SIZE)]
+            fast_seconds = (time.perf_counter() - start) / len(texts)
+            
+            reasons = [escalation_reasons(f, CASCADE_MIN_TIER, CASCADE_FIELD_THRESHOLD) for f in fields]
+            escalated = [index for index, r in enumerate(reasons) if r]
+            
+            full_seconds = 0.0
+            if escalated:
+                start = time.perf_counter()
+                docs = parse_documents([texts[index] for index in escalated], deadline)
+                full_seconds = (time.perf_counter() - start) / len(escalated)
+                for index, doc in zip(escalated, docs):
+                    fields[index] = merge_fields(fields[index], ner_fields(doc))
+            
+            if ner_span:
+                ner_span.set_attribute('escalated', len(escalated))
+        
+        for r in reasons:
+            cascade_stats.record(r, fast_seconds, full_seconds if r else 0.0)
+        if escalated:
+            logger.info(f"⤴️  Escalated {len(escalated)} of {len(texts)} to the full model")
+        
+        return [
+            (f, 'cascade_full' if r else 'cascade_fast', {'escalation_reasons': r})
+            for f, r in zip(fields, reasons)
+        ]
+    
+    start = time.perf_counter()
+    with span("ner", cascade=False, documents=len(texts)):
+        docs = parse_documents(texts, deadline)
+    per_document = (time.perf_counter() - start) / len(texts)
+    
+    with span("confidence"):
+        fields = [ner_fields(doc) for doc in docs]
+    
+    for text, f in zip(texts, fields):
+        shadow_score(text, f, per_document)
+    
+    return [(f, 'custom_ner_only', {}) for f in fields]
+
+def extract_bundle(text, deadline=None):
+    """
+    One result per student in a multi-transcript bundle
+    
+    The text is split on the transcript headers. Segments matching a
+    layout template skip the model; the rest go through the same NER path
+    as a single transcript (cascade, shadow scoring), BUNDLE_BATCH_SIZE
+    segments per batch.
+    
+    Returns:
+        List of extract_transcript-shaped results, in bundle order
+    """
+    segments = split_bundle(text)
+    logger.info(f"📚 Bundle of {len(segments)} transcripts")
+    
+    results = [None] * len(segments)
+    pending = []
+    
+    for index, segment in enumerate(segments):
+        fields, template_name = template_fields(segment) if TEMPLATE_FAST_PATH else (None, None)
+        if fields:
+            results[index] = build_extraction_result(fields, method='template', deadline=deadline)
+            results[index]['template'] = template_name
+        else:
+            pending.append(index)
+    
+    for start in range(0, len(pending), BUNDLE_BATCH_SIZE):
+        if deadline:
+            deadline.check("ner")
+        
+        window = pending[start:start + BUNDLE_BATCH_SIZE]
+        extracted = ner_extraction_batch([segments[index] for index in window], deadline)
+        for index, (fields, method, extra) in zip(window, extracted):
+            results[index] = build_extraction_result(fields, method=method, deadline=deadline)
+            results[index].update(extra)
+    
+    for index, result in enumerate(results):
+        result['segment'] = index
+        result['segmentLength'] = len(segments[index])
+    
+    return results
+
+def extract_transcript(text, deadline=None):
+    """Extract information, trying the layout templates before the NER model"""
+    fields, method, extra = transcript_fields(text, deadline)
+    result = build_extraction_result(fields, method=method, deadline=deadline)
+    result.update(extra)
+    return result
+
+def health_status():
+    """Service, model and translator status"""
+    model_type = "Custom NER" if nlp and "transcript_ner_model" in str(nlp.path) else "Default spaCy"
     
     labels = []
-    if nlp and nlp.get_pipe("ner"):
+    if nlp and nlp.has_pipe("ner"):
         labels = list(nlp.get_pipe("ner").labels)
     
     translator_status = "Not loaded"
@@ -353,73 +812,432 @@ def health_check():
         translator_status = "Loaded"
         translator_mappings = course_translator.get_mapping_count()
     
-    return jsonify({
+    return {
         'status': 'OK',
         'message': 'NER extraction service is running',
+        'ready': service_ready.is_set(),
         'service': 'ner_service',
         'port': 5001,
         'model': model_type,
         'entity_labels': labels,
-        'approach': 'custom_ner_only',
-        'features': ['model_based_confidence', 'quality_tier', 'course_translation'],
+        'approach': 'template_then_ner' if TEMPLATE_FAST_PATH else 'custom_ner_only',
+        'features': ['template_fast_path', 'model_based_confidence', 'quality_tier', 'course_translation'],
         'course_translator': {
             'status': translator_status,
             'mappings': translator_mappings
+        },
+        'models': model_registry.status()
+    }
+
+def readiness_status():
+    """Readiness body and status code (503 until warm-up has finished)"""
+    ready = service_ready.is_set()
+    return {
+        'ready': ready,
+        'pipeline': list(nlp.pipe_names) if nlp else [],
+        'startup_seconds': startup_timings
+    }, 200 if ready else 503
+
+def metrics_snapshot(admission_controller=None):
+    """Template hit rates, cascade escalation rate, queue depth and shed counts"""
+    return {
+        'template_fast_path': TEMPLATE_FAST_PATH,
+        'templates': template_stats.snapshot(),
+        'admission': (admission_controller or admission).snapshot(),
+        'pdf_sandbox': get_pdf_pool().snapshot() if PDF_SANDBOX else None,
+        'inference_batching': inference_scheduler.snapshot() if inference_scheduler else None,
+        'cascade': {
+            'enabled': fast_nlp is not None,
+            'min_tier': CASCADE_MIN_TIER,
+            'field_threshold': CASCADE_FIELD_THRESHOLD,
+            **cascade_stats.snapshot()
         }
-    })
+    }
 
-@app.route('/api/extract', methods=['POST'])
-def extract_information():
-    """Extract information from uploaded document"""
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify(health_status())
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 only once the models are loaded and warmed up"""
+    body, status = readiness_status()
+    return jsonify(body), status
+
+def admin_rejection():
+    """
+    Error response for an unauthorized admin request, None if allowed
+    
+    The admin endpoints stay closed (403) until MODEL_ADMIN_TOKEN is set;
+    after that the X-Admin-Token header must match it (401 otherwise).
+    """
+    if not MODEL_ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled (MODEL_ADMIN_TOKEN is not set)'}), 403
+    
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), MODEL_ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return None
+
+def parse_sample_rate(value):
+    """
+    shadowSampleRate from an admin request
+    
+    Returns:
+        Float in [0, 1], or None if not given
+    
+    Raises:
+        ValueError: Not a number or outside 0-1
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError("shadowSampleRate must be a number between 0 and 1")
     try:
-        data = request.get_json()
-        
-        if not data or 'filePath' not in data:
-            return jsonify({
-                'error': 'Missing file path',
-                'name': None,
-                'cgpa': None,
-                'program': None,
-                'confidence': {'name': 0.0, 'cgpa': 0.0, 'program': 0.0, 'overall': 0.0}
-            }), 400
+        rate = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("shadowSampleRate must be a number between 0 and 1")
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError("shadowSampleRate must be between 0 and 1")
+    return rate
+
+@app.route('/admin/models', methods=['GET'])
+def model_status():
+    """Active and candidate model versions with shadow scoring results"""
+    rejection = admin_rejection()
+    if rejection:
+        return rejection
+    return jsonify(model_registry.status())
+
+@app.route('/admin/models/load', methods=['POST'])
+def load_candidate_model():
+    """Start loading a candidate model in the background"""
+    rejection = admin_rejection()
+    if rejection:
+        return rejection
+    
+    data = request.get_json() or {}
+    model_path = data.get('path')
+    if not model_path or not Path(model_path).exists():
+        return jsonify({'error': f'Model not found: {model_path}'}), 400
+    
+    try:
+        sample_rate = parse_sample_rate(data.get('shadowSampleRate'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not model_registry.load_candidate(model_path, sample_rate):
+        return jsonify({'error': 'Another candidate is still loading'}), 409
+    
+    return jsonify({'status': 'loading', 'path': model_path}), 202
+
+@app.route('/admin/models/promote', methods=['POST'])
+def promote_candidate_model():
+    """Swap the warmed-up candidate in as the active model"""
+    global nlp
+    
+    rejection = admin_rejection()
+    if rejection:
+        return rejection
+    
+    promoted = model_registry.promote()
+    if promoted is None:
+        return jsonify({'error': 'No candidate model is ready'}), 409
+    
+    # In-flight requests keep the model they already started with
+    nlp = promoted.nlp
+    
+    return jsonify({'status': 'promoted', 'active': promoted.describe()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Template hit rates, cascade escalation rate, queue depth and shed counts"""
+    return jsonify(metrics_snapshot())
+
+def empty_result(error):
+    """Error response body with every field empty"""
+    return {
+        'error': error,
+        'name': None,
+        'cgpa': None,
+        'program': None,
+        'confidence': {'name': 0.0, 'cgpa': 0.0, 'program': 0.0, 'overall': 0.0}
+    }
+
+def request_deadline(client_timeout_ms=None, limit=None):
+    """Request time budget, kept a second inside the caller's own timeout"""
+    seconds = limit or REQUEST_DEADLINE_SECONDS
+    if client_timeout_ms:
+        try:
+            seconds = min(seconds, float(client_timeout_ms) / 1000 - 1.0)
+        except ValueError:
+            pass
+    return seconds
+
+def handle_extract_request(data, client_timeout_ms=None, trace=None):
+    """
+    Run one extraction request under admission control
+    
+    Independent of the web framework so other transports can share it.
+    
+    Args:
+        data: Request body with filePath and fileName
+        client_timeout_ms: Caller's own timeout, if it sent one
+        trace: (trace_id, parent_span_id) from the caller's headers
+    
+    Returns:
+        (body dict, status code, headers dict)
+    """
+    with start_trace("POST /api/extract", trace, file_name=(data or {}).get('fileName', 'unknown')) as root:
+        body, status, headers = run_extract_request(data, client_timeout_ms)
+        root.set_attribute('http.status_code', status)
+        if status >= 500:
+            root.status = STATUS_ERROR
+    
+    headers['X-Correlation-ID'] = root.trace_id
+    return body, status, headers
+
+def request_rejection(data):
+    """(body, status, headers) for a request that cannot start, or None"""
+    if not data or 'filePath' not in data:
+        return empty_result('Missing file path'), 400, {}
+    
+    if not service_ready.is_set():
+        return empty_result('Service is warming up'), 503, {'Retry-After': '5'}
+    
+    return None
+
+def extraction_stages(data, client_timeout_ms=None, admission_controller=None):
+    """
+    The extraction pipeline (admission, deadline, text, NER, translation)
+    as a generator each transport drives
+    
+    Transports only differ in how they run a step, so stage order,
+    deadlines and error codes are defined once here. Yields (step, arg):
+        ('admit', None): take an admission slot, held until 'release'
+        ('release', None): give the slot back
+        ('run', (func, *args)): call func(*args) and send back the result
+        ('event', (name, data)): progress for streaming transports
+    An exception raised by a step is thrown back into the generator.
+    
+    Returns:
+        (body dict, status code, headers dict)
+    """
+    admission_controller = admission_controller or admission
+    
+    try:
+        rejection = request_rejection(data)
+        if rejection:
+            return rejection
         
         file_path = data['filePath']
         file_name = data.get('fileName', 'unknown')
+        bundle = bool(data.get('bundle'))
+        
+        logger.info(f"Processing: {file_name}{' (bundle)' if bundle else ''}")
+        
+        deadline = Deadline(request_deadline(client_timeout_ms, BUNDLE_DEADLINE_SECONDS if bundle else None))
         
-        logger.info(f"Processing: {file_name}")
+        yield 'admit', None
         
-        text = extract_text_from_file(file_path)
+        deadline.check("pdf")
+        text, pages = yield 'run', (traced_text_extraction, file_path, bundle_pdf_budget if bundle else None)
         
         if not text:
-            return jsonify({
-                'error': 'Could not extract text',
-                'name': None,
-                'cgpa': None,
-                'program': None,
-                'confidence': {'name': 0.0, 'cgpa': 0.0, 'program': 0.0, 'overall': 0.0}
-            }), 400
+            return empty_result('Could not extract text'), 400, {}
         
         logger.info(f"Extracted {len(text)} characters")
+        yield 'event', ('text_extracted', {'textLength': len(text), 'pages': pages})
+        
+        deadline.check("ner")
+        if bundle:
+            students = yield 'run', (extract_bundle, text, deadline)
+            yield 'release', None
+            
+            logger.info(f"Bundle results: {len(students)} students, "
+                        f"{sum(1 for student in students if student['name'])} with a name")
+            return {
+                'bundle': True,
+                'count': len(students),
+                'students': students,
+                'fileName': file_name,
+                'textLength': len(text),
+                'pages': pages
+            }, 200, {}
+        
+        fields, method, extra = yield 'run', (transcript_fields, text, deadline)
+        yield 'event', ('entities', {
+            **{field: value for field, (value, _) in fields.items()},
+            'confidence': {field: confidence for field, (_, confidence) in fields.items()},
+            'method': method
+        })
+        
+        result = yield 'run', (build_extraction_result, fields, method, deadline)
+        yield 'release', None
         
-        result = extract_with_custom_ner(text)
+        result.update(extra)
+        yield 'event', ('translation', {
+            'program_malay': result['program_malay'],
+            'program_english': result['program_english'],
+            'field_of_study': result['field_of_study']
+        })
         
         result['fileName'] = file_name
         result['textLength'] = len(text)
+        result['pages'] = pages
         
         logger.info(f"Results: name={result['name']}, cgpa={result['cgpa']}, program={result['program'][:30] if result['program'] else None}")
         logger.info(f"Confidence: overall={result['confidence']['overall']}, quality_tier={result['quality_tier']}")
         
-        return jsonify(result)
-        
+        return result, 200, {}
+    
     except Exception as e:
-        logger.error(f"Error: {e}", exc_info=True)
-        return jsonify({
-            'error': str(e),
-            'name': None,
-            'cgpa': None,
-            'program': None,
-            'confidence': {'name': 0.0, 'cgpa': 0.0, 'program': 0.0, 'overall': 0.0}
-        }), 500
+        return extraction_error_response(e, admission_controller)
+
+def run_stages(stages, admission_controller=None):
+    """
+    Drive extraction_stages on the calling thread, yielding its
+    (event, data) progress events
+    
+    The admission slot is released if the stages end early or the caller
+    abandons the generator.
+    
+    Returns:
+        (body dict, status code, headers dict), as the generator's return value
+    """
+    admission_controller = admission_controller or admission
+    slot = None
+    value, error = None, None
+    
+    try:
+        while True:
+            try:
+                step, arg = stages.throw(error) if error else stages.send(value)
+            except StopIteration as stop:
+                return stop.value
+            
+            value, error = None, None
+            try:
+                if step == 'admit':
+                    held = admission_controller.admit()
+                    held.__enter__()
+                    slot = held
+                elif step == 'release':
+                    held, slot = slot, None
+                    held.__exit__(None, None, None)
+                elif step == 'run':
+                    func, *args = arg
+                    value = func(*args)
+                elif step == 'event':
+                    yield arg
+            except Exception as e:
+                error = e
+    finally:
+        stages.close()
+        if slot is not None:
+            slot.__exit__(None, None, None)
+
+def run_extract_request(data, client_timeout_ms=None):
+    """Body of handle_extract_request, inside the request's trace"""
+    events = run_stages(extraction_stages(data, client_timeout_ms))
+    try:
+        while True:
+            next(events)
+    except StopIteration as stop:
+        return stop.value
+
+def extraction_error_response(error, admission_controller=None):
+    """
+    Map an exception raised while extracting to (body, status, headers)
+    
+    Shed and timed-out requests get Retry-After, PDF budget breaches 422.
+    """
+    admission_controller = admission_controller or admission
+    
+    if isinstance(error, Overloaded):
+        logger.warning(f"🚦 Shedding request ({error.reason}), retry after {error.retry_after}s")
+        return empty_result('Service overloaded, retry later'), error.status, {'Retry-After': str(error.retry_after)}
+    
+    if isinstance(error, PdfBudgetExceeded):
+        logger.warning(f"📄 PDF rejected: {error}")
+        body = empty_result('Could not extract text' if error.kind == 'error' else 'PDF exceeds processing limits')
+        body['pdf_error'] = error.to_dict()
+        return body, 400 if error.kind == 'error' else 422, {}
+    
+    if isinstance(error, DeadlineExceeded):
+        admission_controller.record_deadline_exceeded(error.stage)
+        logger.warning(f"⏰ {error}")
+        return empty_result('Request deadline exceeded'), 503, {'Retry-After': str(admission_controller.retry_after())}
+    
+    logger.error(f"Error: {error}", exc_info=error)
+    return empty_result(str(error)), 500, {}
+
+def extraction_events(data, client_timeout_ms=None, trace=None):
+    """
+    Run one extraction under admission control, yielding (event, data)
+    as each stage finishes
+    
+    Events are text_extracted, entities (fields before translation),
+    translation and complete (the /api/extract body); a failure ends the
+    stream with an error event carrying the status /api/extract would use.
+    """
+    with start_trace("POST /api/extract/stream", trace, file_name=data.get('fileName', 'unknown')) as root:
+        for event, event_data in _extraction_events(data, client_timeout_ms):
+            if event == 'error':
+                root.set_attribute('http.status_code', event_data['status'])
+                if event_data['status'] >= 500:
+                    root.status = STATUS_ERROR
+            yield event, event_data
+
+def _extraction_events(data, client_timeout_ms=None):
+    body, status, headers = yield from run_stages(extraction_stages(data, client_timeout_ms))
+    
+    if status == 200:
+        yield 'complete', body
+        return
+    
+    if 'Retry-After' in headers:
+        body['retry_after'] = int(headers['Retry-After'])
+    yield 'error', {'status': status, **body}
+
+def server_sent_events(events):
+    """Format (event, data) pairs as a text/event-stream"""
+    for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def request_trace():
+    """Trace context from the traceparent / X-Correlation-ID headers"""
+    return trace_context(request.headers.get('traceparent'), request.headers.get('X-Correlation-ID'))
+
+@app.route('/api/extract', methods=['POST'])
+def extract_information():
+    """Extract information from uploaded document"""
+    body, status, headers = handle_extract_request(
+        request.get_json(silent=True), request.headers.get('X-Request-Timeout-Ms'), request_trace()
+    )
+    return jsonify(body), status, headers
+
+@app.route('/api/extract/stream', methods=['POST'])
+def extract_information_stream():
+    """Extract information, sending each stage as a server-sent event"""
+    data = request.get_json(silent=True)
+    
+    # Requests that cannot start get a plain response rather than a stream
+    rejection = request_rejection(data)
+    if rejection:
+        body, status, headers = rejection
+        return jsonify(body), status, headers
+    
+    logger.info(f"Streaming: {data.get('fileName', 'unknown')}")
+    
+    trace = request_trace()
+    events = extraction_events(data, request.headers.get('X-Request-Timeout-Ms'), trace)
+    return Response(
+        stream_with_context(server_sent_events(events)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Correlation-ID': trace[0]}
+    )
 
 if __name__ == '__main__':
     print("=" * 60)
@@ -431,25 +1249,26 @@ if __name__ == '__main__':
     print("   - Method: Custom NER Model Only")
     print("   - Confidence: Model-based + Quality checks")
     print("   - Features: Course Translation (Malay → English)")
+    print("   - Fast path: Layout templates, NER fallback")
     print("   - Health: http://localhost:5001/health")
-    print("")
-    
-    print("🤖 Loading NER model...")
-    load_custom_ner_model()
-    
-    if nlp:
-        print("✅ NER Model loaded!")
-        if nlp.get_pipe("ner"):
-            labels = nlp.get_pipe("ner").labels
-            print(f"🏷️  Labels: {labels}")
+    print("   - Ready: http://localhost:5001/ready")
+    print("   - Progress events: POST http://localhost:5001/api/extract/stream")
+    print(f"   - Traces: {TRACE_EXPORTER} (TRACE_EXPORTER=stdout|file|none)")
+    print(f"   - Model admin: {'enabled' if MODEL_ADMIN_TOKEN else 'disabled (set MODEL_ADMIN_TOKEN)'}")
+    if os.environ.get("EXTRACTION_SOCKET"):
+        print(f"   - Socket: {os.environ['EXTRACTION_SOCKET']}")
+    print("=" * 60)
     
-    print("\n📚 Loading course translator...")
-    load_course_translator()
+    debug = os.environ.get("FLASK_DEBUG", "1") != "0"
     
-    if course_translator:
-        count = course_translator.get_mapping_count()
-        print(f"✅ Course Translator loaded! ({count} mappings)")
-    
-    print("=" * 60)
+    # With the debug reloader the parent process only watches files, so
+    # only the serving process loads the models
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        # Load in the background so /health answers while /ready is still 503
+        threading.Thread(target=startup, name="startup", daemon=True).start()
+        
+        # Optional low-overhead local transport next to the HTTP API
+        if os.environ.get("EXTRACTION_SOCKET"):
+            start_socket_server(handle_extract_request, os.environ["EXTRACTION_SOCKET"])
     
-    app.run(host='::', port=5001, debug=True)
\ No newline at end of file
+    app.run(host='::', port=5001, debug=debug)
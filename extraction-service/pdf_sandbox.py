@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+PDF Sandbox
+Parses PDFs in a pool of recyclable subprocesses with per-document page,
+byte, time and memory budgets
+"""
+
+import os
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+
+from pdf_text import cached_parse
+
+try:
+    import resource  # Unix only
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+logger = logging.getLogger(__name__)
+
+# Hard address-space ceiling for a worker, as a multiple of its RSS
+# budget (virtual size runs well above resident size); catches spikes
+# that land between two RSS polls
+ADDRESS_SPACE_FACTOR = 2
+
+class PdfBudget:
+    """Per-document limits (None disables a limit)"""
+
+    def __init__(self, max_pages=50, max_bytes=20 * 1024 * 1024, timeout=15.0, max_rss_mb=512):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+
+    @classmethod
+    def from_env(cls):
+        """Budget from PDF_MAX_PAGES, PDF_MAX_BYTES, PDF_TIMEOUT_SECONDS and PDF_MAX_RSS_MB"""
+        return cls(
+            max_pages=int(os.environ.get("PDF_MAX_PAGES", "50")),
+            max_bytes=int(os.environ.get("PDF_MAX_BYTES", str(20 * 1024 * 1024))),
+            timeout=float(os.environ.get("PDF_TIMEOUT_SECONDS", "15")),
+            max_rss_mb=float(os.environ.get("PDF_MAX_RSS_MB", "512"))
+        )
+
+class PdfBudgetExceeded(Exception):
+    """
+    A document broke its budget or its worker failed
+
+    kind is one of 'bytes', 'pages', 'timeout', 'rss', 'crash' or 'error'.
+    """
+
+    def __init__(self, kind, detail, limit=None):
+        super().__init__(f"{kind}: {detail}")
+        self.kind = kind
+        self.detail = detail
+        self.limit = limit
+
+    def to_dict(self):
+        return {'kind': self.kind, 'detail': self.detail, 'limit': self.limit}
+
+def _process_rss_mb(pid):
+    """Current resident set size of a process in MB (None where /proc is missing)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _set_address_space_limit(limit_bytes):
+    """Soft RLIMIT_AS for the coming document (None lifts it back to the hard limit)"""
+    if not HAS_RESOURCE:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = hard if limit_bytes is None else limit_bytes
+    if hard != resource.RLIM_INFINITY and soft > hard:
+        soft = hard
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+def _worker_main(conn):
+    """Subprocess loop: parse one (path, max_pages, address space limit) per message until told to stop"""
+    from pdf_text import parse_pdf, PageLimitExceeded
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        pdf_path, max_pages, address_space_bytes = message
+        try:
+            _set_address_space_limit(address_space_bytes)
+            try:
+                text, pages = parse_pdf(pdf_path, max_pages)
+            finally:
+                _set_address_space_limit(None)
+            conn.send(('ok', text, pages))
+        except PageLimitExceeded as e:
+            conn.send(('pages', str(e), e.pages))
+        except Exception as e:
+            # MuPDF reports a failed allocation as its own error type
+            if isinstance(e, MemoryError) or "malloc" in str(e):
+                conn.send(('rss', f"allocation failed under the address space limit ({type(e).__name__}: {e})", 0))
+                continue
+            conn.send(('error', f"{type(e).__name__}: {e}", 0))
+
+class _Worker:
+    """One parser subprocess and the pipe to it"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn,), name="pdf-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.documents = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+class PdfSandboxPool:
+    """
+    Fixed-size pool of spawned parser processes
+
+    A worker is replaced after max_docs_per_worker documents, and straight
+    away when it breaks a time or memory budget or dies, so one bad PDF
+    never leaves a hung or bloated worker behind.
+
+    Args:
+        size: Number of worker processes
+        budget: PdfBudget applied to every document
+        max_docs_per_worker: Recycle a worker after this many documents
+    """
+
+    def __init__(self, size=2, budget=None, max_docs_per_worker=100):
+        self.size = size
+        self.budget = budget or PdfBudget()
+        self.max_docs_per_worker = max_docs_per_worker
+
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+        self.stats = {'documents': 0, 'recycled': 0, 'budget_exceeded': {}}
+
+    def start(self):
+        """Spawn the workers (called lazily by parse)"""
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._idle.put(self._new_worker())
+            self._started = True
+
+    def _new_worker(self):
+        return _Worker(self._context)
+
+    def _record_breach(self, kind):
+        with self._lock:
+            self.stats['budget_exceeded'][kind] = self.stats['budget_exceeded'].get(kind, 0) + 1
+
+    def _replace(self, worker, kill=True):
+        """Stop (or kill) a worker and return a fresh one"""
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        with self._lock:
+            self.stats['recycled'] += 1
+        return self._new_worker()
+
+    def parse(self, pdf_path, budget=None):
+        """
+        Parse a PDF in a worker
+
+        Args:
+            pdf_path: Path of the PDF
+            budget: PdfBudget for this document (default: the pool's)
+
+        Returns:
+            (text, page_count); raises PdfBudgetExceeded on any breach
+        """
+        budget = budget or self.budget
+        max_pages = budget.max_pages
+
+        size = os.path.getsize(pdf_path)
+        if budget.max_bytes is not None and size > budget.max_bytes:
+            self._record_breach('bytes')
+            raise PdfBudgetExceeded('bytes', f"file is {size} bytes", budget.max_bytes)
+
+        address_space_bytes = None
+        if budget.max_rss_mb is not None:
+            address_space_bytes = int(budget.max_rss_mb * ADDRESS_SPACE_FACTOR * 1024 * 1024)
+
+        self.start()
+        try:
+            # Every worker busy or being replaced: give up like a slow parse
+            worker = self._idle.get(timeout=budget.timeout)
+        except queue.Empty:
+            self._record_breach('timeout')
+            raise PdfBudgetExceeded('timeout', f"no free worker after {budget.timeout}s", budget.timeout)
+
+        try:
+            try:
+                worker.conn.send((str(pdf_path), max_pages, address_space_bytes))
+            except OSError:
+                raise PdfBudgetExceeded('crash', "worker pipe closed")
+            status, payload, pages = self._wait_for_reply(worker, budget)
+
+            # A worker that ran out of memory is not reused
+            if status == 'rss':
+                raise PdfBudgetExceeded('rss', payload, budget.max_rss_mb)
+
+            worker.documents += 1
+            if worker.documents >= self.max_docs_per_worker:
+                worker = self._replace(worker, kill=False)
+        except PdfBudgetExceeded as e:
+            self._record_breach(e.kind)
+            worker = self._replace(worker)
+            raise
+        finally:
+            self._idle.put(worker)
+
+        with self._lock:
+            self.stats['documents'] += 1
+
+        if status == 'pages':
+            self._record_breach('pages')
+            raise PdfBudgetExceeded('pages', payload, max_pages)
+        if status == 'error':
+            self._record_breach('error')
+            raise PdfBudgetExceeded('error', payload)
+
+        return payload, pages
+
+    def _wait_for_reply(self, worker, budget):
+        """Poll the worker, enforcing the timeout and RSS ceiling"""
+        give_up_at = time.monotonic() + budget.timeout if budget.timeout else None
+
+        while True:
+            wait = 0.05
+            if give_up_at is not None:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    raise PdfBudgetExceeded('timeout', f"no result after {budget.timeout}s", budget.timeout)
+                wait = min(wait, remaining)
+
+            if worker.conn.poll(wait):
+                try:
+                    return worker.conn.recv()
+                except (EOFError, OSError):
+                    raise PdfBudgetExceeded(
+                        'crash', f"worker exited with code {worker.process.exitcode}"
+                    )
+
+            if not worker.process.is_alive():
+                raise PdfBudgetExceeded('crash', f"worker exited with code {worker.process.exitcode}")
+
+            if budget.max_rss_mb is not None:
+                rss = _process_rss_mb(worker.process.pid)
+                if rss is not None and rss > budget.max_rss_mb:
+                    raise PdfBudgetExceeded('rss', f"worker reached {rss:.0f} MB", budget.max_rss_mb)
+
+    def snapshot(self):
+        """Worker count, documents parsed, recycles and breaches by kind"""
+        with self._lock:
+            return {
+                'workers': self.size if self._started else 0,
+                'max_docs_per_worker': self.max_docs_per_worker,
+                'budget': vars(self.budget),
+                'documents': self.stats['documents'],
+                'recycled': self.stats['recycled'],
+                'budget_exceeded': dict(self.stats['budget_exceeded'])
+            }
+
+    def close(self):
+        """Stop every worker"""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+# Global pool instance
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Get or create the global sandbox pool (sized by PDF_WORKERS)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfSandboxPool(
+                size=int(os.environ.get("PDF_WORKERS", "2")),
+                budget=PdfBudget.from_env(),
+                max_docs_per_worker=int(os.environ.get("PDF_WORKER_MAX_DOCS", "100"))
+            )
+            atexit.register(_pool.close)
+    return _pool
+
+def extract_text_sandboxed(pdf_path, use_cache=True, budget=None):
+    """
+    Text and page count of a PDF, parsed in the sandbox on a cache miss
+
+    The cache lookup happens in the calling process, so cached documents
+    never touch a worker.
+
+    Args:
+        budget: PdfBudget overriding the PDF_* limits (e.g. for bundles)
+
+    Returns:
+        (text, page_count); raises PdfBudgetExceeded on a breach
+    """
+    pool = get_pool()
+    budget = budget or pool.budget
+
+    # Checked before the cache hashes the whole file
+    size = os.path.getsize(pdf_path)
+    if budget.max_bytes is not None and size > budget.max_bytes:
+        pool._record_breach('bytes')
+        raise PdfBudgetExceeded('bytes', f"file is {size} bytes", budget.max_bytes)
+
+    text, pages = cached_parse(pdf_path, parser=lambda path: pool.parse(path, budget), use_cache=use_cache)
+
+    # A cache hit skips the worker, so check the page limit here as well
+    max_pages = budget.max_pages
+    if max_pages is not None and pages > max_pages:
+        pool._record_breach('pages')
+        raise PdfBudgetExceeded('pages', f"PDF has {pages} pages, limit is {max_pages}", max_pages)
+
+    return text, pages
+
+if __name__ == "__main__":
+    # Usage: python pdf_sandbox.py file.pdf [file.pdf ...]
+    logging.basicConfig(level=logging.INFO)
+    pool = get_pool()
+    for path in sys.argv[1:]:
+        try:
+            text, pages = extract_text_sandboxed(path)
+            print(f"✓ {path}: {pages} pages, {len(text)} characters")
+        except PdfBudgetExceeded as e:
+            print(f"❌ {path}: {e}")
+    print(pool.snapshot())
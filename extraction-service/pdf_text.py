@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+PDF Text Extraction Module
+Shared by the NER service and the data preparation pipeline, with a
+persistent text cache keyed by content hash and extractor version
+
+The cache file holds the full text of every transcript parsed, so it
+contains personal data (student names, IDs and grades). Entries expire
+after PDF_TEXT_CACHE_TTL_DAYS; 'python pdf_text.py --clear' empties it.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import closing, contextmanager
+from pathlib import Path
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+# Bump when the extraction logic changes so cached text is not reused
+EXTRACTOR_REVISION = 1
+
+if HAS_PYMUPDF:
+    EXTRACTOR_VERSION = f"pymupdf-{fitz.VersionBind}-r{EXTRACTOR_REVISION}"
+else:
+    EXTRACTOR_VERSION = f"pypdf-r{EXTRACTOR_REVISION}"
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "PDF_TEXT_CACHE", str(Path(__file__).parent / ".pdf_text_cache.sqlite3")
+)
+DEFAULT_CACHE_MAX_MB = float(os.environ.get("PDF_TEXT_CACHE_MAX_MB", "512"))
+
+# Entries older than this are never served and get purged (0 = no expiry)
+DEFAULT_CACHE_TTL_DAYS = float(os.environ.get("PDF_TEXT_CACHE_TTL_DAYS", "30"))
+
+# Eviction trims to 90% of the limit; the table total is only summed
+# again once this process has written that much headroom
+EVICTION_HEADROOM = 0.1
+
+class PageLimitExceeded(ValueError):
+    """PDF has more pages than the caller allows"""
+
+    def __init__(self, pages, max_pages):
+        super().__init__(f"PDF has {pages} pages, limit is {max_pages}")
+        self.pages = pages
+        self.max_pages = max_pages
+
+def parse_pdf(pdf_path, max_pages=None):
+    """
+    Extract text from a PDF without the cache
+
+    Args:
+        pdf_path: PDF file
+        max_pages: Refuse documents with more pages (checked before parsing)
+
+    Returns:
+        (text, page_count); raises on unreadable files
+    """
+    if HAS_PYMUPDF:
+        with fitz.open(pdf_path) as doc:
+            if max_pages is not None and doc.page_count > max_pages:
+                raise PageLimitExceeded(doc.page_count, max_pages)
+            text = ""
+            for page in doc:
+                text += page.get_text()
+            return text, doc.page_count
+    else:
+        reader = PdfReader(pdf_path)
+        if max_pages is not None and len(reader.pages) > max_pages:
+            raise PageLimitExceeded(len(reader.pages), max_pages)
+        text = ""
+        for page in reader.pages:
+            text += page.extract_text()
+        return text, len(reader.pages)
+
+def content_hash(file_path):
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class TextCache:
+    """
+    SQLite store of extracted text with a least-recently-used size limit
+    and an age limit
+
+    Every call opens its own short-lived connection, so the cache can be
+    shared by threads and by separate processes (service, prep workers,
+    evaluation runs) through WAL mode.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_mb=DEFAULT_CACHE_MAX_MB, ttl_days=DEFAULT_CACHE_TTL_DAYS):
+        self.path = str(path)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+
+        # Bytes written since the table total was last summed; starts
+        # full so the first put checks the size limit
+        self._lock = threading.Lock()
+        self._unchecked_bytes = self.max_bytes * EVICTION_HEADROOM
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS texts (
+                    content_hash TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    pages INTEGER,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    created REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (content_hash, extractor)
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(texts)")}
+            if "created" not in columns:
+                # Caches from before the age limit: their entries count as expired
+                conn.execute("ALTER TABLE texts ADD COLUMN created REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON texts (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_created ON texts (created)")
+            self._purge_expired(conn)
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one transaction, committed and closed on exit"""
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            # Deleted text is overwritten rather than left in free pages
+            conn.execute("PRAGMA secure_delete=ON")
+            with conn:
+                yield conn
+
+    def _cutoff(self):
+        """Oldest creation time still served"""
+        return time.time() - self.ttl_seconds if self.ttl_seconds else 0
+
+    def get(self, key, extractor=EXTRACTOR_VERSION):
+        """Cached (text, pages) or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text, pages FROM texts WHERE content_hash = ? AND extractor = ? AND created >= ?",
+                (key, extractor, self._cutoff())
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE texts SET last_access = ? WHERE content_hash = ? AND extractor = ?",
+                    (time.time(), key, extractor)
+                )
+        return row
+
+    def put(self, key, text, pages, extractor=EXTRACTOR_VERSION):
+        """Store text; purge expired entries and evict over the size limit now and then"""
+        size = len(text.encode('utf-8'))
+        now = time.time()
+
+        with self._lock:
+            self._unchecked_bytes += size
+            check = self._unchecked_bytes >= self.max_bytes * EVICTION_HEADROOM
+            if check:
+                self._unchecked_bytes = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO texts (content_hash, extractor, text, pages, size, last_access, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, extractor, text, pages, size, now, now)
+            )
+            if check:
+                self._purge_expired(conn)
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total)
+
+    def _evict(self, conn, total):
+        # Trim to 90% of the limit so eviction doesn't run on every insert
+        target = self.max_bytes * (1 - EVICTION_HEADROOM)
+        rows = conn.execute(
+            "SELECT content_hash, extractor, size FROM texts ORDER BY last_access"
+        ).fetchall()
+        for key, extractor, size in rows:
+            if total <= target:
+                break
+            conn.execute(
+                "DELETE FROM texts WHERE content_hash = ? AND extractor = ?", (key, extractor)
+            )
+            total -= size
+
+    def _purge_expired(self, conn):
+        if not self.ttl_seconds:
+            return 0
+        return conn.execute("DELETE FROM texts WHERE created < ?", (self._cutoff(),)).rowcount
+
+    def purge_expired(self):
+        """
+        Delete entries older than the age limit
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._connect() as conn:
+            return self._purge_expired(conn)
+
+    def clear(self):
+        """
+        Delete every entry and compact the file so no text is left on disk
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM texts").rowcount
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with self._lock:
+            self._unchecked_bytes = 0
+        return deleted
+
+    def stats(self):
+        """Number of entries and total cached text size"""
+        with self._connect() as conn:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM texts"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_days": self.ttl_seconds / 86400 if self.ttl_seconds else None
+        }
+
+# Global cache instance
+_cache = None
+
+def get_cache():
+    """Get or create the global text cache (None if it cannot be opened)"""
+    global _cache
+    if _cache is None:
+        try:
+            _cache = TextCache()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️  PDF text cache unavailable: {e}")
+            return None
+    return _cache
+
+def cached_parse(pdf_path, parser=parse_pdf, use_cache=True):
+    """
+    Text and page count through the cache, calling parser on a miss
+
+    Args:
+        pdf_path: PDF file
+        parser: Function pdf_path -> (text, page_count), e.g. a sandboxed parser
+        use_cache: Skip the cache entirely when False
+
+    Returns:
+        (text, page_count); parser errors are raised to the caller
+    """
+    cache = get_cache() if use_cache else None
+    key = content_hash(pdf_path) if cache else None
+
+    if cache:
+        try:
+            cached = cache.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"PDF text cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached[0], cached[1]
+
+    text, pages = parser(pdf_path)
+
+    if cache:
+        try:
+            cache.put(key, text, pages)
+        except sqlite3.Error as e:
+            logger.warning(f"PDF text cache write failed: {e}")
+
+    return text, pages
+
+def extract_text_with_pages(pdf_path, use_cache=True):
+    """
+    Extract text and page count from a PDF, using the text cache
+
+    Returns:
+        (text, page_count), or (None, 0) if the PDF cannot be read
+    """
+    try:
+        return cached_parse(pdf_path, use_cache=use_cache)
+    except Exception as e:
+        logger.error(f"Error extracting {pdf_path}: {e}")
+        return None, 0
+
+def extract_text_from_pdf(pdf_path, use_cache=True):
+    """Extract text from a PDF file (None on error)"""
+    text, _ = extract_text_with_pages(pdf_path, use_cache)
+    return text
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python pdf_text.py [--purge | --clear]
+    cache = TextCache()
+    if "--clear" in sys.argv:
+        print(f"Cleared {cache.clear()} cached texts from {cache.path}")
+    elif "--purge" in sys.argv:
+        print(f"Purged {cache.purge_expired()} expired texts from {cache.path}")
+    print(cache.stats())
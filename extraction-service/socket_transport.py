@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Socket Transport
+Unix domain socket listener for the extraction service with
+length-prefixed msgpack (or compact JSON) frames over persistent
+connections, a reference client and a benchmark against the HTTP API
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import logging
+import threading
+import socketserver
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+logger = logging.getLogger(__name__)
+
+# In a directory owned by the service rather than world-writable /tmp
+DEFAULT_SOCKET_PATH = os.environ.get("EXTRACTION_SOCKET", "/run/dreamfund/extraction.sock")
+
+# Socket file mode (owner and group read/write), applied through the umask at bind time
+SOCKET_UMASK = 0o117
+
+# Frame: 1-byte codec tag, 4-byte big-endian payload length, payload
+HEADER = struct.Struct(">cI")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+CODEC_MSGPACK = b"m"
+CODEC_JSON = b"j"
+
+def default_codec():
+    """msgpack when installed, compact JSON otherwise"""
+    return CODEC_MSGPACK if HAS_MSGPACK else CODEC_JSON
+
+def encode(message, codec):
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def decode(payload, codec):
+    if codec == CODEC_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+def _recv_exactly(sock, size):
+    """Read exactly size bytes, or None if the peer closed the connection first"""
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def send_frame(sock, message, codec):
+    payload = encode(message, codec)
+    sock.sendall(HEADER.pack(codec, len(payload)) + payload)
+
+def recv_frame(sock):
+    """
+    Read one frame
+
+    Returns:
+        (message, codec), or (None, None) when the connection closed
+    """
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None, None
+
+    codec, length = HEADER.unpack(header)
+    if codec not in (CODEC_MSGPACK, CODEC_JSON) or (codec == CODEC_MSGPACK and not HAS_MSGPACK):
+        raise ValueError(f"Unsupported codec: {codec!r}")
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes is over the {MAX_FRAME_BYTES} byte limit")
+
+    payload = _recv_exactly(sock, length)
+    if payload is None:
+        return None, None
+    return decode(payload, codec), codec
+
+def compact_result(body):
+    """Drop response fields that only repeat others (program_english, model_based_confidence)"""
+    compact = dict(body)
+    if compact.get('program_english') == compact.get('program'):
+        compact.pop('program_english', None)
+    compact.pop('model_based_confidence', None)
+    return compact
+
+class _ExtractionHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one persistent connection until the client closes it"""
+
+    def handle(self):
+        handle_request = self.server.handle_request
+        while True:
+            try:
+                message, codec = recv_frame(self.request)
+            except (ValueError, OSError) as e:
+                logger.warning(f"Closing socket connection: {e}")
+                return
+            if codec is None:
+                return
+
+            op = message.get('op', 'extract') if isinstance(message, dict) else None
+            if op is None:
+                reply = {'status': 400, 'body': {'error': 'Frame must hold a map/object'}, 'headers': {}}
+            elif op == 'ping':
+                reply = {'status': 200, 'body': {'status': 'OK'}, 'headers': {}}
+            elif op == 'extract':
+                body, status, headers = handle_request(message, message.get('timeoutMs'))
+                if message.get('compact', True):
+                    body = compact_result(body)
+                reply = {'status': status, 'body': body, 'headers': headers}
+            else:
+                reply = {'status': 400, 'body': {'error': f'Unknown op: {op}'}, 'headers': {}}
+
+            try:
+                send_frame(self.request, reply, codec)
+            except OSError:
+                return
+
+class ExtractionSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, handle_request):
+        """
+        Args:
+            socket_path: Filesystem path of the Unix socket
+            handle_request: Function (data, timeout_ms) -> (body, status, headers)
+        """
+        self.handle_request = handle_request
+        socket_dir = os.path.dirname(socket_path)
+        if socket_dir:
+            os.makedirs(socket_dir, mode=0o750, exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _ExtractionHandler)
+
+    def server_bind(self):
+        # The socket file is created by bind with the process umask, so
+        # tighten it for the call instead of chmod-ing afterwards
+        previous = os.umask(SOCKET_UMASK)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous)
+
+def start_socket_server(handle_request, socket_path=DEFAULT_SOCKET_PATH):
+    """Serve the socket transport from a background thread"""
+    server = ExtractionSocketServer(socket_path, handle_request)
+    threading.Thread(target=server.serve_forever, name="socket-transport", daemon=True).start()
+    logger.info(f"🔌 Socket transport listening on {socket_path} "
+                f"({'msgpack' if HAS_MSGPACK else 'json'} frames)")
+    return server
+
+class ExtractionClient:
+    """
+    Reference client holding one persistent connection
+
+    Args:
+        socket_path: Filesystem path of the Unix socket
+        codec: CODEC_MSGPACK or CODEC_JSON (default: msgpack if installed)
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, codec=None):
+        self.socket_path = socket_path
+        self.codec = codec or default_codec()
+        self.sock = None
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def _call(self, message):
+        # Reconnect once if the server dropped the idle connection
+        for attempt in range(2):
+            if self.sock is None:
+                self.connect()
+            try:
+                send_frame(self.sock, message, self.codec)
+                reply, _ = recv_frame(self.sock)
+                if reply is not None:
+                    return reply
+            except OSError:
+                if attempt:
+                    raise
+            self.close()
+        raise ConnectionError("Extraction service closed the connection")
+
+    def ping(self):
+        return self._call({'op': 'ping'})['status'] == 200
+
+    def extract(self, file_path, file_name=None, timeout_ms=None, compact=True):
+        """
+        Returns:
+            (status code, response body)
+        """
+        reply = self._call({
+            'op': 'extract',
+            'filePath': str(file_path),
+            'fileName': file_name or os.path.basename(str(file_path)),
+            'timeoutMs': timeout_ms,
+            'compact': compact
+        })
+        return reply['status'], reply['body']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _latency_summary(latencies):
+    latencies = sorted(latencies)
+    n = len(latencies)
+    return {
+        'requests': n,
+        'mean_ms': round(sum(latencies) / n * 1000, 3),
+        'p50_ms': round(latencies[n // 2] * 1000, 3),
+        'p95_ms': round(latencies[min(n - 1, int(n * 0.95))] * 1000, 3)
+    }
+
+def benchmark(file_path, n_requests=200, http_url="http://localhost:5001/api/extract",
+              socket_path=DEFAULT_SOCKET_PATH):
+    """
+    Compare round-trip latency of the HTTP API and the socket transport
+
+    HTTP requests open a new connection each time, like the Node caller;
+    the socket client reuses one connection.
+    """
+    import urllib.request
+
+    payload = json.dumps({'filePath': str(file_path), 'fileName': 'benchmark'}).encode("utf-8")
+    results = {}
+
+    http_latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        http_request = urllib.request.Request(
+            http_url, data=payload, headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(http_request) as response:
+            response.read()
+        http_latencies.append(time.perf_counter() - start)
+    results['http'] = _latency_summary(http_latencies)
+
+    for codec, name in [(CODEC_JSON, 'socket_json'), (CODEC_MSGPACK, 'socket_msgpack')]:
+        if codec == CODEC_MSGPACK and not HAS_MSGPACK:
+            continue
+        latencies = []
+        with ExtractionClient(socket_path, codec) as client:
+            client.ping()
+            for _ in range(n_requests):
+                start = time.perf_counter()
+                client.extract(file_path)
+                latencies.append(time.perf_counter() - start)
+        results[name] = _latency_summary(latencies)
+
+    print(f"\n{'Transport':<16} {'Mean(ms)':>10} {'p50(ms)':>10} {'p95(ms)':>10}")
+    print("-" * 50)
+    for name, summary in results.items():
+        print(f"{name:<16} {summary['mean_ms']:10.3f} {summary['p50_ms']:10.3f} {summary['p95_ms']:10.3f}")
+
+    return results
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python socket_transport.py <file> [n_requests]
+    # (ner_service.py must be running with EXTRACTION_SOCKET set)
+    if len(sys.argv) < 2:
+        print("Usage: python socket_transport.py <file> [n_requests]")
+        sys.exit(1)
+
+    benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 200)
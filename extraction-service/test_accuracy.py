@@ -4,29 +4,187 @@ Test Accuracy on Test Data
 Evaluates the custom NER model against test_data.py
 """
 
+import time
+import random
+import numpy
 import spacy
 from test_data import TEST_DATA
 from collections import defaultdict
+from pathlib import Path
+from accuracy_tracker import values_match
+from docbin_cache import predictions_path, save_predictions, load_docs
+from transcript_templates import extract_with_template, TemplateStats
 
-def calculate_accuracy(nlp, test_data):
+ENTITY_LABELS = ['STUDENT_NAME', 'CGPA', 'PROGRAM']
+
+DEFAULT_MATCH_RULES = ('exact', 'whitespace', 'substring')
+
+# Documents timed one at a time for latency percentiles (0 = all), so
+# large test sets don't pay for a second full serial pass
+LATENCY_SAMPLE_SIZE = 50
+
+def predict_entities(nlp, texts, batch_size=16, n_process=1):
+    """
+    Run the model over all texts with nlp.pipe (throughput)
+    
+    Returns:
+        (docs, token_counts, total_seconds)
+    """
+    start = time.perf_counter()
+    docs = list(nlp.pipe(texts, batch_size=batch_size, n_process=n_process))
+    total_seconds = time.perf_counter() - start
+    
+    return docs, [len(doc) for doc in docs], total_seconds
+
+def measure_latency(nlp, texts, sample_size=LATENCY_SAMPLE_SIZE, seed=0):
+    """
+    Time nlp(text) for a fixed random sample of documents on their own
+    (per-document latency)
+    
+    Timing items yielded by nlp.pipe instead would charge a whole batch to
+    its first document and ~0 ms to the rest.
+    
+    Args:
+        sample_size: Documents to time (0 or more than len(texts) = all)
+    
+    Returns:
+        List of seconds, one per sampled document
+    """
+    if 0 < sample_size < len(texts):
+        texts = random.Random(seed).sample(list(texts), sample_size)
+    
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        nlp(text)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def first_entities(doc):
+    """Map label -> text of its first predicted entity"""
+    predicted_entities = {}
+    for ent in doc.ents:
+        if ent.label_ not in predicted_entities:  # Take first occurrence
+            predicted_entities[ent.label_] = ent.text.strip()
+    return predicted_entities
+
+def expected_entities_for(text, annotations):
+    """Map label -> gold entity text"""
+    return {label: text[start:end].strip() for start, end, label in annotations['entities']}
+
+def error_analysis(test_data, docs, match_rules=DEFAULT_MATCH_RULES):
+    """
+    List every field where the prediction doesn't match the gold value
+    
+    Returns:
+        List of dicts with the example index, label, expected and predicted text
+    """
+    errors = []
+    for idx, ((text, annotations), doc) in enumerate(zip(test_data, docs)):
+        expected_entities = expected_entities_for(text, annotations)
+        predicted_entities = first_entities(doc)
+        
+        for label in ENTITY_LABELS:
+            expected = expected_entities.get(label)
+            predicted = predicted_entities.get(label)
+            
+            if expected and predicted and values_match(expected, predicted, match_rules):
+                continue
+            if not expected and not predicted:
+                continue
+            
+            errors.append({
+                'index': idx,
+                'label': label,
+                'expected': expected,
+                'predicted': predicted,
+                'error': 'missed' if not predicted else 'spurious' if not expected else 'mismatch'
+            })
+    return errors
+
+def summarize_performance(latencies, token_counts, total_seconds, batch_size=16, n_process=1):
+    """
+    Throughput of the nlp.pipe run and per-document latency percentiles
+    
+    Args:
+        latencies: Seconds per sampled document from measure_latency
+        token_counts: Tokens per document
+        total_seconds: Wall time of the nlp.pipe run
+    """
+    latencies_ms = numpy.array(latencies) * 1000 if latencies else numpy.zeros(1)
+    total_tokens = int(sum(token_counts))
+    
+    return {
+        'documents': len(token_counts),
+        'tokens': total_tokens,
+        'batch_size': batch_size,
+        'n_process': n_process,
+        'total_seconds': round(total_seconds, 4),
+        'docs_per_second': round(len(token_counts) / total_seconds, 2) if total_seconds > 0 else 0,
+        'tokens_per_second': round(total_tokens / total_seconds, 1) if total_seconds > 0 else 0,
+        'latency_sample': len(latencies),
+        'latency_ms': {
+            'mean': round(float(latencies_ms.mean()), 3),
+            'p50': round(float(numpy.percentile(latencies_ms, 50)), 3),
+            'p95': round(float(numpy.percentile(latencies_ms, 95)), 3),
+            'p99': round(float(numpy.percentile(latencies_ms, 99)), 3),
+            'max': round(float(latencies_ms.max()), 3)
+        }
+    }
+
+def _precision_recall_f1(correct, predicted, expected):
+    """Percentages, 0 when undefined"""
+    # Precision: Of all predicted, how many were correct?
+    precision = (correct / predicted * 100) if predicted > 0 else 0
+    
+    # Recall: Of all expected, how many did we find?
+    recall = (correct / expected * 100) if expected > 0 else 0
+    
+    # F1: Harmonic mean of precision and recall
+    f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0
+    return precision, recall, f1
+
+def calculate_accuracy(nlp, test_data, batch_size=16, n_process=1, prediction_cache=None,
+                       reuse_predictions=False, match_rules=DEFAULT_MATCH_RULES):
     """
     Calculate accuracy metrics on test data.
-    Returns precision, recall, F1 per entity type and overall.
+    Returns precision, recall, F1 per entity type and overall,
+    plus nlp.pipe throughput and per-document latency percentiles.
+    
+    Predicted docs are written to prediction_cache (a DocBin path). With
+    reuse_predictions, an existing cache is scored directly without
+    running the model (nlp may be None); performance is then omitted.
     """
     
     # Track metrics per entity type
     metrics = {
-        'STUDENT_NAME': {'correct': 0, 'predicted': 0, 'expected': 0},
-        'CGPA': {'correct': 0, 'predicted': 0, 'expected': 0},
-        'PROGRAM': {'correct': 0, 'predicted': 0, 'expected': 0}
+        label: {'correct': 0, 'predicted': 0, 'expected': 0}
+        for label in ENTITY_LABELS
     }
     
     total_correct = 0
     total_predicted = 0
     total_expected = 0
+    
+    # Get predictions for all documents in one streaming pass
+    performance = None
+    if reuse_predictions and prediction_cache and Path(prediction_cache).exists():
+        docs = load_docs(prediction_cache)
+        print(f"✓ Scoring cached predictions from {prediction_cache}")
+    else:
+        texts = [text for text, _ in test_data]
+        docs, token_counts, total_seconds = predict_entities(
+            nlp, texts, batch_size, n_process
+        )
+        latencies = measure_latency(nlp, texts)
+        performance = summarize_performance(latencies, token_counts, total_seconds, batch_size, n_process)
+        if prediction_cache:
+            save_predictions(docs, prediction_cache)
    
     # Process each test example
-    for idx, (text, annotations) in enumerate(test_data, 1):
+    for (text, annotations), doc in zip(test_data, docs):
+        predicted_entities = first_entities(doc)
+        
         # Get ground truth
         expected_entities = {}
         for start, end, label in annotations['entities']:
@@ -34,32 +192,18 @@ def calculate_accuracy(nlp, test_data):
             metrics[label]['expected'] += 1
             total_expected += 1
         
-        # Get predictions
-        doc = nlp(text)
-        predicted_entities = {}
-        for ent in doc.ents:
-            if ent.label_ not in predicted_entities:  # Take first occurrence
-                predicted_entities[ent.label_] = ent.text.strip()
-                metrics[ent.label_]['predicted'] += 1
+        for label in predicted_entities:
+            if label in metrics:
+                metrics[label]['predicted'] += 1
                 total_predicted += 1
         
         # Compare and count matches
-        for label in ['STUDENT_NAME', 'CGPA', 'PROGRAM']:
+        for label in ENTITY_LABELS:
             expected = expected_entities.get(label, None)
             predicted = predicted_entities.get(label, None)
             
-            # Check if match (exact or close enough)
-            is_match = False
-            if expected and predicted:
-                # Exact match
-                if expected == predicted:
-                    is_match = True
-                # Close match (allow minor whitespace differences)
-                elif expected.replace(' ', '') == predicted.replace(' ', ''):
-                    is_match = True
-                # Contains match (predicted contains expected or vice versa)
-                elif expected in predicted or predicted in expected:
-                    is_match = True
+            # Check if match (exact, whitespace-insensitive or substring by default)
+            is_match = bool(expected and predicted and values_match(expected, predicted, match_rules))
             
             if is_match:
                 metrics[label]['correct'] += 1
@@ -77,19 +221,12 @@ def calculate_accuracy(nlp, test_data):
     }
     
     # Calculate per-entity metrics
-    for label in ['STUDENT_NAME', 'CGPA', 'PROGRAM']:
+    for label in ENTITY_LABELS:
         correct = metrics[label]['correct']
         predicted = metrics[label]['predicted']
         expected = metrics[label]['expected']
         
-        # Precision: Of all predicted, how many were correct?
-        precision = (correct / predicted * 100) if predicted > 0 else 0
-        
-        # Recall: Of all expected, how many did we find?
-        recall = (correct / expected * 100) if expected > 0 else 0
-        
-        # F1: Harmonic mean of precision and recall
-        f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0
+        precision, recall, f1 = _precision_recall_f1(correct, predicted, expected)
         
         print(f"{display_names[label]}:")
         print(f"  Correct:   {correct}/{expected}")
@@ -99,9 +236,9 @@ def calculate_accuracy(nlp, test_data):
         print()
     
     # Calculate overall metrics
-    overall_precision = (total_correct / total_predicted * 100) if total_predicted > 0 else 0
-    overall_recall = (total_correct / total_expected * 100) if total_expected > 0 else 0
-    overall_f1 = (2 * overall_precision * overall_recall / (overall_precision + overall_recall)) if (overall_precision + overall_recall) > 0 else 0
+    overall_precision, overall_recall, overall_f1 = _precision_recall_f1(
+        total_correct, total_predicted, total_expected
+    )
     
     print("-"*80)
     print("OVERALL:")
@@ -111,6 +248,17 @@ def calculate_accuracy(nlp, test_data):
     print(f"  F1 Score:  {overall_f1:.1f}%")
     print()
     
+    if performance:
+        latency = performance['latency_ms']
+        print("-"*80)
+        print(f"PERFORMANCE (batch_size={batch_size}, n_process={n_process}):")
+        print(f"  Throughput: {performance['docs_per_second']:.1f} docs/sec, "
+              f"{performance['tokens_per_second']:.0f} tokens/sec")
+        print(f"  Latency:    p50 {latency['p50']:.1f} ms | p95 {latency['p95']:.1f} ms | "
+              f"p99 {latency['p99']:.1f} ms (per document, nlp(text), "
+              f"{performance['latency_sample']} of {performance['documents']} docs sampled)")
+        print()
+    
     # Interpretation
     print("="*80)
     print("INTERPRETATION")
@@ -131,6 +279,19 @@ def calculate_accuracy(nlp, test_data):
     print()
     print("="*80)
     
+    per_entity = {}
+    for label in ENTITY_LABELS:
+        precision, recall, f1 = _precision_recall_f1(
+            metrics[label]['correct'], metrics[label]['predicted'], metrics[label]['expected']
+        )
+        per_entity[label] = {
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'correct': metrics[label]['correct'],
+            'total': metrics[label]['expected']
+        }
+    
     return {
         'overall': {
             'precision': overall_precision,
@@ -139,36 +300,170 @@ def calculate_accuracy(nlp, test_data):
             'correct': total_correct,
             'total': total_expected
         },
-        'per_entity': {
-            label: {
-                'precision': (metrics[label]['correct'] / metrics[label]['predicted'] * 100) if metrics[label]['predicted'] > 0 else 0,
-                'recall': (metrics[label]['correct'] / metrics[label]['expected'] * 100) if metrics[label]['expected'] > 0 else 0,
-                'f1': (2 * (metrics[label]['correct'] / metrics[label]['predicted'] * 100) * (metrics[label]['correct'] / metrics[label]['expected'] * 100) / ((metrics[label]['correct'] / metrics[label]['predicted'] * 100) + (metrics[label]['correct'] / metrics[label]['expected'] * 100))) if metrics[label]['predicted'] > 0 and metrics[label]['expected'] > 0 else 0,
-                'correct': metrics[label]['correct'],
-                'total': metrics[label]['expected']
-            }
-            for label in ['STUDENT_NAME', 'CGPA', 'PROGRAM']
+        'per_entity': per_entity,
+        'performance': performance,
+        'match_rules': list(match_rules),
+        'errors': error_analysis(test_data, docs, match_rules)
+    }
+
+def _as_float(value):
+    """Float value of a string, None if it isn't a number"""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+TEMPLATE_FIELDS = {'name': 'STUDENT_NAME', 'cgpa': 'CGPA', 'program': 'PROGRAM'}
+
+def evaluate_templates(test_data, match_rules=DEFAULT_MATCH_RULES):
+    """
+    Score the template fast path on its own
+    
+    Reports, per template, how many documents it matched, how many passed
+    validation (hits) and how many hit fields agree with the gold labels.
+    Documents without a hit would fall back to the NER model.
+    """
+    stats = TemplateStats()
+    correct = defaultdict(lambda: defaultdict(int))
+    
+    start = time.perf_counter()
+    for text, annotations in test_data:
+        template_name, fields = extract_with_template(text, stats)
+        if not fields:
+            continue
+        
+        expected_entities = expected_entities_for(text, annotations)
+        for field, label in TEMPLATE_FIELDS.items():
+            expected = expected_entities.get(label)
+            predicted = fields.get(field)
+            if label == 'CGPA' and expected and predicted:
+                # Templates normalise CGPA to two decimals
+                is_match = _as_float(expected) == _as_float(predicted)
+            else:
+                is_match = bool(expected and predicted and values_match(expected, predicted, match_rules))
+            if is_match:
+                correct[template_name][field] += 1
+    total_seconds = time.perf_counter() - start
+    
+    summary = stats.snapshot()
+    summary['total_seconds'] = round(total_seconds, 6)
+    for template_name, counts in summary['templates'].items():
+        hits = counts['hits']
+        counts['field_accuracy'] = {
+            field: round(correct[template_name][field] / hits * 100, 1) if hits else 0.0
+            for field in TEMPLATE_FIELDS
         }
+    
+    print("-"*80)
+    print(f"TEMPLATE FAST PATH ({summary['fast_path_rate'] * 100:.1f}% of documents, "
+          f"{total_seconds * 1000:.2f} ms total):")
+    for template_name, counts in summary['templates'].items():
+        accuracy = ", ".join(f"{field} {value:.1f}%" for field, value in counts['field_accuracy'].items())
+        print(f"  {template_name}: {counts['hits']}/{counts['matched']} hits, "
+              f"{counts['mean_us']:.0f} µs/doc | {accuracy}")
+    print(f"  No template: {summary['unmatched']}")
+    print()
+    
+    return summary
+
+def evaluate_cascade(fast_nlp, full_nlp, test_data, min_tier='high', field_threshold=0.80,
+                     match_rules=DEFAULT_MATCH_RULES):
+    """
+    Score the fast -> full model cascade with the service's confidence gate
+    
+    Returns:
+        dict with per-field accuracy, escalation rate and latency
+    """
+    from ner_service import ner_fields
+    from model_cascade import run_cascade, CascadeStats
+    
+    stats = CascadeStats()
+    correct = defaultdict(int)
+    
+    for text, annotations in test_data:
+        fields, _ = run_cascade(
+            text,
+            lambda t: ner_fields(fast_nlp(t)),
+            lambda t: ner_fields(full_nlp(t)),
+            min_tier, field_threshold, stats
+        )
+        
+        expected_entities = expected_entities_for(text, annotations)
+        for field, label in TEMPLATE_FIELDS.items():
+            expected = expected_entities.get(label)
+            predicted = fields[field][0]
+            if label == 'CGPA' and expected and predicted:
+                is_match = _as_float(expected) == _as_float(predicted)
+            else:
+                is_match = bool(expected and predicted and values_match(expected, predicted, match_rules))
+            if is_match:
+                correct[field] += 1
+    
+    summary = stats.snapshot()
+    summary['min_tier'] = min_tier
+    summary['field_threshold'] = field_threshold
+    summary['field_accuracy'] = {
+        field: round(correct[field] / len(test_data) * 100, 1) if test_data else 0.0
+        for field in TEMPLATE_FIELDS
     }
+    
+    latency = summary['latency_ms']
+    accuracy = ", ".join(f"{field} {value:.1f}%" for field, value in summary['field_accuracy'].items())
+    print("-"*80)
+    print(f"CASCADE (escalate below '{min_tier}' tier or {field_threshold} field confidence):")
+    print(f"  Escalated: {summary['escalated']}/{summary['documents']} "
+          f"({summary['escalation_rate'] * 100:.1f}%) | reasons: {summary['reasons']}")
+    print(f"  Latency:   mean {latency['mean']:.1f} ms | fast stage {latency['fast_stage']:.1f} ms | "
+          f"full stage {latency['full_stage']:.1f} ms (escalated docs)")
+    print(f"  Accuracy:  {accuracy}")
+    print()
+    
+    return summary
 
+MODEL_PATH = "./custom_transcript_ner_model"
 
-def main():
+def main(batch_size=16, n_process=1, use_cache=False, match_rules=DEFAULT_MATCH_RULES,
+         fast_model_path=None, min_tier='high', field_threshold=0.80):
     """Main function"""
     print()
-    print("Loading model...")
     
-    try:
-        nlp = spacy.load("./custom_transcript_ner_model")
-        print(f"✓ Loaded: custom_transcript_ner_model")
-    except:
+    if not Path(MODEL_PATH).exists():
         print("❌ Could not load custom_transcript_ner_model")
         print("   Make sure the model exists in the current directory.")
         return
     
+    # Predictions are cached per model hash and dataset hash
+    cache_file = predictions_path(MODEL_PATH, TEST_DATA)
+    
+    nlp = None
+    if not (use_cache and cache_file.exists()):
+        print("Loading model...")
+        try:
+            nlp = spacy.load(MODEL_PATH)
+            print(f"✓ Loaded: custom_transcript_ner_model")
+        except:
+            print("❌ Could not load custom_transcript_ner_model")
+            print("   Make sure the model exists in the current directory.")
+            return
+    
     print()
     
     # Run accuracy test
-    results = calculate_accuracy(nlp, TEST_DATA)
+    results = calculate_accuracy(
+        nlp, TEST_DATA, batch_size, n_process,
+        prediction_cache=cache_file,
+        reuse_predictions=use_cache,
+        match_rules=match_rules
+    )
+    
+    results['templates'] = evaluate_templates(TEST_DATA, match_rules)
+    
+    if fast_model_path:
+        if nlp is None:
+            nlp = spacy.load(MODEL_PATH)
+        results['cascade'] = evaluate_cascade(
+            spacy.load(fast_model_path), nlp, TEST_DATA, min_tier, field_threshold, match_rules
+        )
     
     # Save results to JSON
     import json
@@ -176,8 +471,34 @@ def main():
         json.dump(results, f, indent=2)
     
     print("✓ Results saved to test_accuracy_results.json")
+    print(f"  {len(results['errors'])} field errors listed under 'errors'")
     print()
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+    
+    # Usage: python test_accuracy.py [batch_size] [n_process] [--cached] [--match=exact,whitespace]
+    #        [--cascade=./compact_transcript_ner_model] [--tier=high] [--threshold=0.80]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    
+    batch_size = int(args[0]) if len(args) > 0 else 16
+    n_process = int(args[1]) if len(args) > 1 else 1
+    use_cache = "--cached" in flags
+    
+    match_rules = DEFAULT_MATCH_RULES
+    fast_model_path = None
+    min_tier = 'high'
+    field_threshold = 0.80
+    for flag in flags:
+        if flag.startswith("--match="):
+            match_rules = tuple(flag.split("=", 1)[1].split(","))
+        elif flag.startswith("--cascade="):
+            fast_model_path = flag.split("=", 1)[1]
+        elif flag.startswith("--tier="):
+            min_tier = flag.split("=", 1)[1]
+        elif flag.startswith("--threshold="):
+            field_threshold = float(flag.split("=", 1)[1])
+    
+    main(batch_size, n_process, use_cache, match_rules, fast_model_path, min_tier, field_threshold)
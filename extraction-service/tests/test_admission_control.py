@@ -0,0 +1,130 @@
+"""Tests for admission control, deadlines and load shedding"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from admission_control import AdmissionController, AsyncAdmissionController, Deadline, DeadlineExceeded, Overloaded
+
+def hold_slot(controller):
+    """Take a slot on a background thread; returns (admitted, release) events"""
+    admitted, release = threading.Event(), threading.Event()
+
+    def run():
+        with controller.admit():
+            admitted.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert admitted.wait(5)
+    return thread, release
+
+def test_deadline():
+    deadline = Deadline(10)
+    deadline.check("pdf")
+    assert 0 < deadline.remaining() <= 10
+
+    expired = Deadline(0)
+    with pytest.raises(DeadlineExceeded) as error:
+        expired.check("ner")
+    assert error.value.stage == "ner"
+
+def test_full_queue_is_shed_with_429():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+    thread, release = hold_slot(controller)
+
+    with pytest.raises(Overloaded) as error:
+        with controller.admit():
+            pass
+    assert error.value.status == 429
+    assert error.value.reason == 'queue_full'
+    assert error.value.retry_after >= 1
+
+    release.set()
+    thread.join()
+    assert controller.snapshot()['shed'] == {'queue_full': 1}
+
+def test_queue_timeout_is_shed_with_503():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    thread, release = hold_slot(controller)
+
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as error:
+        with controller.admit():
+            pass
+    assert error.value.status == 503
+    assert error.value.reason == 'queue_timeout'
+    assert time.monotonic() - start < 2
+
+    release.set()
+    thread.join()
+    snapshot = controller.snapshot()
+    assert snapshot['queue_depth'] == 0
+    assert snapshot['peak_queue_depth'] == 1
+
+def test_waiting_request_gets_the_freed_slot():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+    thread, release = hold_slot(controller)
+
+    threading.Timer(0.05, release.set).start()
+    with controller.admit():
+        assert controller.snapshot()['active'] == 1
+
+    thread.join()
+    snapshot = controller.snapshot()
+    assert snapshot['admitted'] == 2
+    assert snapshot['completed'] == 2
+    assert snapshot['active'] == 0
+
+def test_slot_is_released_on_error():
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+
+    with pytest.raises(RuntimeError):
+        with controller.admit():
+            raise RuntimeError("boom")
+
+    with controller.admit():
+        pass
+    assert controller.snapshot()['completed'] == 2
+
+def test_async_controller_sheds_and_admits():
+    async def scenario():
+        controller = AsyncAdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def holder():
+            async with controller.admit():
+                await release.wait()
+
+        task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as timed_out:
+            async with controller.admit():
+                pass
+        assert timed_out.value.status == 503
+
+        controller.queue_timeout = 5
+        waiter = asyncio.create_task(controller.admit().__aenter__())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            async with controller.admit():
+                pass
+        assert full.value.status == 429
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        release.set()
+        await task
+        async with controller.admit():
+            pass
+        return controller.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot['shed'] == {'queue_timeout': 1, 'queue_full': 1}
+    assert snapshot['active'] == 0
+    assert snapshot['queue_depth'] == 0
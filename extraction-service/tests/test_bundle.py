@@ -0,0 +1,65 @@
+"""Tests for splitting transcript bundles and extracting one result per student"""
+
+import pytest
+
+import ner_service
+from admission_control import Deadline, DeadlineExceeded
+from test_data import TEST_DATA
+from transcript_templates import split_bundle
+
+HEADER = "ACADEMIC MINI TRANSCRIPT"
+
+def test_split_bundle_drops_cover_page():
+    text = f"FACULTY OF COMPUTER SCIENCE\nCOVER\n{HEADER}\nNAME\nALI\n{HEADER}  \nNAME\nABU\n"
+
+    segments = split_bundle(text)
+
+    assert segments == [f"{HEADER}\nNAME\nALI\n", f"{HEADER}  \nNAME\nABU\n"]
+
+def test_split_bundle_without_header_is_one_segment():
+    assert split_bundle("SOME OTHER DOCUMENT\nNAME\nALI") == ["SOME OTHER DOCUMENT\nNAME\nALI"]
+
+def test_split_bundle_needs_header_on_its_own_line():
+    text = f"{HEADER}\nNAME\nALI\nSEE {HEADER} ABOVE\n"
+
+    assert split_bundle(text) == [text]
+
+def test_split_bundle_round_trips_real_transcripts():
+    transcripts = [text for text, _ in TEST_DATA]
+
+    assert split_bundle("COVER PAGE\n" + "".join(transcripts)) == transcripts
+
+def stub_result(fields, method, deadline=None):
+    return {**{field: value for field, (value, _) in fields.items()}, 'method': method}
+
+def test_extract_bundle_batches_segments_templates_cannot_read(monkeypatch):
+    batches = []
+
+    def batch(texts, deadline=None):
+        batches.append(texts)
+        return [({'name': (text.split("\n")[1], 0.9)}, 'ner', {}) for text in texts]
+
+    monkeypatch.setattr(ner_service, "ner_extraction_batch", batch)
+    monkeypatch.setattr(ner_service, "build_extraction_result", stub_result)
+    monkeypatch.setattr(ner_service, "BUNDLE_BATCH_SIZE", 2)
+    monkeypatch.setattr(ner_service, "TEMPLATE_FAST_PATH", True)
+
+    template_text = TEST_DATA[0][0]
+    other = [f"{HEADER}\nSTUDENT {i}\nUNKNOWN LAYOUT\n" for i in range(3)]
+    bundle = "COVER\n" + other[0] + template_text + other[1] + other[2]
+
+    results = ner_service.extract_bundle(bundle, Deadline(30))
+
+    assert [len(texts) for texts in batches] == [2, 1]
+    assert [result['method'] for result in results] == ['ner', 'template', 'ner', 'ner']
+    assert [result['name'] for result in results[2:]] == ["STUDENT 1", "STUDENT 2"]
+    assert results[1]['template']
+    assert [result['segment'] for result in results] == [0, 1, 2, 3]
+    assert results[1]['segmentLength'] == len(template_text)
+
+def test_extract_bundle_checks_deadline_between_batches(monkeypatch):
+    monkeypatch.setattr(ner_service, "ner_extraction_batch", lambda texts, deadline=None: pytest.fail("ran NER"))
+    monkeypatch.setattr(ner_service, "TEMPLATE_FAST_PATH", False)
+
+    with pytest.raises(DeadlineExceeded):
+        ner_service.extract_bundle(f"{HEADER}\nA\n{HEADER}\nB\n", Deadline(0))
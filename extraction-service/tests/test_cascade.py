@@ -0,0 +1,59 @@
+"""Tests for escalation and field merging in model_cascade"""
+
+from model_cascade import escalation_reasons, merge_fields, run_cascade, CascadeStats, quality_tier
+
+CONFIDENT = {'name': ("ALI BIN ABU", 0.95), 'cgpa': ("3.27", 0.97), 'program': ("DIPLOMA SAINS", 0.93)}
+
+def test_quality_tier_boundaries():
+    assert quality_tier(0.85) == 'high'
+    assert quality_tier(0.84) == 'medium'
+    assert quality_tier(0.70) == 'medium'
+    assert quality_tier(0.69) == 'low'
+
+def test_confident_result_is_not_escalated():
+    assert escalation_reasons(CONFIDENT) == []
+
+def test_missing_and_low_fields_are_escalated():
+    fields = {'name': ("ALI BIN ABU", 0.95), 'cgpa': ("3.27", 0.60)}
+
+    reasons = escalation_reasons(fields)
+
+    assert "cgpa:low" in reasons
+    assert "program:missing" in reasons
+    assert "tier:low" in reasons
+
+def test_min_tier_is_configurable():
+    fields = {field: (value, 0.81) for field, (value, _) in CONFIDENT.items()}
+
+    assert escalation_reasons(fields, min_tier='high') == ["tier:medium"]
+    assert escalation_reasons(fields, min_tier='medium') == []
+
+def test_merge_keeps_found_and_more_confident_values():
+    fast = {'name': ("ALI", 0.90), 'cgpa': (None, 0.0), 'program': ("DIPLOMA", 0.50)}
+    full = {'name': ("ALI BIN ABU", 0.80), 'cgpa': ("3.27", 0.95), 'program': (None, 0.0)}
+
+    assert merge_fields(fast, full) == {
+        'name': ("ALI", 0.90), 'cgpa': ("3.27", 0.95), 'program': ("DIPLOMA", 0.50)
+    }
+
+def test_run_cascade_only_calls_full_model_when_needed():
+    calls = []
+
+    def full_extract(text):
+        calls.append(text)
+        return CONFIDENT
+
+    stats = CascadeStats()
+    fields, reasons = run_cascade("doc one", lambda text: CONFIDENT, full_extract, stats=stats)
+    assert reasons == [] and calls == [] and fields == CONFIDENT
+
+    fields, reasons = run_cascade("doc two", lambda text: {}, full_extract, stats=stats)
+    assert calls == ["doc two"]
+    assert fields == CONFIDENT
+    assert "name:missing" in reasons
+
+    snapshot = stats.snapshot()
+    assert snapshot['documents'] == 2
+    assert snapshot['escalated'] == 1
+    assert snapshot['escalation_rate'] == 0.5
+    assert snapshot['reasons']['name:missing'] == 1
@@ -0,0 +1,97 @@
+"""Tests for the streaming Label Studio reader and converter in dataConversion"""
+
+import json
+
+import pytest
+
+from dataConversion import iter_json_array, convert_labelstudio_streaming, is_test_example
+from docbin_cache import load_docbin_shards
+
+ITEMS = [
+    {"id": 1, "data": {"text": "NAME ] [ , \"quoted\" } {"}, "annotations": []},
+    {"id": 2, "data": {"text": "Ünïcödé — text"}, "scores": [1.5, -2e3, None, True]},
+    12345678,
+    "a string, with ] brackets",
+    [[], {}],
+]
+
+def write_json(path, value, **kwargs):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, **kwargs)
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_iter_json_array_matches_json_load(tmp_path, chunk_size):
+    path = tmp_path / "export.json"
+    write_json(path, ITEMS, indent=2, ensure_ascii=False)
+
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == ITEMS
+
+def test_iter_json_array_numbers_across_chunks(tmp_path):
+    path = tmp_path / "numbers.json"
+    path.write_text("[1234, 5678,9]", encoding='utf-8')
+
+    assert list(iter_json_array(path, chunk_size=3)) == [1234, 5678, 9]
+
+def test_iter_json_array_empty_array(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("  [ \n ]  ", encoding='utf-8')
+
+    assert list(iter_json_array(path, chunk_size=2)) == []
+
+def test_iter_json_array_rejects_non_array(tmp_path):
+    path = tmp_path / "object.json"
+    write_json(path, {"tasks": []})
+
+    with pytest.raises(ValueError):
+        list(iter_json_array(path))
+
+def test_iter_json_array_truncated_element(tmp_path):
+    path = tmp_path / "truncated.json"
+    path.write_text('[{"id": 1}, {"id": 2, "data": {"te', encoding='utf-8')
+
+    items = iter_json_array(path, chunk_size=4)
+    assert next(items) == {"id": 1}
+    with pytest.raises(json.JSONDecodeError):
+        next(items)
+
+def labelstudio_task(text, start, end, label="STUDENT_NAME"):
+    return {
+        "data": {"text": text},
+        "annotations": [{"result": [
+            {"type": "labels", "value": {"start": start, "end": end, "labels": [label]}}
+        ]}]
+    }
+
+def test_convert_labelstudio_streaming(tmp_path):
+    texts = [f"NAME STUDENT NUMBER {i} CGPA 3.{i:02d}" for i in range(20)]
+    tasks = [labelstudio_task(text, 5, 12) for text in texts]
+    tasks.append({"data": {"text": "no annotations"}, "annotations": []})
+    export = tmp_path / "export.json"
+    write_json(export, tasks)
+    corpus = tmp_path / "corpus"
+
+    stats = convert_labelstudio_streaming(export, corpus, test_size=0.2, shard_size=3)
+
+    assert stats["converted"] == 20
+    assert stats["skipped"] == 1
+    expected_test = sum(is_test_example(text, 0.2) for text in texts)
+    assert stats["test"] == expected_test
+    assert stats["train"] == 20 - expected_test
+
+    train_docs = load_docbin_shards(corpus, "train")
+    test_docs = load_docbin_shards(corpus, "test")
+    assert len(train_docs) == stats["train"]
+    assert len(test_docs) == stats["test"]
+    assert all([ent.text for ent in doc.ents] == ["STUDENT"] for doc in train_docs + test_docs)
+
+def test_convert_labelstudio_streaming_split_is_stable(tmp_path):
+    tasks = [labelstudio_task(f"TRANSCRIPT {i}", 0, 10) for i in range(30)]
+    export = tmp_path / "export.json"
+    write_json(export, tasks)
+
+    first = convert_labelstudio_streaming(export, tmp_path / "first")
+    second = convert_labelstudio_streaming(export, tmp_path / "second")
+
+    assert (first["train"], first["test"]) == (second["train"], second["test"])
+    assert [doc.text for doc in load_docbin_shards(tmp_path / "first", "test")] == \
+        [doc.text for doc in load_docbin_shards(tmp_path / "second", "test")]
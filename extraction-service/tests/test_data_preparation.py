@@ -0,0 +1,67 @@
+"""Tests for the streaming JSONL helpers in dataPreparation"""
+
+import json
+
+from dataPreparation import _read_jsonl_index, _drop_jsonl_records, jsonl_to_json_array
+
+def write_records(path, records, tail=""):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write(tail)
+
+def record(record_id, filename):
+    return {"id": record_id, "data": {"text": f"text of {filename}"}, "meta": {"filename": filename, "size": 1}}
+
+def test_read_jsonl_index_missing_file(tmp_path):
+    assert _read_jsonl_index(tmp_path / "missing.jsonl") == ({}, 0)
+
+def test_read_jsonl_index_reads_metadata(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    write_records(path, [record(1, "a.pdf"), record(7, "b.pdf")])
+
+    index, max_id = _read_jsonl_index(path)
+
+    assert set(index) == {"a.pdf", "b.pdf"}
+    assert index["b.pdf"]["size"] == 1
+    assert max_id == 7
+
+def test_read_jsonl_index_cuts_truncated_last_line(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    write_records(path, [record(1, "a.pdf")], tail='{"id": 2, "data": {"te')
+
+    index, max_id = _read_jsonl_index(path)
+
+    assert list(index) == ["a.pdf"]
+    assert max_id == 1
+    assert path.read_text(encoding='utf-8') == json.dumps(record(1, "a.pdf")) + "\n"
+
+def test_drop_jsonl_records(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    write_records(path, [record(1, "a.pdf"), record(2, "b.pdf"), record(3, "c.pdf")])
+
+    _drop_jsonl_records(path, {"b.pdf"})
+
+    index, _ = _read_jsonl_index(path)
+    assert list(index) == ["a.pdf", "c.pdf"]
+
+def test_jsonl_to_json_array(tmp_path):
+    records = [record(1, "a.pdf"), record(2, "b.pdf")]
+    jsonl_file = tmp_path / "tasks.jsonl"
+    json_file = tmp_path / "tasks.json"
+    write_records(jsonl_file, records, tail="\n")
+
+    jsonl_to_json_array(jsonl_file, json_file)
+
+    with open(json_file, encoding='utf-8') as f:
+        assert json.load(f) == records
+
+def test_jsonl_to_json_array_empty(tmp_path):
+    jsonl_file = tmp_path / "tasks.jsonl"
+    json_file = tmp_path / "tasks.json"
+    jsonl_file.write_text("", encoding='utf-8')
+
+    jsonl_to_json_array(jsonl_file, json_file)
+
+    with open(json_file, encoding='utf-8') as f:
+        assert json.load(f) == []
@@ -0,0 +1,90 @@
+"""Tests for MinHash near-duplicate detection and the group split in dataConversion"""
+
+import json
+import random
+
+import numpy
+
+from dataConversion import (
+    MinHashLSH, find_near_duplicates, deduplicate, group_split_train_test, convert_labelstudio_streaming
+)
+
+def random_words(rng, count):
+    return [f"w{rng.randrange(10 ** 6)}" for _ in range(count)]
+
+def transcript(name, body, student_id, cgpa):
+    return f"ACADEMIC MINI TRANSCRIPT\nNAME\n{name}\nSTUDENT ID\n{student_id}\n{body}\nFINAL CGPA\n{cgpa}"
+
+def annotated(text):
+    return (text, {"entities": [(0, 8, "X")]})
+
+def test_digit_only_differences_are_near_duplicates():
+    rng = random.Random(1)
+    body = " ".join(random_words(rng, 200))
+    other = " ".join(random_words(rng, 200))
+    data = [
+        annotated(transcript("ALI BIN ABU", body, "2021486234", "3.27")),
+        annotated(transcript("SITI BINTI OMAR", other, "2020111111", "3.50")),
+        annotated(transcript("ALI BIN ABU", body, "2019000001", "2.91")),
+    ]
+
+    clusters = find_near_duplicates(data, threshold=0.85)
+
+    assert sorted(map(sorted, clusters)) == [[0, 2], [1]]
+
+def test_lsh_keeps_earliest_root():
+    lsh = MinHashLSH(threshold=0.85)
+    text = " ".join(random_words(random.Random(2), 100))
+    signature = lsh.signature(text)
+
+    assert lsh.insert("first", signature, lsh.query(signature)) == "first"
+    assert lsh.insert("second", signature, lsh.query(signature)) == "first"
+    assert lsh.query(signature) == {"first"}
+
+def test_deduplicate_and_group_split_keep_clusters_whole():
+    data = [annotated(f"doc {i}") for i in range(20)]
+    clusters = [[0, 1, 2], [3, 4], [5]] + [[i] for i in range(6, 20)]
+
+    kept, kept_clusters = deduplicate(data, clusters, max_per_cluster=2)
+    assert len(kept) == 20 - 1
+    assert kept_clusters[0] == [0, 1]
+
+    train, test = group_split_train_test(kept, kept_clusters, test_size=0.3, random_seed=3)
+    assert len(train) + len(test) == len(kept)
+    train_texts = {text for text, _ in train}
+    test_texts = {text for text, _ in test}
+    for cluster in kept_clusters:
+        sides = {kept[idx][0] in test_texts for idx in cluster}
+        assert len(sides) == 1
+    assert not train_texts & test_texts
+
+def test_streaming_dedup_merges_cluster_counts(tmp_path):
+    # A and B are not similar to each other, C is similar to both, so C
+    # merges two clusters that each already kept one task
+    rng = random.Random(5)
+    shared, only_a, only_b = random_words(rng, 20), random_words(rng, 150), random_words(rng, 150)
+    a = " ".join(shared + only_a)
+    b = " ".join(shared + only_b)
+    c = " ".join(shared + only_a[:75] + only_b[:75])
+
+    lsh = MinHashLSH(threshold=0.4)
+    sig_a, sig_b, sig_c = (lsh.signature(text) for text in (a, b, c))
+    assert numpy.mean(sig_a == sig_b) < 0.4
+    assert numpy.mean(sig_a == sig_c) >= 0.4 and numpy.mean(sig_b == sig_c) >= 0.4
+
+    tasks = [
+        {"data": {"text": text}, "annotations": [{"result": [
+            {"type": "labels", "value": {"start": 0, "end": 3, "labels": ["X"]}}
+        ]}]}
+        for text in (a, b, c, a + " again")
+    ]
+    export = tmp_path / "export.json"
+    with open(export, 'w', encoding='utf-8') as f:
+        json.dump(tasks, f)
+
+    stats = convert_labelstudio_streaming(
+        export, tmp_path / "corpus", test_size=0, dedup_threshold=0.4, max_per_cluster=2
+    )
+
+    assert stats["converted"] == 2
+    assert stats["duplicates_dropped"] == 2
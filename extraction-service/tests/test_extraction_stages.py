@@ -0,0 +1,152 @@
+"""Tests that the Flask, SSE and ASGI transports share one extraction pipeline"""
+
+import asyncio
+
+import pytest
+
+import ner_service
+import asgi_service
+from pdf_sandbox import PdfBudgetExceeded
+
+FIELDS = {'name': ("ALI BIN ABU", 0.9), 'cgpa': ("3.27", 0.95), 'program': ("DIPLOMA SAINS KOMPUTER", 0.9)}
+
+def build_result(fields, method, deadline=None):
+    result = {field: value for field, (value, _) in fields.items()}
+    result.update({
+        'program_malay': result['program'],
+        'program_english': 'DIPLOMA IN COMPUTER SCIENCE',
+        'field_of_study': 'Computer Science',
+        'confidence': {**{field: confidence for field, (_, confidence) in fields.items()}, 'overall': 0.92},
+        'method': method,
+        'quality_tier': 'high'
+    })
+    return result
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Stub the model stages and mark the service ready"""
+    monkeypatch.setattr(ner_service, "traced_text_extraction", lambda path, budget=None: ("TRANSCRIPT TEXT", 2))
+    monkeypatch.setattr(ner_service, "transcript_fields", lambda text, deadline=None: (FIELDS, 'ner', {}))
+    monkeypatch.setattr(ner_service, "build_extraction_result", build_result)
+    ner_service.service_ready.set()
+    yield
+    ner_service.service_ready.clear()
+
+def flask_request(data, timeout_ms=None):
+    return ner_service.run_extract_request(data, timeout_ms)
+
+def asgi_request(data, timeout_ms=None):
+    return asyncio.run(asgi_service.run_extract_request(data, timeout_ms))
+
+def sse_request(data, timeout_ms=None):
+    events = list(ner_service._extraction_events(data, timeout_ms))
+    event, body = events[-1]
+    if event == 'complete':
+        return body, 200, {}
+    status = body.pop('status')
+    headers = {'Retry-After': str(body.pop('retry_after'))} if 'retry_after' in body else {}
+    return body, status, headers
+
+TRANSPORTS = [flask_request, asgi_request, sse_request]
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_success(stages, run):
+    body, status, _ = run({'filePath': '/tmp/a.pdf', 'fileName': 'a.pdf'})
+
+    assert status == 200
+    assert body['name'] == "ALI BIN ABU"
+    assert body['fileName'] == 'a.pdf'
+    assert body['textLength'] == len("TRANSCRIPT TEXT")
+    assert body['pages'] == 2
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_missing_file_path(stages, run):
+    body, status, _ = run({'fileName': 'a.pdf'})
+
+    assert status == 400
+    assert body['error'] == 'Missing file path'
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_warming_up(stages, run):
+    ner_service.service_ready.clear()
+
+    body, status, headers = run({'filePath': '/tmp/a.pdf'})
+
+    assert status == 503
+    assert headers['Retry-After'] == '5'
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_no_text(stages, monkeypatch, run):
+    monkeypatch.setattr(ner_service, "traced_text_extraction", lambda path, budget=None: (None, 0))
+
+    body, status, _ = run({'filePath': '/tmp/a.pdf'})
+
+    assert status == 400
+    assert body['error'] == 'Could not extract text'
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_pdf_budget(stages, monkeypatch, run):
+    def too_long(path, budget=None):
+        raise PdfBudgetExceeded('pages', "PDF has 60 pages, limit is 50", 50)
+    monkeypatch.setattr(ner_service, "traced_text_extraction", too_long)
+
+    body, status, _ = run({'filePath': '/tmp/a.pdf'})
+
+    assert status == 422
+    assert body['pdf_error']['kind'] == 'pages'
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_deadline(stages, run):
+    # A 500 ms client timeout leaves no budget after the one second margin
+    body, status, headers = run({'filePath': '/tmp/a.pdf'}, 500)
+
+    assert status == 503
+    assert body['error'] == 'Request deadline exceeded'
+    assert int(headers['Retry-After']) >= 1
+
+@pytest.mark.parametrize("run", TRANSPORTS)
+def test_bundle_uses_bundle_budget(stages, monkeypatch, run):
+    budgets = []
+
+    def extract(path, budget=None):
+        budgets.append(budget)
+        return "TEXT", 3
+    monkeypatch.setattr(ner_service, "traced_text_extraction", extract)
+    monkeypatch.setattr(ner_service, "extract_bundle", lambda text, deadline=None: [{'name': 'A'}, {'name': None}])
+
+    body, status, _ = run({'filePath': '/tmp/bundle.pdf', 'bundle': True})
+
+    assert status == 200
+    assert body['bundle'] is True and body['count'] == 2
+    assert budgets == [ner_service.bundle_pdf_budget]
+
+@pytest.mark.parametrize("run, controller", [
+    (flask_request, ner_service.admission),
+    (asgi_request, asgi_service.admission),
+    (sse_request, ner_service.admission)
+])
+def test_slot_released_on_error(stages, monkeypatch, run, controller):
+    def fail(text, deadline=None):
+        raise RuntimeError("model failed")
+    monkeypatch.setattr(ner_service, "transcript_fields", fail)
+
+    body, status, _ = run({'filePath': '/tmp/a.pdf'})
+
+    assert status == 500
+    snapshot = controller.snapshot()
+    assert snapshot['active'] == 0
+    assert snapshot['admitted'] == snapshot['completed']
+
+def test_sse_event_order(stages):
+    events = [event for event, _ in ner_service._extraction_events({'filePath': '/tmp/a.pdf'})]
+
+    assert events == ['text_extracted', 'entities', 'translation', 'complete']
+
+def test_abandoned_stream_releases_slot(stages):
+    events = ner_service._extraction_events({'filePath': '/tmp/a.pdf'})
+    assert next(events)[0] == 'text_extracted'
+    assert ner_service.admission.snapshot()['active'] == 1
+
+    events.close()
+
+    assert ner_service.admission.snapshot()['active'] == 0
@@ -0,0 +1,85 @@
+"""Tests for the PDF sandbox pool and its per-document budgets"""
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import pdf_sandbox
+from pdf_sandbox import PdfSandboxPool, PdfBudget, PdfBudgetExceeded, extract_text_sandboxed
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"ACADEMIC MINI TRANSCRIPT page {number + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PdfSandboxPool(size=1, budget=PdfBudget(max_pages=5, timeout=30), max_docs_per_worker=2)
+    yield pool
+    pool.close()
+
+def test_parse_returns_text_and_pages(pool, tmp_path):
+    text, pages = pool.parse(make_pdf(tmp_path / "small.pdf", 2))
+
+    assert pages == 2
+    assert "page 2" in text
+
+def test_page_budget(pool, tmp_path):
+    with pytest.raises(PdfBudgetExceeded) as error:
+        pool.parse(make_pdf(tmp_path / "long.pdf", 6))
+
+    assert error.value.kind == 'pages'
+    assert error.value.limit == 5
+
+def test_per_call_budget_overrides_pool_budget(pool, tmp_path):
+    _, pages = pool.parse(make_pdf(tmp_path / "long.pdf", 6), PdfBudget(max_pages=10, timeout=30))
+
+    assert pages == 6
+
+def test_unreadable_pdf_is_an_error(pool, tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+
+    with pytest.raises(PdfBudgetExceeded) as error:
+        pool.parse(path)
+
+    assert error.value.kind == 'error'
+
+def test_worker_is_recycled(pool, tmp_path):
+    path = make_pdf(tmp_path / "small.pdf", 1)
+    recycled = pool.snapshot()['recycled']
+
+    for _ in range(3):
+        pool.parse(path)
+
+    assert pool.snapshot()['recycled'] > recycled
+
+def test_no_free_worker_times_out(pool, tmp_path):
+    path = make_pdf(tmp_path / "small.pdf", 1)
+    pool.start()
+    busy = pool._idle.get()
+    try:
+        with pytest.raises(PdfBudgetExceeded) as error:
+            pool.parse(path, PdfBudget(timeout=0.1))
+    finally:
+        pool._idle.put(busy)
+
+    assert error.value.kind == 'timeout'
+
+def test_byte_budget_is_checked_before_hashing(pool, tmp_path, monkeypatch):
+    path = make_pdf(tmp_path / "small.pdf", 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file was read before the size check")
+
+    monkeypatch.setattr(pdf_sandbox, "get_pool", lambda: pool)
+    monkeypatch.setattr(pdf_sandbox, "cached_parse", fail)
+
+    with pytest.raises(PdfBudgetExceeded) as error:
+        extract_text_sandboxed(path, budget=PdfBudget(max_bytes=10))
+
+    assert error.value.kind == 'bytes'
+    assert error.value.limit == 10
@@ -0,0 +1,140 @@
+"""Tests for the framed Unix socket transport"""
+
+import os
+import stat
+import socket
+import threading
+
+import pytest
+
+import socket_transport
+from socket_transport import (
+    ExtractionSocketServer, ExtractionClient, send_frame, recv_frame, encode, decode, compact_result,
+    HEADER, CODEC_JSON, CODEC_MSGPACK, HAS_MSGPACK, MAX_FRAME_BYTES
+)
+
+CODECS = [CODEC_JSON, pytest.param(
+    CODEC_MSGPACK, marks=pytest.mark.skipif(not HAS_MSGPACK, reason="msgpack not installed")
+)]
+
+MESSAGE = {'op': 'extract', 'filePath': '/tmp/ünïcödé.pdf', 'timeoutMs': 5000, 'nested': [1, 2.5, None, True]}
+
+@pytest.fixture
+def pair():
+    left, right = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    yield left, right
+    left.close()
+    right.close()
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_encode_decode_round_trip(codec):
+    assert decode(encode(MESSAGE, codec), codec) == MESSAGE
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_frames_round_trip(pair, codec):
+    left, right = pair
+    send_frame(left, MESSAGE, codec)
+    send_frame(left, {'op': 'ping'}, codec)
+
+    assert recv_frame(right) == (MESSAGE, codec)
+    assert recv_frame(right) == ({'op': 'ping'}, codec)
+
+def test_closed_connection(pair):
+    left, right = pair
+    left.close()
+
+    assert recv_frame(right) == (None, None)
+
+def test_connection_closed_mid_frame(pair):
+    left, right = pair
+    left.sendall(HEADER.pack(CODEC_JSON, 100) + b'{"op"')
+    left.close()
+
+    assert recv_frame(right) == (None, None)
+
+def test_unknown_codec_is_rejected(pair):
+    left, right = pair
+    left.sendall(HEADER.pack(b"x", 2) + b"{}")
+
+    with pytest.raises(ValueError):
+        recv_frame(right)
+
+def test_oversized_frame_is_rejected(pair):
+    left, right = pair
+    left.sendall(HEADER.pack(CODEC_JSON, MAX_FRAME_BYTES + 1))
+
+    with pytest.raises(ValueError):
+        recv_frame(right)
+
+def test_compact_result():
+    body = {'program': 'DIPLOMA', 'program_english': 'DIPLOMA', 'model_based_confidence': True, 'cgpa': '3.27'}
+
+    assert compact_result(body) == {'program': 'DIPLOMA', 'cgpa': '3.27'}
+    assert compact_result({**body, 'program_english': 'DIPLOMA IN IT'})['program_english'] == 'DIPLOMA IN IT'
+
+@pytest.fixture
+def server(tmp_path):
+    requests = []
+
+    def handle_request(data, timeout_ms):
+        requests.append((data, timeout_ms))
+        return {'name': 'ALI', 'program': 'DIPLOMA', 'program_english': 'DIPLOMA'}, 200, {'X-Correlation-ID': 'abc'}
+
+    socket_path = str(tmp_path / "run" / "extraction.sock")
+    server = ExtractionSocketServer(socket_path, handle_request)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, socket_path, requests
+    server.shutdown()
+    server.server_close()
+
+def test_socket_and_directory_permissions(server):
+    _, socket_path, _ = server
+
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o660
+    assert stat.S_IMODE(os.stat(os.path.dirname(socket_path)).st_mode) == 0o750
+
+def test_bind_restores_umask(server):
+    previous = os.umask(0o022)
+    os.umask(previous)
+
+    assert previous != socket_transport.SOCKET_UMASK
+
+def test_client_ping_and_extract(server):
+    _, socket_path, requests = server
+
+    with ExtractionClient(socket_path, codec=CODEC_JSON) as client:
+        assert client.ping()
+        status, body = client.extract('/tmp/a.pdf', timeout_ms=3000)
+
+    assert status == 200
+    assert body == {'name': 'ALI', 'program': 'DIPLOMA'}
+    assert requests[0][0]['fileName'] == 'a.pdf'
+    assert requests[0][1] == 3000
+
+@pytest.mark.parametrize("message", [[1, 2], "extract", 42, None])
+def test_non_map_frame_gets_400_and_connection_stays_open(server, message):
+    _, socket_path, requests = server
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        send_frame(sock, message, CODEC_JSON)
+        reply, codec = recv_frame(sock)
+        assert codec == CODEC_JSON
+        assert reply['status'] == 400
+
+        send_frame(sock, {'op': 'ping'}, CODEC_JSON)
+        assert recv_frame(sock)[0]['status'] == 200
+
+    assert requests == []
+
+def test_unknown_op_gets_400(server):
+    _, socket_path, _ = server
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        send_frame(sock, {'op': 'delete'}, CODEC_JSON)
+        reply, _ = recv_frame(sock)
+
+    assert reply['status'] == 400
+    assert 'delete' in reply['body']['error']
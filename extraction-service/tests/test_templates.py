@@ -0,0 +1,74 @@
+"""Tests for the transcript template fast path and its validators"""
+
+import pytest
+
+from test_data import TEST_DATA
+from transcript_templates import (
+    extract_with_template, valid_name, valid_cgpa, valid_program, TemplateStats
+)
+
+LABEL_FIELDS = {'STUDENT_NAME': 'name', 'CGPA': 'cgpa', 'PROGRAM': 'program'}
+
+def gold_fields(text, annotations):
+    return {LABEL_FIELDS[label]: text[start:end] for start, end, label in annotations['entities']}
+
+@pytest.mark.parametrize("value, expected", [
+    ("MUHAMAD ALIF IMRAN BIN NORHASNI", True),
+    ("SITI NUR'AIN BINTI ABDUL-RAHMAN", True),
+    ("RAJ A/L KUMAR", True),
+    ("ALI", False),
+    ("ALI BIN ABU 2021", False),
+    ("", False),
+    (None, False),
+])
+def test_valid_name(value, expected):
+    assert valid_name(value) is expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("3.27", True), ("0.00", True), ("4.00", True), ("4.01", False), ("-1", False), ("N/A", False), (None, False)
+])
+def test_valid_cgpa(value, expected):
+    assert valid_cgpa(value) is expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("DIPLOMA SAINS KOMPUTER", True),
+    ("Bachelor of Computer Science", True),
+    ("FAKULTI SAINS KOMPUTER DAN MATEMATIK", False),
+    ("DIPLOMA " + "X" * 200, False),
+    (None, False),
+])
+def test_valid_program(value, expected):
+    assert valid_program(value) is expected
+
+def test_templates_agree_with_gold_labels():
+    matched = 0
+    for text, annotations in TEST_DATA:
+        name, fields = extract_with_template(text, stats=None)
+        if fields is None:
+            continue
+        matched += 1
+        gold = gold_fields(text, annotations)
+        assert fields['name'] == gold['name']
+        assert fields['program'] == gold['program']
+        assert float(fields['cgpa']) == pytest.approx(float(gold['cgpa']))
+    assert matched > 0
+
+def test_failed_validation_falls_back():
+    text, _ = TEST_DATA[0]
+    stats = TemplateStats()
+    gold_cgpa = gold_fields(*TEST_DATA[0])['cgpa']
+    broken = text.replace(f"\n{gold_cgpa}\nCODE", "\n9.99\nCODE", 1)
+    assert broken != text
+
+    template_name, fields = extract_with_template(broken, stats=stats)
+
+    assert template_name is not None
+    assert fields is None
+    snapshot = stats.snapshot()
+    assert snapshot['templates'][template_name]['validation_failures'] == 1
+
+def test_unknown_layout_is_unmatched():
+    stats = TemplateStats()
+
+    assert extract_with_template("OFFICIAL TRANSCRIPT\nSome other layout", stats=stats) == (None, None)
+    assert stats.snapshot()['unmatched'] == 1
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Request Tracing
+Accepts W3C traceparent / X-Correlation-ID headers, records timed spans
+for each extraction stage and exports finished traces as OTLP JSON lines
+to a file or stdout
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import secrets
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# none, stdout or file
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.otlp.jsonl")
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "ner_service")
+
+TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+CORRELATION_ID_PATTERN = re.compile(r"^[0-9A-Za-z-]{1,64}$")
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def new_trace_id():
+    return secrets.token_hex(16)
+
+def new_span_id():
+    return secrets.token_hex(8)
+
+def trace_context(traceparent=None, correlation_id=None):
+    """
+    Trace ID and parent span ID for an incoming request
+
+    A valid traceparent wins; otherwise a correlation ID is reused as the
+    trace ID (hex IDs as-is, anything else hashed into one). Without
+    either a new trace is started.
+
+    Returns:
+        (trace_id, parent_span_id or None)
+    """
+    if traceparent:
+        match = TRACEPARENT_PATTERN.match(traceparent.strip().lower())
+        if match and match.group(1) != "0" * 32:
+            return match.group(1), match.group(2)
+
+    if correlation_id and CORRELATION_ID_PATTERN.match(correlation_id):
+        compact = correlation_id.replace("-", "").lower()
+        if re.fullmatch(r"[0-9a-f]{32}", compact):
+            return compact, None
+        return hashlib.sha256(correlation_id.encode("utf-8")).hexdigest()[:32], None
+
+    return new_trace_id(), None
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(self, name, trace_id, parent, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_span_id = parent.span_id if isinstance(parent, Span) else parent
+        self.root = parent.root if isinstance(parent, Span) else self
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_OK
+        self.status_message = None
+
+        # Finished spans of the whole trace, collected on the root
+        if self.root is self:
+            self.finished = []
+            self._lock = threading.Lock()
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        with self.root._lock:
+            self.root.finished.append(self)
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': self.status}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+class OtlpJsonExporter:
+    """
+    Writes each finished trace as one OTLP/JSON ExportTraceServiceRequest
+    line, the format the OpenTelemetry Collector's otlpjsonfile receiver reads
+
+    Args:
+        target: 'stdout' or a file path
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        line = json.dumps({
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', SERVICE_NAME)]},
+                'scopeSpans': [{
+                    'scope': {'name': 'dreamfund.tracing'},
+                    'spans': [span.to_otlp() for span in spans]
+                }]
+            }]
+        }, separators=(",", ":"))
+
+        with self._lock:
+            try:
+                if self.target == 'stdout':
+                    sys.stdout.write(line + "\n")
+                    sys.stdout.flush()
+                else:
+                    with open(self.target, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"Trace export failed: {e}")
+
+def _default_exporter():
+    if TRACE_EXPORTER == 'stdout':
+        return OtlpJsonExporter('stdout')
+    if TRACE_EXPORTER == 'file':
+        return OtlpJsonExporter(TRACE_FILE)
+    return None
+
+exporter = _default_exporter()
+
+def current_span():
+    return _current_span.get()
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+@contextmanager
+def start_trace(name, context=None, **attributes):
+    """
+    Root span for one incoming request
+
+    Spans opened inside the block (also in threads started with a copy of
+    the context) join this trace; the whole trace is exported at the end.
+
+    Args:
+        name: Span name, e.g. "POST /api/extract"
+        context: (trace_id, parent_span_id) from trace_context (default: new trace)
+    """
+    trace_id, parent_span_id = context or (new_trace_id(), None)
+    root = Span(name, trace_id, parent_span_id, SPAN_KIND_SERVER, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+        if exporter:
+            with root._lock:
+                spans = list(root.finished)
+            exporter.export(spans)
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current one (does nothing outside a trace)"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, parent.trace_id, parent, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+class TraceIdFilter(logging.Filter):
+    """Adds trace_prefix ("[<trace id>] " inside a trace) to log records"""
+
+    def filter(self, record):
+        trace_id = current_trace_id()
+        record.trace_prefix = f"[{trace_id}] " if trace_id else ""
+        return True
+
+def install_log_correlation(log_format="%(levelname)s:%(name)s:%(trace_prefix)s%(message)s"):
+    """Prefix every root-logger line written during a request with its trace ID"""
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(TraceIdFilter())
+        handler.setFormatter(logging.Formatter(log_format))
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Transcript Templates
+Rule-based extraction for known transcript layouts, used as a fast path
+before the NER model
+"""
+
+import re
+import time
+import threading
+
+# Confidence given to a field that matched its template rule and passed validation
+TEMPLATE_CONFIDENCE = 0.95
+
+NAME_PARTICLES = {'BIN', 'BINTI', 'BT', 'BINTE', 'A/L', 'A/P', "@"}
+PROGRAM_KEYWORDS = ['DIPLOMA', 'DEGREE', 'BACHELOR', 'MASTER', 'IJAZAH', 'SARJANA', 'ASASI', 'FOUNDATION']
+
+class TranscriptTemplate:
+    """
+    A known layout: a signature that recognises it and one rule per field
+
+    Every rule is a compiled regex whose 'value' group holds the field.
+    """
+
+    def __init__(self, name, signature, rules):
+        self.name = name
+        self.signature = signature
+        self.rules = rules
+
+    def matches(self, text):
+        """Whether the text has this template's layout signature"""
+        return self.signature.search(text) is not None
+
+    def extract(self, text):
+        """
+        Apply every field rule
+
+        Returns:
+            dict field -> value (None for a rule that didn't match)
+        """
+        fields = {}
+        for field, rule in self.rules.items():
+            match = rule.search(text)
+            fields[field] = match.group('value').strip() if match else None
+        return fields
+
+# UiTM mini transcript with the labels in one column and the values after
+# them: the name follows the gender line, and FINAL CGPA is followed by the
+# program (after the birthplace on layouts that have one), the postcode line
+# and then the CGPA.
+UITM_MINI_COLUMN = TranscriptTemplate(
+    name='uitm_mini_column',
+    signature=re.compile(
+        r'\AACADEMIC MINI TRANSCRIPT[ \t]*\nNAME[ \t]*\n(?:BIRTHDATE[ \t]*\n)?GENDER[ \t]*\nPROGRAM[ \t]*\n'
+    ),
+    rules={
+        'name': re.compile(r'^[ \t]*(?:MALE|FEMALE)[ \t]*\n[ \t]*(?P<value>[^\n]+?)[ \t]*$', re.M),
+        'program': re.compile(
+            r'^FINAL CGPA[ \t]*\n(?:[^\n]*\n)??[ \t]*(?P<value>[^\n]+?)[ \t]*\n[^\n]*\b\d{5}\b', re.M
+        ),
+        'cgpa': re.compile(
+            r'^FINAL CGPA[ \t]*\n(?:[^\n]*\n){1,2}?[^\n]*\b\d{5}\b[^\n]*\n[ \t]*(?P<value>\d\.\d{1,2})[ \t]*$',
+            re.M
+        )
+    }
+)
+
+# UiTM mini transcript with every label directly followed by its value
+UITM_MINI_KEY_VALUE = TranscriptTemplate(
+    name='uitm_mini_key_value',
+    signature=re.compile(r'\AACADEMIC MINI TRANSCRIPT[ \t]*\n(?:[ \t]*\n)*NAME[ \t]*\n(?!GENDER|BIRTHDATE)'),
+    rules={
+        'name': re.compile(r'^NAME[ \t]*\n[ \t]*(?P<value>[^\n]+?)[ \t]*$', re.M),
+        'program': re.compile(r'^PROGRAM[ \t]*\n[ \t]*(?P<value>[^\n]+?)[ \t]*$', re.M),
+        # The postcode line sometimes lands between FINAL CGPA and its value
+        'cgpa': re.compile(
+            r'^FINAL CGPA[ \t]*\n(?:[^\n]*\b\d{5}\b[^\n]*\n)?[ \t]*(?P<value>\d\.\d{1,2})[ \t]*$', re.M
+        )
+    }
+)
+
+TEMPLATES = [UITM_MINI_COLUMN, UITM_MINI_KEY_VALUE]
+
+def valid_name(value):
+    """2-8 alphabetic words (Malay/Indian name particles allowed)"""
+    if not value:
+        return False
+    words = value.split()
+    if not 2 <= len(words) <= 8:
+        return False
+    return all(
+        word.upper() in NAME_PARTICLES or word.replace('-', '').replace("'", '').isalpha()
+        for word in words
+    )
+
+def valid_cgpa(value):
+    """A number between 0.00 and 4.00"""
+    try:
+        return 0.0 <= float(value) <= 4.0
+    except (TypeError, ValueError):
+        return False
+
+def valid_program(value):
+    """Program names start from a qualification keyword"""
+    if not value or len(value) > 200:
+        return False
+    return any(kw in value.upper() for kw in PROGRAM_KEYWORDS)
+
+VALIDATORS = {
+    'name': valid_name,
+    'cgpa': valid_cgpa,
+    'program': valid_program
+}
+
+class TemplateStats:
+    """Thread-safe per-template counters for the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.unmatched = 0
+        self.templates = {
+            template.name: {'matched': 0, 'hits': 0, 'validation_failures': 0, 'seconds': 0.0}
+            for template in TEMPLATES
+        }
+
+    def record(self, template_name, hit, seconds):
+        """Count one document (template_name None when no signature matched)"""
+        with self._lock:
+            if template_name is None:
+                self.unmatched += 1
+                return
+            counts = self.templates.setdefault(
+                template_name, {'matched': 0, 'hits': 0, 'validation_failures': 0, 'seconds': 0.0}
+            )
+            counts['matched'] += 1
+            counts['seconds'] += seconds
+            if hit:
+                counts['hits'] += 1
+            else:
+                counts['validation_failures'] += 1
+
+    def snapshot(self):
+        """Counts, hit rates and mean match time per template"""
+        with self._lock:
+            templates = {}
+            total_hits = 0
+            for name, counts in self.templates.items():
+                matched = counts['matched']
+                total_hits += counts['hits']
+                templates[name] = {
+                    'matched': matched,
+                    'hits': counts['hits'],
+                    'validation_failures': counts['validation_failures'],
+                    'hit_rate': round(counts['hits'] / matched, 4) if matched else 0.0,
+                    'mean_us': round(counts['seconds'] / matched * 1e6, 1) if matched else 0.0
+                }
+            total = sum(c['matched'] for c in self.templates.values()) + self.unmatched
+            return {
+                'documents': total,
+                'unmatched': self.unmatched,
+                'fast_path_rate': round(total_hits / total, 4) if total else 0.0,
+                'templates': templates
+            }
+
+# Global stats instance
+template_stats = TemplateStats()
+
+# Every transcript in a faculty bundle starts with this header line
+BUNDLE_ANCHOR = re.compile(r'^ACADEMIC MINI TRANSCRIPT[ \t]*$', re.MULTILINE)
+
+def split_bundle(text):
+    """
+    Split text holding several transcripts into one segment per student
+
+    Each segment runs from an "ACADEMIC MINI TRANSCRIPT" header to the next
+    one; text before the first header (e.g. a cover page) is dropped. Text
+    without any header comes back as a single segment.
+    """
+    starts = [match.start() for match in BUNDLE_ANCHOR.finditer(text)]
+    if not starts:
+        return [text]
+    return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+def detect_template(text):
+    """First template whose signature matches the text, or None"""
+    for template in TEMPLATES:
+        if template.matches(text):
+            return template
+    return None
+
+def extract_with_template(text, stats=template_stats):
+    """
+    Try the template fast path
+
+    Returns:
+        (template name or None, fields dict or None). Fields are only
+        returned when every rule matched and passed validation; otherwise
+        the caller should fall back to the NER model.
+    """
+    start = time.perf_counter()
+
+    template = detect_template(text)
+    if template is None:
+        if stats:
+            stats.record(None, False, 0.0)
+        return None, None
+
+    fields = template.extract(text)
+    valid = all(VALIDATORS[field](value) for field, value in fields.items())
+
+    if valid:
+        fields['cgpa'] = f"{float(fields['cgpa']):.2f}"
+
+    if stats:
+        stats.record(template.name, valid, time.perf_counter() - start)
+
+    return template.name, fields if valid else None
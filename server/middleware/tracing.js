@@ -0,0 +1,48 @@
+const crypto = require('crypto')
+
+// W3C trace context: version-traceId-parentSpanId-flags
+const TRACEPARENT_PATTERN = /^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$/
+const CORRELATION_ID_PATTERN = /^[0-9A-Za-z-]{1,64}$/
+
+// Trace ID from an incoming traceparent or X-Correlation-ID, else a new one
+const incomingTraceId = (req) => {
+  const match = TRACEPARENT_PATTERN.exec((req.header('traceparent') || '').trim().toLowerCase())
+  if (match && !/^0+$/.test(match[1])) {
+    return match[1]
+  }
+
+  const correlationId = req.header('X-Correlation-ID')
+  if (correlationId && CORRELATION_ID_PATTERN.test(correlationId)) {
+    const compact = correlationId.replace(/-/g, '').toLowerCase()
+    if (/^[0-9a-f]{32}$/.test(compact)) {
+      return compact
+    }
+    return crypto.createHash('sha256').update(correlationId).digest('hex').slice(0, 32)
+  }
+
+  return crypto.randomBytes(16).toString('hex')
+}
+
+// Gives every request a trace ID (echoed as X-Correlation-ID) and logs its duration
+const tracing = (req, res, next) => {
+  req.traceId = incomingTraceId(req)
+  req.spanId = crypto.randomBytes(8).toString('hex')
+  res.set('X-Correlation-ID', req.traceId)
+
+  const start = process.hrtime.bigint()
+  res.on('finish', () => {
+    const ms = Number(process.hrtime.bigint() - start) / 1e6
+    console.log(`🧵 [${req.traceId}] ${req.method} ${req.originalUrl} ${res.statusCode} ${ms.toFixed(1)}ms`)
+  })
+
+  next()
+}
+
+// Headers that continue this request's trace in a downstream service
+const traceHeaders = (req) => ({
+  'traceparent': `00-${req.traceId}-${req.spanId}-01`,
+  'X-Correlation-ID': req.traceId
+})
+
+module.exports = tracing
+module.exports.traceHeaders = traceHeaders
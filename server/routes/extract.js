@@ -1,13 +1,20 @@
 const express = require('express');
 const axios = require('axios');
 const router = express.Router();
+const { traceHeaders } = require('../middleware/tracing');
+
+// Python service timeout; forwarded so it can shed work it won't finish in time
+const EXTRACTION_TIMEOUT_MS = 30000;
+
+// Bundles (one PDF holding many students' transcripts) get longer
+const BUNDLE_TIMEOUT_MS = 300000;
 
 // Extract data from uploaded document
 router.post('/', async (req, res) => {
   try {
-    console.log('📄 Extract request received:', req.body);
+    console.log(`📄 [${req.traceId}] Extract request received:`, req.body);
 
-    const { fileId, fileName, filePath } = req.body;
+    const { fileId, fileName, filePath, bundle } = req.body;
 
     if (!filePath) {
       return res.status(400).json({
@@ -19,24 +26,40 @@ router.post('/', async (req, res) => {
       });
     }
 
+    // With bundle set the response lists one result per student in `students`
+    const timeoutMs = bundle ? BUNDLE_TIMEOUT_MS : EXTRACTION_TIMEOUT_MS;
+
     try {
       // Call Python extraction service
       const response = await axios.post('http://localhost:5001/api/extract', {
         filePath: filePath,
         fileName: fileName,
-        fileId: fileId
+        fileId: fileId,
+        bundle: Boolean(bundle)
       }, {
-        timeout: 30000,
+        timeout: timeoutMs,
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          'X-Request-Timeout-Ms': String(timeoutMs),
+          ...traceHeaders(req)
         }
       });
 
-      console.log('✅ Python extraction successful:', response.data);
+      console.log(`✅ [${req.traceId}] Python extraction successful:`, response.data);
       res.json(response.data);
 
     } catch (extractionError) {
-      console.error('❌ Python extraction service error:', extractionError.message);
+      console.error(`❌ [${req.traceId}] Python extraction service error:`, extractionError.message);
+
+      // Overloaded or warming up: pass the status and Retry-After through
+      const upstream = extractionError.response;
+      if (upstream && (upstream.status === 429 || upstream.status === 503)) {
+        const retryAfter = upstream.headers['retry-after'];
+        if (retryAfter) {
+          res.set('Retry-After', retryAfter);
+        }
+        return res.status(upstream.status).json(upstream.data);
+      }
       
       if (extractionError.code === 'ECONNREFUSED') {
         console.error('🐍 Python extraction service is not running on port 5000');
@@ -45,6 +68,7 @@ router.post('/', async (req, res) => {
       
       return res.status(503).json({
         error: "Extraction service unavailable. Please start the Python service.",
+        code: extractionError.code || null,
         name: null,
         cgpa: null,
         program: null,
@@ -64,4 +88,71 @@ router.post('/', async (req, res) => {
   }
 });
 
+// Extract with progress: relays the Python service's server-sent events
+// (text_extracted, entities, translation, complete or error)
+router.post('/stream', async (req, res) => {
+  const { fileId, fileName, filePath } = req.body;
+
+  if (!filePath) {
+    return res.status(400).json({
+      error: 'Missing file path',
+      name: null,
+      cgpa: null,
+      program: null,
+      confidence: { name: 0.0, cgpa: 0.0, program: 0.0 }
+    });
+  }
+
+  try {
+    const response = await axios.post('http://localhost:5001/api/extract/stream', {
+      filePath: filePath,
+      fileName: fileName,
+      fileId: fileId
+    }, {
+      timeout: EXTRACTION_TIMEOUT_MS,
+      responseType: 'stream',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Request-Timeout-Ms': String(EXTRACTION_TIMEOUT_MS),
+        ...traceHeaders(req)
+      }
+    });
+
+    res.set({
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive'
+    });
+    res.flushHeaders();
+
+    response.data.pipe(res);
+
+    // Stop reading from Python if the browser goes away
+    res.on('close', () => response.data.destroy());
+
+  } catch (extractionError) {
+    console.error(`❌ [${req.traceId}] Python extraction stream error:`, extractionError.message);
+
+    // Rejected before streaming started: pass the JSON error through
+    const upstream = extractionError.response;
+    if (upstream && [400, 429, 503].includes(upstream.status)) {
+      const retryAfter = upstream.headers['retry-after'];
+      if (retryAfter) {
+        res.set('Retry-After', retryAfter);
+      }
+      res.status(upstream.status).type('application/json');
+      return upstream.data.pipe(res);
+    }
+
+    return res.status(503).json({
+      error: "Extraction service unavailable. Please start the Python service.",
+      code: extractionError.code || null,
+      name: null,
+      cgpa: null,
+      program: null,
+      confidence: { name: 0.0, cgpa: 0.0, program: 0.0 }
+    });
+  }
+});
+
 module.exports = router;
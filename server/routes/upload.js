@@ -50,10 +50,11 @@ router.post('/', upload.single('document'), (req, res) => {
       return res.status(400).json({ error: 'No file uploaded' })
     }
 
-    console.log('📁 File uploaded:', req.file.filename)
+    console.log(`📁 [${req.traceId}] File uploaded:`, req.file.filename)
 
     res.json({
       success: true,
+      traceId: req.traceId,
       fileId: req.file.filename,
       filePath: req.file.path,
       originalName: req.file.originalname,
@@ -63,7 +64,7 @@ router.post('/', upload.single('document'), (req, res) => {
     })
 
   } catch (error) {
-    console.error('❌ Upload error:', error)
+    console.error(`❌ [${req.traceId}] Upload error:`, error)
     res.status(500).json({ 
       success: false,
       message: 'Upload failed: ' + error.message 
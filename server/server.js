@@ -67,8 +67,10 @@ module.exports = connectDB;
 // Middleware
 app.use(cors({
   origin: ['http://localhost:3000', 'http://localhost:3001'],
-  credentials: true
+  credentials: true,
+  exposedHeaders: ['X-Correlation-ID', 'Retry-After']
 }))
+app.use(require('./middleware/tracing'))
 app.use(express.json())
 app.use(express.urlencoded({ extended: true }))
 